@@ -0,0 +1,59 @@
+""" стоимость шага пересчета группировки спутников в зависимости от ее размера.
+
+    Сравниваются группировка Constellation (все спутники одним шагом по массивам)
+    и N отдельных шагов Satellite._update_position - столько же, сколько платят
+    N процессов Satellite, по одному на спутник.
+
+    Запуск из корня репозитория:
+        python -m benchmarks.constellation_bench
+"""
+from math import pi
+from time import perf_counter
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.system.config import LOG_ERROR
+from src.system.queues_dir import QueuesDirectory
+from src.satellite_simulator.constellation import Constellation, walker_orbits
+from src.satellite_simulator.orbit import orbit_state
+from src.satellite_simulator.satellite import EARTH_RADIUS, Satellite
+
+SIZES = (1, 10, 100, 1000)
+DT = 30.0
+
+
+def _time_per_step(step, steps: int) -> float:
+    started = perf_counter()
+    for _ in range(steps):
+        step()
+    return (perf_counter() - started) / steps
+
+
+def main():
+    queues_dir = QueuesDirectory()
+    print(f"{'спутников':<12}{'группировка, мкс':>18}{'N x Satellite, мкс':>20}{'ускорение':>12}")
+    for size in SIZES:
+        orbits = walker_orbits(size, min(size, 10), 1000e3, pi / 3)
+        steps = max(20, 20000 // size)
+
+        constellation = Constellation(orbits=orbits, queues_dir=queues_dir, log_level=LOG_ERROR)
+        batched = _time_per_step(lambda: constellation._update_positions(DT), steps)
+
+        # состояние каждого спутника - как у отдельного Satellite
+        satellites = []
+        for altitude, angle, inclination, raan in orbits:
+            position, velocity = orbit_state(EARTH_RADIUS + altitude, raan, angle, inclination)
+            satellites.append(SimpleNamespace(_position=np.array(position), _velocity=np.array(velocity)))
+
+        def separate():
+            for satellite in satellites:
+                Satellite._update_position(satellite, DT)
+
+        single = _time_per_step(separate, steps)
+        print(f"{size:<12}{batched * 1e6:>18.1f}{single * 1e6:>20.1f}{single / batched:>11.1f}x")
+    queues_dir.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+""" точность методов интегрирования движения спутника в зависимости от числа шагов на виток.
+
+    Спутник на круговой орбите 1000 км продвигается на ORBITS витков.
+    Для методов с постоянным шагом (Verlet, RK4, Йошида 4) перебирается число
+    шагов на виток, для методов с выбором шага (propagate) - допустимая ошибка.
+    Выводятся: шаги на виток, вычисления ускорения на виток, наибольший уход
+    удельной энергии и радиуса орбиты (относительный), ошибка положения
+    относительно аналитического решения в конце и время расчета.
+
+    Запуск из корня репозитория:
+        python -m benchmarks.integrator_bench
+"""
+from math import pi
+from time import perf_counter
+
+import numpy as np
+
+from src.satellite_simulator.integrators import propagate, rk4_step, verlet_step, yoshida4_step
+from src.satellite_simulator.orbit import EARTH_RADIUS, PROPAGATION_RK4, PROPAGATION_RK45, \
+    PROPAGATION_YOSHIDA4, circular_state, mean_motion, orbit_state, specific_energy
+
+ALTITUDE = 1000e3
+INCLINATION = pi / 3
+ORBITS = 10
+STEPS_PER_ORBIT = (16, 32, 64, 128, 256)
+TOLERANCES = (1e-6, 1e-8, 1e-10, 1e-12)
+# интервал пересчета симулятора при проверке методов с выбором шага (сек.)
+RECALC_SEC = 300.0
+
+# вычислений ускорения на шаг
+_FIXED = (("verlet", verlet_step, 2), ("rk4", rk4_step, 4), ("yoshida4", yoshida4_step, 3))
+
+
+def _measure(run) -> dict:
+    """ прогон метода: run() возвращает траекторию [(pos, vel)] и число шагов """
+    radius = EARTH_RADIUS + ALTITUDE
+    pos0, vel0 = orbit_state(radius, 0.0, 0.0, INCLINATION)
+    energy0 = specific_energy(pos0, vel0)
+    started = perf_counter()
+    states, steps = run(pos0, vel0)
+    elapsed = perf_counter() - started
+    energy_drift = max(abs(specific_energy(pos, vel) - energy0) / abs(energy0) for pos, vel in states)
+    radius_drift = max(abs(np.linalg.norm(pos) - radius) / radius for pos, _ in states)
+    period = 2 * pi / mean_motion(radius)
+    exact, _ = circular_state(radius, 0.0, 0.0, INCLINATION, ORBITS * period)
+    return {
+        "steps_per_orbit": steps / ORBITS,
+        "energy_drift": energy_drift,
+        "radius_drift": radius_drift,
+        "position_error_m": float(np.linalg.norm(states[-1][0] - exact)),
+        "ms": elapsed * 1000,
+    }
+
+
+def _fixed_run(step, steps_per_orbit: int):
+    period = 2 * pi / mean_motion(EARTH_RADIUS + ALTITUDE)
+    h = period / steps_per_orbit
+
+    def run(pos, vel):
+        states = []
+        for _ in range(steps_per_orbit * ORBITS):
+            pos, vel = step(pos, vel, h)
+            states.append((pos, vel))
+        return states, steps_per_orbit * ORBITS
+    return run
+
+
+def _adaptive_run(method: str, tolerance: float):
+    period = 2 * pi / mean_motion(EARTH_RADIUS + ALTITUDE)
+    intervals = int(round(ORBITS * period / RECALC_SEC))
+    dt = ORBITS * period / intervals
+
+    def run(pos, vel):
+        states = []
+        total = 0
+        h = None
+        for _ in range(intervals):
+            pos, vel, h, steps = propagate(method, pos, vel, dt, tolerance, h)
+            total += steps
+            states.append((pos, vel))
+        return states, total
+    return run
+
+
+def _row(name: str, setting: str, result: dict, evaluations: float):
+    print(f"{name:<10}{setting:>10}{result['steps_per_orbit']:>13.1f}{evaluations:>14.0f}"
+          f"{result['energy_drift']:>14.2e}{result['radius_drift']:>14.2e}"
+          f"{result['position_error_m']:>14.3e}{result['ms']:>10.1f}")
+
+
+def main():
+    print(f"{'метод':<10}{'параметр':>10}{'шагов/виток':>13}{'ускор./виток':>14}"
+          f"{'уход энергии':>14}{'уход радиуса':>14}{'ошибка, м':>14}{'мс':>10}")
+    for name, step, evaluations in _FIXED:
+        for steps_per_orbit in STEPS_PER_ORBIT:
+            result = _measure(_fixed_run(step, steps_per_orbit))
+            _row(name, f"{steps_per_orbit}", result, steps_per_orbit * evaluations)
+    # с выбором шага: RK45 - 7 вычислений на попытку, RK4 и Йошида - шаг и два половинных
+    for method, evaluations in ((PROPAGATION_RK45, 7), (PROPAGATION_RK4, 12), (PROPAGATION_YOSHIDA4, 9)):
+        for tolerance in TOLERANCES:
+            result = _measure(_adaptive_run(method, tolerance))
+            _row(method, f"{tolerance:.0e}", result, result["steps_per_orbit"] * evaluations)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+""" пропускная способность и задержка обработки команд под нагрузкой, без экрана.
+
+    Система собирается из setup_system и setup_policies без отрисовщика.
+    Генератор подает обработчику команд (через монитор безопасности, от имени
+    клиента) события upload_file, в каждом одна команда: ORBIT, MAKE PHOTO,
+    ADD ZONE или REMOVE ZONE (зоны добавляются и удаляются по очереди),
+    с заданной частотой для каждого вида команд.
+
+    Каждый файл начинает трассу, команда продолжает ее (см. tracing.py),
+    сборщик трасс раскладывает запросы, по ним для каждого вида команд
+    считаются пропускная способность и задержка от отправки файла до конца
+    обработки (p50, p99). Результат выводится в JSON (или пишется в файл).
+
+    Запуск из корня репозитория:
+        python -m benchmarks.load_bench --orbit 5 --photo 20 --zone 10 --duration 30 -o load.json
+"""
+import argparse
+import heapq
+import json
+import os
+import tempfile
+from time import monotonic, sleep
+from typing import Dict, List, Tuple
+
+from src.system.config import CLIENT_QUEUE_NAME, COMMAND_HANDLER_QUEUE_NAME, LOG_ERROR, \
+    SECURITY_MONITOR_QUEUE_NAME
+from src.system.event_types import Event
+from src.system.log_pipeline import LogWriter
+from src.system.metrics import LatencyStats
+from src.system.queues_dir import QueuesDirectory
+from src.system.system_wrapper import SystemComponentsContainer, configure_start_method
+from src.system.trace_collector import TraceCollector
+from src.system.tracing import start_trace
+from src.system.monitor_group import SecurityMonitorGroup
+from src.satellite_control_system.security_monitor import SecurityMonitor
+from satellite_control_system import SECURITY_MONITOR_SHARDS, START_METHOD, \
+    setup_policies, setup_system
+
+# пользователь с правами на все команды (см. CommandHandler)
+LOGIN = PASSWORD = 'Admin'
+# номера зон генератора, чтобы не задевать зоны, добавленные вручную
+FIRST_ZONE_ID = 100000
+
+
+class CommandSource:
+    """ поток команд генератора с заданной частотой, line() - текст очередной команды.
+        Поток ZONE по очереди добавляет зону и удаляет только что добавленную """
+
+    def __init__(self, name: str, rate: float):
+        self.name = name
+        self.rate = rate
+        self._counter = 0
+
+    def line(self) -> str:
+        self._counter += 1
+        if self.name == 'ORBIT':
+            # высота, долгота восходящего узла и наклонение - в пределах проверки орбиты
+            return f"ORBIT {1000e3 + (self._counter % 10) * 10e3:.1f} 0.3 0.5"
+        if self.name == 'MAKE PHOTO':
+            return "MAKE PHOTO"
+        zone_id = FIRST_ZONE_ID + (self._counter + 1) // 2
+        if self._counter % 2:
+            return f"ADD ZONE {zone_id} 10.0 10.0 20.0 20.0"
+        return f"REMOVE ZONE {zone_id}"
+
+
+def command_name(line: str) -> str:
+    """ вид команды по ее тексту: ORBIT, MAKE PHOTO, ADD ZONE, REMOVE ZONE """
+    words = line.split()
+    return words[0] if words[0] == 'ORBIT' else ' '.join(words[:2])
+
+
+def schedule(sources: List[CommandSource], duration: float) -> List[Tuple[float, CommandSource]]:
+    """ времена отправки (от начала) всех команд всех видов, по возрастанию """
+    streams = []
+    for source in sources:
+        if source.rate <= 0:
+            continue
+        count = int(duration * source.rate)
+        streams.append([(idx / source.rate, idx, source) for idx in range(count)])
+    return [(offset, source) for offset, _, source in heapq.merge(*streams, key=lambda item: item[0])]
+
+
+def run_load(args) -> dict:
+    """ запуск системы, подача нагрузки и сбор результатов по трассам """
+    configure_start_method(START_METHOD)
+    work_dir = tempfile.mkdtemp(prefix="load_bench_")
+    traces_path = os.path.join(work_dir, "traces.jsonl")
+    log_path = args.log or os.path.join(work_dir, "system.jsonl")
+    queues_dir = QueuesDirectory()
+    # журнал только в файл: на экран выводится результат
+    log_writer = LogWriter(queues_dir, path=log_path, console=False)
+    policies = setup_policies()
+    modules = setup_system(queues_dir, log_level=LOG_ERROR, with_drawer=False)
+    modules.append(SecurityMonitorGroup(
+        queues_dir=queues_dir,
+        shards=SECURITY_MONITOR_SHARDS,
+        monitor_factory=lambda shard: SecurityMonitor(
+            queues_dir=queues_dir, log_level=LOG_ERROR, policies=policies, shard=shard),
+        log_level=LOG_ERROR))
+    modules.append(TraceCollector(
+        queues_dir=queues_dir, path=traces_path, trace_timeout_sec=0.5,
+        report_interval_sec=3600.0, log_level=LOG_ERROR))
+    system_components = SystemComponentsContainer(
+        components=modules, log_level=LOG_ERROR, log_writer=log_writer)
+    system_components.start()
+
+    sources = [CommandSource('ORBIT', args.orbit), CommandSource('MAKE PHOTO', args.photo),
+               CommandSource('ZONE', args.zone)]
+    sent: Dict[int, Tuple[str, float]] = {}
+    queue = queues_dir.get_queue(SECURITY_MONITOR_QUEUE_NAME)
+    started = monotonic()
+    late = 0
+    for offset, source in schedule(sources, args.duration):
+        delay = started + offset - monotonic()
+        if delay > 0:
+            sleep(delay)
+        elif delay < -0.01:
+            late += 1
+        line = source.line()
+        event = start_trace(Event(
+            source=CLIENT_QUEUE_NAME,
+            destination=COMMAND_HANDLER_QUEUE_NAME,
+            operation='upload_file',
+            parameters=[[line], LOGIN, PASSWORD]))
+        sent[event.trace_id] = (command_name(line), event.timestamp)
+        queue.put(event)
+    send_sec = monotonic() - started
+
+    sleep(args.settle)
+    system_components.stop()
+    queues_dir.close()
+    result = summarize(traces_path, sent, send_sec, late)
+    result["log_file"] = log_path
+    return result
+
+
+def summarize(traces_path: str, sent: Dict[int, Tuple[str, float]], send_sec: float, late: int) -> dict:
+    """ пропускная способность и задержки по видам команд из файла разложенных трасс """
+    stats: Dict[str, LatencyStats] = {}
+    counts: Dict[str, int] = {}
+    first_sent: Dict[str, float] = {}
+    last_done: Dict[str, float] = {}
+    for command, timestamp in sent.values():
+        counts[command] = counts.get(command, 0) + 1
+        first_sent[command] = min(first_sent.get(command, timestamp), timestamp)
+    if os.path.exists(traces_path):
+        with open(traces_path, encoding='utf-8') as file:
+            for line in file:
+                record = json.loads(line)
+                entry = sent.get(record["trace_id"])
+                if entry is None:
+                    continue
+                command, timestamp = entry
+                latency = record["total_ms"] / 1000
+                stats.setdefault(command, LatencyStats()).add(latency)
+                last_done[command] = max(last_done.get(command, 0.0), timestamp + latency)
+
+    commands = {}
+    for command, count in sorted(counts.items()):
+        command_stats = stats.get(command, LatencyStats())
+        span = last_done.get(command, 0.0) - first_sent[command]
+        commands[command] = {
+            "sent": count,
+            "completed": command_stats.count,
+            "throughput_per_sec": command_stats.count / span if span > 0 else 0.0,
+            "mean_ms": command_stats.mean * 1000,
+            "p50_ms": command_stats.percentile(50) * 1000,
+            "p99_ms": command_stats.percentile(99) * 1000,
+            "max_ms": command_stats.max * 1000,
+        }
+    total_sent = len(sent)
+    total_completed = sum(item["completed"] for item in commands.values())
+    span = (max(last_done.values()) - min(first_sent.values())) if last_done else 0.0
+    return {
+        "send_sec": send_sec,
+        "late_sends": late,
+        "sent": total_sent,
+        "completed": total_completed,
+        "throughput_per_sec": total_completed / span if span > 0 else 0.0,
+        "commands": commands,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="нагрузка командами без экрана")
+    parser.add_argument("--orbit", type=float, default=2.0, help="команд ORBIT в секунду")
+    parser.add_argument("--photo", type=float, default=10.0, help="команд MAKE PHOTO в секунду")
+    parser.add_argument("--zone", type=float, default=4.0,
+                        help="команд ADD ZONE и REMOVE ZONE (поровну) в секунду")
+    parser.add_argument("--duration", type=float, default=10.0, help="время подачи нагрузки (сек.)")
+    parser.add_argument("--settle", type=float, default=3.0,
+                        help="время на обработку поданных команд перед остановкой (сек.)")
+    parser.add_argument("--log", help="файл журнала системы (JSON Lines), по умолчанию - во временном каталоге")
+    parser.add_argument("-o", "--output", help="файл результата (JSON), по умолчанию - вывод на экран")
+    args = parser.parse_args()
+
+    result = run_load(args)
+    result["config"] = {"orbit": args.orbit, "photo": args.photo, "zone": args.zone,
+                        "duration": args.duration, "settle": args.settle}
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+""" воспроизведение записи событий монитора безопасности в новой системе.
+
+    Запись включается в satellite_control_system.py (CAPTURE_FILE_PATH), у каждого
+    экземпляра группы мониторов свой файл. Система для воспроизведения собирается
+    из setup_system и setup_policies без отрисовщика, кадры записи подаются
+    в очередь монитора безопасности с интервалами как при записи (--realtime)
+    или с максимальной скоростью.
+
+    По умолчанию подаются только события обработчика команд и клиента:
+    остальные события система создает сама в ответ на них. С --all подается
+    вся запись, что нагружает прежде всего монитор безопасности.
+
+    Запуск из корня репозитория:
+        python -m benchmarks.replay logs/capture.0.bin logs/capture.1.bin
+"""
+import argparse
+import json
+from time import monotonic, sleep
+
+from src.system.config import CLIENT_QUEUE_NAME, COMMAND_HANDLER_QUEUE_NAME, LOG_ERROR, \
+    SECURITY_MONITOR_QUEUE_NAME
+from src.system.event_capture import read_captures, replay
+from src.system.queues_dir import QueuesDirectory
+from src.system.system_wrapper import SystemComponentsContainer
+from src.system.monitor_group import SecurityMonitorGroup
+from src.satellite_control_system.security_monitor import SecurityMonitor
+from satellite_control_system import SECURITY_MONITOR_SHARDS, setup_policies, setup_system
+
+
+def main():
+    parser = argparse.ArgumentParser(description="воспроизведение записи событий")
+    parser.add_argument("paths", nargs="+", help="файлы записи")
+    parser.add_argument("--realtime", action="store_true", help="с интервалами как при записи")
+    parser.add_argument("--all", action="store_true", help="подавать все записанные события")
+    parser.add_argument("--settle", type=float, default=2.0,
+                        help="время на обработку поданных событий перед остановкой (сек.)")
+    args = parser.parse_args()
+
+    queues_dir = QueuesDirectory()
+    policies = setup_policies()
+    modules = setup_system(queues_dir, log_level=LOG_ERROR, with_drawer=False)
+    modules.append(SecurityMonitorGroup(
+        queues_dir=queues_dir,
+        shards=SECURITY_MONITOR_SHARDS,
+        monitor_factory=lambda shard: SecurityMonitor(
+            queues_dir=queues_dir, log_level=LOG_ERROR, policies=policies, shard=shard),
+        log_level=LOG_ERROR))
+    system_components = SystemComponentsContainer(components=modules, log_level=LOG_ERROR)
+    system_components.start()
+
+    sources = None if args.all else (COMMAND_HANDLER_QUEUE_NAME, CLIENT_QUEUE_NAME)
+    started = monotonic()
+    count = replay(read_captures(args.paths), queues_dir.get_queue(SECURITY_MONITOR_QUEUE_NAME),
+                   realtime=args.realtime, sources=sources)
+    elapsed = monotonic() - started
+    sleep(args.settle)
+
+    system_components.stop()
+    system_components.clean()
+    queues_dir.close()
+    print(json.dumps({
+        "events": count,
+        "mode": "realtime" if args.realtime else "max_speed",
+        "feed_sec": elapsed,
+        "events_per_sec": count / elapsed if elapsed > 0 else 0.0,
+    }, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
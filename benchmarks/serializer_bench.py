@@ -0,0 +1,74 @@
+""" сравнение сериализации событий: компактный двоичный формат против pickle датакласса.
+    pickle - прежний путь (датакласс целиком), wire - кодек wire_format,
+    queue - полный путь EventQueue: кадр wire внутри pickle очереди
+
+    Запуск из корня репозитория:
+        python -m benchmarks.serializer_bench
+"""
+import pickle
+from dataclasses import dataclass
+from timeit import repeat
+from typing import Any, Optional
+
+from src.system.event_types import Event
+from src.system.wire_format import encode_event, decode_event
+from src.system.config import SATELITE_QUEUE_NAME, ORBIT_DRAWER_QUEUE_NAME, \
+    ORBIT_CHECK_QUEUE_NAME, CENTRAL_CONTROL_SYSTEM_QUEUE_NAME, \
+    DATA_STORAGE_QUEUE_NAME, ZONE_CHECK_QUEUE_NAME
+
+
+@dataclass
+class LegacyEvent:
+    """ прежний формат события: обычный датакласс, передается через pickle целиком """
+    source: str
+    destination: str
+    operation: str
+    parameters: Any
+    extra_parameters: Any = None
+    signature: Optional[str] = None
+
+
+SAMPLES = {
+    "координаты (lat, lon)": (
+        SATELITE_QUEUE_NAME, ORBIT_DRAWER_QUEUE_NAME, 'update_orbit_data', (55.75, 37.61)),
+    "параметры орбиты": (
+        ORBIT_CHECK_QUEUE_NAME, SATELITE_QUEUE_NAME, 'change_orbit', (900e3, 0.78, 1.04)),
+    "без параметров": (
+        ZONE_CHECK_QUEUE_NAME, CENTRAL_CONTROL_SYSTEM_QUEUE_NAME, 'request_zone', None),
+    "список зон": (
+        DATA_STORAGE_QUEUE_NAME, CENTRAL_CONTROL_SYSTEM_QUEUE_NAME, 'update_photo',
+        [(float(i), float(i), float(i + 1), float(i + 1)) for i in range(20)]),
+}
+
+
+def _best_ns(stmt, number: int) -> float:
+    return min(repeat(stmt, number=number, repeat=5)) / number * 1e9
+
+
+def main(number: int = 20000):
+    print(f"{'событие':<24}{'формат':<10}{'байт':>8}{'упаковка, нс':>16}{'распаковка, нс':>18}")
+    for title, (source, destination, operation, parameters) in SAMPLES.items():
+        legacy = LegacyEvent(source, destination, operation, parameters)
+        legacy_data = pickle.dumps(legacy, protocol=pickle.HIGHEST_PROTOCOL)
+        event = Event(source, destination, operation, parameters)
+        wire_data = encode_event(event)
+        queue_data = pickle.dumps(wire_data, protocol=pickle.HIGHEST_PROTOCOL)
+
+        rows = (
+            ("pickle", len(legacy_data),
+             _best_ns(lambda: pickle.dumps(legacy, protocol=pickle.HIGHEST_PROTOCOL), number),
+             _best_ns(lambda: pickle.loads(legacy_data), number)),
+            ("wire", len(wire_data),
+             _best_ns(lambda: encode_event(event), number),
+             _best_ns(lambda: decode_event(wire_data), number)),
+            # так событие передает EventQueue: кадр wire, обернутый pickle очереди
+            ("queue", len(queue_data),
+             _best_ns(lambda: pickle.dumps(encode_event(event), protocol=pickle.HIGHEST_PROTOCOL), number),
+             _best_ns(lambda: decode_event(pickle.loads(queue_data)), number)),
+        )
+        for fmt, size, dump_ns, load_ns in rows:
+            print(f"{title:<24}{fmt:<10}{size:>8}{dump_ns:>16.0f}{load_ns:>18.0f}")
+
+
+if __name__ == '__main__':
+    main()
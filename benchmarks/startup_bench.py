@@ -0,0 +1,103 @@
+""" время холодного запуска системы при разных способах запуска процессов.
+
+    Для каждого способа (fork, forkserver, spawn) запускается новый интерпретатор,
+    который создает компоненты системы управления (без отрисовщика, ему нужно окно)
+    и запускает их контейнером. Замеряется время импорта, создания компонентов,
+    запуска до готовности всех компонентов и полное время от запуска интерпретатора.
+    Симулятор спутника добавляется, если установлен numpy.
+
+    Запуск из корня репозитория:
+        python -m benchmarks.startup_bench
+"""
+import json
+import subprocess
+import sys
+from time import monotonic, perf_counter
+
+START_METHODS = ("fork", "forkserver", "spawn")
+
+
+def _child(method: str):
+    """ замер в отдельном интерпретаторе, результат - строка JSON в stdout """
+    started = perf_counter()
+    from src.system.config import LOG_ERROR
+    from src.system.queues_dir import QueuesDirectory
+    from src.system.system_wrapper import SystemComponentsContainer, configure_start_method
+    from src.system.monitor_group import SecurityMonitorGroup
+    from src.satellite_control_system.security_monitor import SecurityMonitor
+    from src.satellite_control_system.command_handler import CommandHandler
+    from src.satellite_control_system.csu import CentralControlSystem
+    from src.satellite_control_system.database import DataBase
+    from src.satellite_control_system.optics_check import OpticsCheck
+    from src.satellite_control_system.optics_control import OpticsControl
+    from src.satellite_control_system.orbit_check import OrbitCheck
+    from src.satellite_control_system.orbit_control import OrbitControl
+    from src.satellite_simulator.camera import Camera
+    try:
+        from src.satellite_simulator.satellite import Satellite
+    except ImportError:
+        Satellite = None
+    imported = perf_counter()
+
+    configure_start_method(method)
+    queues_dir = QueuesDirectory()
+    modules = [
+        CommandHandler(queues_dir=queues_dir, log_level=LOG_ERROR),
+        CentralControlSystem(queues_dir=queues_dir, log_level=LOG_ERROR),
+        DataBase(queues_dir=queues_dir, log_level=LOG_ERROR),
+        OpticsCheck(queues_dir=queues_dir, log_level=LOG_ERROR),
+        OpticsControl(queues_dir=queues_dir, log_level=LOG_ERROR),
+        OrbitCheck(queues_dir=queues_dir, log_level=LOG_ERROR),
+        OrbitControl(queues_dir=queues_dir, log_level=LOG_ERROR),
+        Camera(queues_dir=queues_dir, log_level=LOG_ERROR),
+        SecurityMonitorGroup(
+            queues_dir=queues_dir,
+            shards=2,
+            monitor_factory=lambda shard: SecurityMonitor(
+                queues_dir=queues_dir, log_level=LOG_ERROR, policies=[], shard=shard),
+            log_level=LOG_ERROR),
+    ]
+    if Satellite is not None:
+        modules.append(Satellite(
+            altitude=1000e3, position_angle=0, inclination=1.0, raan=0,
+            queues_dir=queues_dir, log_level=LOG_ERROR))
+    constructed = perf_counter()
+
+    system_components = SystemComponentsContainer(components=modules, log_level=LOG_ERROR)
+    all_ready = system_components.start()
+    ready = perf_counter()
+    ready_at = monotonic()
+
+    system_components.stop()
+    queues_dir.close()
+    print(json.dumps({
+        "import_sec": imported - started,
+        "construct_sec": constructed - imported,
+        "start_sec": ready - constructed,
+        "ready_at": ready_at,
+        "ready": all_ready,
+        "components": len(modules),
+    }))
+
+
+def main():
+    print(f"{'способ':<12}{'импорт, мс':>12}{'создание, мс':>15}{'запуск, мс':>13}{'всего, мс':>12}")
+    for method in START_METHODS:
+        launched = monotonic()
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.startup_bench", "--child", method],
+            capture_output=True, text=True, check=True)
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        total = result["ready_at"] - launched
+        status = "" if result["ready"] else "  (не все компоненты готовы)"
+        print(f"{method:<12}{result['import_sec'] * 1000:>12.1f}"
+              f"{result['construct_sec'] * 1000:>15.1f}"
+              f"{result['start_sec'] * 1000:>13.1f}"
+              f"{total * 1000:>12.1f}{status}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3 and sys.argv[1] == "--child":
+        _child(sys.argv[2])
+    else:
+        main()
@@ -1,15 +1,17 @@
-import numpy as np
-
-from time import sleep
-from multiprocessing import Queue
+from math import pi
 
 from src.satellite_simulator.satellite import Satellite
+from src.satellite_simulator.constellation import Constellation, walker_orbits
 from src.satellite_simulator.orbit_drawer import OrbitDrawer
 from src.satellite_simulator.camera import Camera
 from src.system.queues_dir import QueuesDirectory
-from src.system.system_wrapper import SystemComponentsContainer
+from src.system.system_wrapper import SystemComponentsContainer, configure_start_method
+from src.system.log_pipeline import LogWriter
+from src.system.metrics_collector import MetricsCollector
+from src.system.trace_collector import TraceCollector
 from src.system.event_types import Event, ControlEvent
 from src.satellite_control_system.security_monitor import SecurityMonitor
+from src.system.monitor_group import SecurityMonitorGroup, capture_shard_path
 from src.system.security_policy_type import SecurityPolicy
 
 # from src.satellite_control_system.client import Client
@@ -36,27 +38,72 @@ from src.system.config import CRITICALITY_STR, LOG_DEBUG, \
     CLIENT_QUEUE_NAME, \
     CENTRAL_CONTROL_SYSTEM_QUEUE_NAME, \
     DATA_STORAGE_QUEUE_NAME, \
-    COMMAND_HANDLER_QUEUE_NAME
+    COMMAND_HANDLER_QUEUE_NAME, \
+    METRICS_QUEUE_NAME, TRACES_QUEUE_NAME, \
+    OVERFLOW_DROP_NEWEST, OVERFLOW_DROP_OLDEST, TRANSPORT_SHM
+
+# способ запуска процессов компонентов: fork, forkserver или spawn
+START_METHOD = "fork"
+# ЦСУ и модули управления орбитой и оптикой работают в одном процессе (см. ComponentHost):
+# меньше памяти и задержка передачи, но без изоляции этих модулей друг от друга процессами ОС
+COLOCATE_CONTROL = False
+# число процессов монитора безопасности
+SECURITY_MONITOR_SHARDS = 2
+# файл журнала системы (JSON Lines)
+LOG_FILE_PATH = "logs/system.jsonl"
+# файл снимков метрик компонентов (JSON Lines)
+METRICS_FILE_PATH = "logs/metrics.jsonl"
+# файл трасс запросов (JSON Lines)
+TRACES_FILE_PATH = "logs/traces.jsonl"
+# емкость очередей сборщиков метрик и трасс: при отставании сборщика
+# новые записи отбрасываются, а не задерживают отправляющие их компоненты
+DIAGNOSTICS_QUEUE_CAPACITY = 10000
+# емкость очереди отрисовщика: при его отставании отбрасываются самые старые
+# положения спутника, на карте остаются последние
+DRAWER_QUEUE_CAPACITY = 1000
+# файл записи событий, проверенных монитором безопасности (для воспроизведения
+# в benchmarks.replay), None - без записи
+CAPTURE_FILE_PATH = None
+# число спутников: 1 - симулятор Satellite, больше - группировка Constellation
+# в одном процессе из CONSTELLATION_PLANES плоскостей (отрисовщик показывает спутник 0)
+CONSTELLATION_SIZE = 1
+CONSTELLATION_PLANES = 1
     
-def setup_system(queues_dir):
+def setup_system(queues_dir, log_level: int = LOG_DEBUG, with_drawer: bool = True):
+    """setup_system создание модулей системы (без монитора безопасности и сборщиков)
+
+    Args:
+        queues_dir (QueuesDirectory): каталог очередей
+        log_level (int): уровень логирования модулей
+        with_drawer (bool): создавать отрисовщик (ему нужно окно), False - для запуска без экрана
+
+    Returns:
+        list: модули системы
+    """
     # Симулятор спутника
-    sat = Satellite(
-        altitude=1000e3,
-        position_angle=0,
-        inclination=np.pi/3,
-        raan=0,
-        queues_dir=queues_dir,
-        log_level=LOG_DEBUG)
+    if CONSTELLATION_SIZE > 1:
+        sat = Constellation(
+            orbits=walker_orbits(CONSTELLATION_SIZE, CONSTELLATION_PLANES, 1000e3, pi/3),
+            queues_dir=queues_dir,
+            log_level=log_level)
+    else:
+        sat = Satellite(
+            altitude=1000e3,
+            position_angle=0,
+            inclination=pi/3,
+            raan=0,
+            queues_dir=queues_dir,
+            log_level=log_level)
 
     # Симулятор камеры спутника
     camera = Camera(
         queues_dir=queues_dir,
-        log_level=LOG_DEBUG)
+        log_level=log_level)
 
     # Отрисовщик
     drawer = OrbitDrawer(
         queues_dir=queues_dir,
-        log_level=LOG_DEBUG)
+        log_level=log_level) if with_drawer else None
 
     # Клиент
     # client = Client(
@@ -66,40 +113,41 @@ def setup_system(queues_dir):
     # Обработчик команд
     command_handler = CommandHandler(
         queues_dir=queues_dir,
-        log_level=LOG_DEBUG)
+        log_level=log_level)
 
     # ЦСУ
     csu = CentralControlSystem(
         queues_dir=queues_dir,
-        log_level=LOG_DEBUG)
+        log_level=log_level)
 
     # Хранилище
     db = DataBase(
         queues_dir=queues_dir,
-        log_level=LOG_DEBUG)
+        log_level=log_level)
 
     # Проверка запретных зон
     optic_checker = OpticsCheck(
         queues_dir=queues_dir,
-        log_level=LOG_DEBUG)
+        log_level=log_level)
 
     # Модуль контроля оптики
     optics_control = OpticsControl(
         queues_dir=queues_dir,
-        log_level=LOG_DEBUG)
+        log_level=log_level)
 
     # Проверка значений орбиты
     orbit_checker = OrbitCheck(
         queues_dir=queues_dir,
-        log_level=LOG_DEBUG)
+        log_level=log_level)
 
     # Модуль контроля орбиты
     orbit_control = OrbitControl(
         queues_dir=queues_dir,
-        log_level=LOG_DEBUG)
+        log_level=log_level)
     
-    return [sat, camera, drawer, command_handler, csu, db,
-            optic_checker, optics_control, orbit_checker, orbit_control]
+    modules = [sat, camera, drawer, command_handler, csu, db,
+               optic_checker, optics_control, orbit_checker, orbit_control]
+    return [module for module in modules if module is not None]
     
 def setup_policies():
     policies = [
@@ -266,7 +314,7 @@ def Client_Interface():
             message.append(login)
             message.append(password)
 
-            q: Queue = queues_dir.get_queue(COMMAND_HANDLER_QUEUE_NAME)
+            q = queues_dir.get_queue(COMMAND_HANDLER_QUEUE_NAME)
             q.put(
                 Event(source=None,
                       destination=COMMAND_HANDLER_QUEUE_NAME,
@@ -278,17 +326,60 @@ def Client_Interface():
 
 
 if __name__ == '__main__':
+    configure_start_method(START_METHOD)
     queues_dir = QueuesDirectory()
-
-    security_monitor = SecurityMonitor(queues_dir=queues_dir, log_level=LOG_DEBUG, policies=setup_policies())
+    queues_dir.limit_queue(METRICS_QUEUE_NAME, DIAGNOSTICS_QUEUE_CAPACITY, OVERFLOW_DROP_NEWEST)
+    queues_dir.limit_queue(TRACES_QUEUE_NAME, DIAGNOSTICS_QUEUE_CAPACITY, OVERFLOW_DROP_NEWEST)
+    queues_dir.limit_queue(ORBIT_DRAWER_QUEUE_NAME, DRAWER_QUEUE_CAPACITY, OVERFLOW_DROP_OLDEST)
+    # журнал всех компонентов пишет отдельный процесс
+    log_writer = LogWriter(queues_dir, path=LOG_FILE_PATH)
+
+    # получатели событий, проходящих через монитор безопасности
+    destinations = (COMMAND_HANDLER_QUEUE_NAME, CENTRAL_CONTROL_SYSTEM_QUEUE_NAME,
+                    DATA_STORAGE_QUEUE_NAME, OPTICS_CONTROL_QUEUE_NAME,
+                    ZONE_CHECK_QUEUE_NAME, ORBIT_CONTROL_QUEUE_NAME,
+                    ORBIT_CHECK_QUEUE_NAME, CAMERA_QUEUE_NAME,
+                    SATELITE_QUEUE_NAME, ORBIT_DRAWER_QUEUE_NAME)
+
+    # монитор безопасности работает группой процессов, разделенных по получателям
+    policies = setup_policies()
+    security_monitor = SecurityMonitorGroup(
+        queues_dir=queues_dir,
+        shards=SECURITY_MONITOR_SHARDS,
+        monitor_factory=lambda shard: SecurityMonitor(
+            queues_dir=queues_dir, log_level=LOG_DEBUG, policies=policies, shard=shard),
+        destinations=destinations,
+        log_level=LOG_DEBUG)
+    security_monitor.capture_to(CAPTURE_FILE_PATH)
     
     # Создадим модули системы
     modules = setup_system(queues_dir)
     modules.append(security_monitor)
+    # сборщик метрик, компоненты отправляют ему метрики раз в METRICS_INTERVAL_SEC
+    modules.append(MetricsCollector(queues_dir=queues_dir, path=METRICS_FILE_PATH))
+    # сборщик трасс, каждая команда обработчика команд трассируется до конца обработки
+    modules.append(TraceCollector(queues_dir=queues_dir, path=TRACES_FILE_PATH))
+
+    # самые нагруженные связи переводим на каналы в разделяемой памяти:
+    # телеметрию спутника для отрисовщика и пересылку от монитора получателям
+    queues_dir.register_channel(SATELITE_QUEUE_NAME, ORBIT_DRAWER_QUEUE_NAME, transport=TRANSPORT_SHM)
+    for destination in destinations:
+        queues_dir.register_channel(SECURITY_MONITOR_QUEUE_NAME, destination, transport=TRANSPORT_SHM)
 
     system_components = SystemComponentsContainer(
         components=modules,
-        log_level=LOG_DEBUG)
+        log_level=LOG_DEBUG,
+        log_writer=log_writer)
+    if COLOCATE_CONTROL:
+        host = system_components.colocate(
+            queues_dir,
+            [module for module in modules
+             if isinstance(module, (CentralControlSystem, OrbitControl, OrbitCheck, OpticsControl))],
+            policies)
+        # события между размещенными вместе компонентами записывает шлюз процесса
+        # размещения, в файл со следующим после экземпляров монитора номером
+        if CAPTURE_FILE_PATH is not None:
+            host.capture_to(capture_shard_path(CAPTURE_FILE_PATH, SECURITY_MONITOR_SHARDS))
     
     # Запустим систему 
     system_components.start()
@@ -298,3 +389,4 @@ if __name__ == '__main__':
     
     system_components.stop() # Остановим системы
     system_components.clean() # Очистим систему
+    queues_dir.close()
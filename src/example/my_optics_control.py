@@ -1,8 +1,7 @@
 from abc import abstractmethod
 from multiprocessing import Queue
-from queue import Empty
 
-from src.system.custom_process import BaseCustomProcess
+from src.system.custom_process import BaseCustomProcess, handles
 from src.system.queues_dir import QueuesDirectory
 from src.system.event_types import Event
 from src.system.config import CRITICALITY_STR, LOG_DEBUG, \
@@ -27,51 +26,39 @@ class MyOpticsControl(BaseCustomProcess):
             event_source_name=MyOpticsControl.event_source_name,
             log_level=log_level)
 
-        self._log_message(LOG_INFO, f"модуль управления оптикой создан")
+        self._log_message(LOG_INFO, "модуль управления оптикой создан")
 
 
-    def _check_events_q(self):
-        """ Метод проверяет наличие сообщений для данного компонента системы """
-        while True:
-            try:
-                # Получаем сообщение из очереди
-                event: Event = self._events_q.get_nowait()
+    @handles('request_photo')
+    def _on_request_photo(self, event: Event):
+        self._send_photo_request()
 
-                # Проверяем, что сообщение принадлежит типу Event (см. файл event_types.py)
-                if not isinstance(event, Event):
-                    return
-                
-                # Проверяем вид операции и обрабатываем
-                match event.operation:
-                    case 'request_photo':
-                        self._send_photo_request()
-                    case 'post_photo':
-                        # В данном примере запрашиваем не очередь отрисовщика, а очередь монитора
-                        # безопасности. Он сам отправит отрисовщику наше событие, если запрос
-                        # разрешен политика безопасности
-                        q: Queue = self._queues_dir.get_queue(SECURITY_MONITOR_QUEUE_NAME)
-                        lat, lon = event.parameters
-                        q.put(
-                            Event(
-                                source=self._event_source_name, 
-                                destination=ORBIT_DRAWER_QUEUE_NAME, 
-                                operation='update_photo_map', 
-                                parameters=(lat, lon)))
-                        self._log_message(LOG_DEBUG, f"рисуем снимок ({lat}, {lon})")
+    @handles('post_photo')
+    def _on_post_photo(self, event: Event):
+        # В данном примере запрашиваем не очередь отрисовщика, а очередь монитора
+        # безопасности. Он сам отправит отрисовщику наше событие, если запрос
+        # разрешен политика безопасности
+        q: Queue = self._queues_dir.get_queue(SECURITY_MONITOR_QUEUE_NAME)
+        lat, lon = event.parameters
+        q.put(
+            Event(
+                source=self._event_source_name,
+                destination=ORBIT_DRAWER_QUEUE_NAME,
+                operation='update_photo_map',
+                parameters=(lat, lon)))
+        self._log_message(LOG_DEBUG, "рисуем снимок (%s, %s)", lat, lon)
 
-            except Empty:
-                break
 
-    
     def run(self):
-        self._log_message(LOG_INFO, f"модуль управления оптикой активен")
+        self._log_message(LOG_INFO, "модуль управления оптикой активен")
 
         while self._quit is False:
             try:
+                self._wait_events()
                 self._check_events_q()
                 self._check_control_q()
             except Exception as e:
-                self._log_message(LOG_ERROR, f"ошибка системы контроля оптики: {e}")
+                self._log_message(LOG_ERROR, "ошибка системы контроля оптики: %s", e)
 
     
     def _send_photo_request(self):
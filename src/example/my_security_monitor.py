@@ -7,8 +7,8 @@ from src.system.config import LOG_DEBUG, LOG_ERROR, LOG_INFO, OPTICS_CONTROL_QUE
 class MySecurityMonitor(BaseSecurityMonitor):
     """ класс монитора безопасности """
 
-    def __init__(self, queues_dir, log_level, policies):
-        super().__init__(queues_dir, log_level)
+    def __init__(self, queues_dir, log_level, policies, low_latency=True, shard=None):
+        super().__init__(queues_dir, log_level, low_latency, shard)
         self._security_policies = []
         self._init_security_policies(policies)
     
@@ -16,13 +16,13 @@ class MySecurityMonitor(BaseSecurityMonitor):
     def _init_security_policies(self, policies):
         """ инициализация политик безопасности """
         self._security_policies = policies
-        self._log_message(LOG_INFO, f"изменение политик безопасности: {self._security_policies}")
+        self._log_message(LOG_INFO, "изменение политик безопасности: %s", self._security_policies)
 
 
     def _check_event(self, event: Event):
         """ проверка входящих событий """
         self._log_message(
-            LOG_DEBUG, f"проверка события {event}, по умолчанию выполнение запрещено")
+            LOG_DEBUG, "проверка события %s, по умолчанию выполнение запрещено", event)
 
         authorized = False
         request = SecurityPolicy(
@@ -36,5 +36,5 @@ class MySecurityMonitor(BaseSecurityMonitor):
             authorized = True
 
         if authorized is False:
-            self._log_message(LOG_ERROR, f"событие не разрешено политиками безопасности! {event}")
+            self._log_message(LOG_ERROR, "событие не разрешено политиками безопасности! %s", event)
         return authorized
\ No newline at end of file
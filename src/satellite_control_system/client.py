@@ -1,7 +1,6 @@
 from multiprocessing import Queue
-from queue import Empty
 
-from src.system.custom_process import BaseCustomProcess
+from src.system.custom_process import BaseCustomProcess, handles
 from src.system.queues_dir import QueuesDirectory
 from src.system.event_types import Event
 from src.system.config import CLIENT_QUEUE_NAME
@@ -24,39 +23,24 @@ class Client(BaseCustomProcess):
                          event_source_name=Client.event_source_name,
                          log_level=log_level)
         
-        self._log_message(LOG_INFO, f"модуль клиента создан")
+        self._log_message(LOG_INFO, "модуль клиента создан")
 
         
-    def _check_events_q(self):
-        """ Метод проверяет наличие сообщений для данного компонента системы """
-        while True:
-            try:
-                # Получаем сообщение из очереди
-                event: Event = self._events_q.get_nowait()
-
-                # Проверяем, что сообщение принадлежит типу Event (см. файл event_types.py)
-                if not isinstance(event, Event):
-                    return
-
-                # Проверяем вид операции и обрабатываем
-                match event.operation:
-                    case 'send_code':
-                        login, password, filename = event.parameters
-                        self._log_message(LOG_INFO, f"{login} {password} {filename}\n")
-
-
-            except Empty:
-               break
+    @handles('send_code')
+    def _on_send_code(self, event: Event):
+        login, password, filename = event.parameters
+        self._log_message(LOG_INFO, "%s %s %s\n", login, password, filename)
 
 
     def run(self):
-        self._log_message(LOG_INFO, f"модуль регистрации активен")
+        self._log_message(LOG_INFO, "модуль регистрации активен")
 
         while self._quit is False:
             try:
+                self._wait_events()
                 self._check_events_q()
                 self._check_control_q()
             except Exception as e:
-                self._log_message(LOG_ERROR, f"ошибка системы регистрации: {e}")
+                self._log_message(LOG_ERROR, "ошибка системы регистрации: %s", e)
 
 
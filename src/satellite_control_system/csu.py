@@ -1,7 +1,6 @@
 from multiprocessing import Queue
-from queue import Empty
 
-from src.system.custom_process import BaseCustomProcess
+from src.system.custom_process import BaseCustomProcess, handles
 from src.system.queues_dir import QueuesDirectory
 from src.system.event_types import Event
 from src.system.config import DATA_STORAGE_QUEUE_NAME, OPTICS_CONTROL_QUEUE_NAME, \
@@ -23,102 +22,62 @@ class CentralControlSystem(BaseCustomProcess):
                          event_source_name=CentralControlSystem.event_source_name,
                          log_level=log_level)
         
-        self._log_message(LOG_INFO, f"модуль ЦСУ создан")
+        self._log_message(LOG_INFO, "модуль ЦСУ создан")
 
 
-    def _check_events_q(self):
-        """ Метод проверяет наличие сообщений для данного компонента системы """
-        while True:
-            try:
-                # Получаем сообщение из очереди
-                event: Event = self._events_q.get_nowait()
+    def _forward(self, destination: str, operation: str, parameters):
+        """ отправка события через монитор безопасности """
+        q: Queue = self._queues_dir.get_queue(SECURITY_MONITOR_QUEUE_NAME)
+        q.put(
+            Event(
+                source=self._event_source_name,
+                destination=destination,
+                operation=operation,
+                parameters=parameters))
+
+    @handles('ORBIT')
+    def _on_orbit(self, event: Event):
+        self._forward(ORBIT_CONTROL_QUEUE_NAME, 'change_orbit', event.parameters)
+        self._log_message(LOG_DEBUG, "Отправлен запрос на изменение орбиты")
+
+    @handles('MAKE PHOTO')
+    def _on_make_photo(self, event: Event):
+        self._forward(OPTICS_CONTROL_QUEUE_NAME, 'request_photo', event.parameters)
+        self._log_message(LOG_DEBUG, "Отправлен запрос на фотографию")
+
+    @handles('ADD ZONE')
+    def _on_add_zone(self, event: Event):
+        self._forward(DATA_STORAGE_QUEUE_NAME, 'add_zone', event.parameters)
+        self._log_message(LOG_DEBUG, "Отправлен запрос на добавление зоны")
+
+    @handles('REMOVE ZONE')
+    def _on_remove_zone(self, event: Event):
+        self._forward(DATA_STORAGE_QUEUE_NAME, 'delete_zone', event.parameters)
+        self._log_message(LOG_DEBUG, "Отправлен запрос на удаление зоны")
+
+    @handles('request_zone')
+    def _on_request_zone(self, event: Event):
+        # пересылка запроса и ответа на него сохраняет номер запроса
+        self._reply(event, 'request_zone', event.parameters, destination=DATA_STORAGE_QUEUE_NAME)
+        self._log_message(LOG_DEBUG, "Запрошены координаты зон")
+
+    @handles('add_photo')
+    def _on_add_photo(self, event: Event):
+        self._forward(DATA_STORAGE_QUEUE_NAME, 'add_photo', event.parameters)
+        self._log_message(LOG_DEBUG, "Отправлены координаты зон")
 
-                # Проверяем, что сообщение принадлежит типу Event (см. файл event_types.py)
-                if not isinstance(event, Event):
-                    return
-                
-                # Проверяем вид операции и обрабатываем
-                match event.operation:
-                    case 'ORBIT':
-                        q: Queue = self._queues_dir.get_queue(SECURITY_MONITOR_QUEUE_NAME)
-                        q.put(
-                            Event(
-                                source=self._event_source_name, 
-                                destination=ORBIT_CONTROL_QUEUE_NAME, 
-                                operation='change_orbit',
-                                parameters=event.parameters))
-                        self._log_message(LOG_DEBUG, "Отправлен запрос на изменение орбиты")
-                        break
-                    case 'MAKE PHOTO':
-                        q: Queue = self._queues_dir.get_queue(SECURITY_MONITOR_QUEUE_NAME)
-                        q.put(
-                            Event(
-                                source=self._event_source_name, 
-                                destination=OPTICS_CONTROL_QUEUE_NAME, 
-                                operation='request_photo', 
-                                parameters=event.parameters))
-                        self._log_message(LOG_DEBUG, "Отправлен запрос на фотографию")
-                        break
-                    case 'ADD ZONE':
-                        q: Queue = self._queues_dir.get_queue(SECURITY_MONITOR_QUEUE_NAME)
-                        q.put(
-                            Event(
-                                source=self._event_source_name, 
-                                destination=DATA_STORAGE_QUEUE_NAME, 
-                                operation='add_zone', 
-                                parameters=event.parameters))
-                        self._log_message(LOG_DEBUG, "Отправлен запрос на добавление зоны")
-                        break
-                    case 'REMOVE ZONE':
-                        q: Queue = self._queues_dir.get_queue(SECURITY_MONITOR_QUEUE_NAME)
-                        q.put(
-                            Event(
-                                source=self._event_source_name, 
-                                destination=DATA_STORAGE_QUEUE_NAME, 
-                                operation='delete_zone', 
-                                parameters=event.parameters))
-                        self._log_message(LOG_DEBUG, "Отправлен запрос на удаление зоны")
-                        break
-                    case 'request_zone':
-                        q: Queue = self._queues_dir.get_queue(SECURITY_MONITOR_QUEUE_NAME)
-                        q.put(
-                            Event(
-                                source=self._event_source_name, 
-                                destination=DATA_STORAGE_QUEUE_NAME, 
-                                operation='request_zone', 
-                                parameters=event.parameters))
-                        self._log_message(LOG_DEBUG, "Запрошены координаты зон")
-                        break
-                    case 'add_photo':
-                        q: Queue = self._queues_dir.get_queue(SECURITY_MONITOR_QUEUE_NAME)
-                        q.put(
-                            Event(
-                                source=self._event_source_name, 
-                                destination=DATA_STORAGE_QUEUE_NAME, 
-                                operation='add_photo', 
-                                parameters=event.parameters))
-                        self._log_message(LOG_DEBUG, "Отправлены координаты зон")
-                        break
-                    case 'update_photo':
-                        q: Queue = self._queues_dir.get_queue(SECURITY_MONITOR_QUEUE_NAME)
-                        q.put(
-                            Event(
-                                source=self._event_source_name, 
-                                destination=ZONE_CHECK_QUEUE_NAME, 
-                                operation='post_photo', 
-                                parameters=event.parameters))
-                        self._log_message(LOG_DEBUG, "Отправлены координаты зон")
-                        break
-                               
-            except Empty:
-                break
+    @handles('update_photo')
+    def _on_update_photo(self, event: Event):
+        self._reply(event, 'post_photo', event.parameters, destination=ZONE_CHECK_QUEUE_NAME)
+        self._log_message(LOG_DEBUG, "Отправлены координаты зон")
 
     def run(self):
-        self._log_message(LOG_INFO, f"модуль ЦСУ активен")
+        self._log_message(LOG_INFO, "модуль ЦСУ активен")
 
         while self._quit is False:
             try:
+                self._wait_events()
                 self._check_events_q()
                 self._check_control_q()
             except Exception as e:
-                self._log_message(LOG_ERROR, f"ошибка ЦСУ: {e}")
+                self._log_message(LOG_ERROR, "ошибка ЦСУ: %s", e)
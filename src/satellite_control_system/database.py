@@ -1,12 +1,9 @@
-from multiprocessing import Queue
-from queue import Empty
-
-from src.system.custom_process import BaseCustomProcess
+from src.system.custom_process import BaseCustomProcess, handles
 from src.system.queues_dir import QueuesDirectory
 from src.system.event_types import Event
 from src.system.config import CRITICALITY_STR, LOG_DEBUG, \
     LOG_ERROR, LOG_INFO, DEFAULT_LOG_LEVEL, \
-    SECURITY_MONITOR_QUEUE_NAME, CENTRAL_CONTROL_SYSTEM_QUEUE_NAME, ORBIT_DRAWER_QUEUE_NAME, DATA_STORAGE_QUEUE_NAME
+    CENTRAL_CONTROL_SYSTEM_QUEUE_NAME, ORBIT_DRAWER_QUEUE_NAME, DATA_STORAGE_QUEUE_NAME
 
 
 class DataBase(BaseCustomProcess):
@@ -32,120 +29,103 @@ class DataBase(BaseCustomProcess):
             event_source_name=DataBase.event_source_name,
             log_level=log_level)
 
-        self._log_message(LOG_INFO, f"модуль хранения данных создан")
-
-
-    def _check_events_q(self):
-        """ Метод проверяет наличие сообщений для данного компонента системы """
-        while True:
-            try:
-                # Получаем сообщение из очереди
-                event: Event = self._events_q.get_nowait()
-
-                # Проверяем, что сообщение принадлежит типу Event (см. файл event_types.py)
-                if not isinstance(event, Event):
-                    return
-
-                # Проверяем вид операции и обрабатываем
-                match event.operation:
-                    case 'add_zone':
-                        id, lon1, lat1, lon2, lat2 = event.parameters
-
-                        if ((lat1 >= lat2) or (lon1 >= lon2)):
-                            self._log_message(LOG_ERROR, f"Некорректные координаты зоны, первая точка должна быть выше и левее второй")
-                            return
-
-                        id_exists = False
-                        # try:
-                        #     with open(self.zone_file, 'r') as f:
-                        #         for line in f:
-                        #             existing_id = line.split()[0]
-                        #             if existing_id == str(id):
-                        #                 id_exists = True
-                        #                 break
-                        # except FileNotFoundError:
-                        #     pass
-                        for line in self.zone:
-                            existing_id = line.split()[0]
-                            if existing_id == str(id):
-                                id_exists = True
-                                break
-
-                        if not id_exists:
-                            # with open(self.zone_file, 'a') as f:
-                            #     f.write(f"{id} {lon1} {lat1} {lon2} {lat2}\n")
-                            self.zone.append(f"{id} {lon1} {lat1} {lon2} {lat2}\n")
-                            self._log_message(LOG_DEBUG, f"добавляем новую зону ({id}, {lon1}, {lat1}, {lon2}, {lat2})")
-                        else:
-                            self._log_message(LOG_ERROR, f"зона с ID {id} уже существует! Запись не добавлена")
-
-                    case 'delete_zone':
-                        id = event.parameters
-                        new_lines = [line for line in self.zone if line.split()[0] != str(id)]
-                        if len(new_lines) != len(self.zone):
-                            self.zone = new_lines.copy()
-                            self._log_message(LOG_DEBUG, f"зона успешно удалена")
-                        else:
-                            self._log_message(LOG_ERROR, f"зона с ID {id} не найден! Запись не удалена")
-                        # try:
-                        #     with open(self.zone_file, 'r') as f:
-                        #         lines = f.readlines()
-                        #
-                        #     new_lines = [line for line in lines if line.split()[0] != str(id)]
-                        #
-                        #     if len(new_lines) != len(lines):
-                        #         with open(self.zone_file, 'w') as f:
-                        #             f.writelines(new_lines)
-                        #         self._log_message(LOG_DEBUG, f"зона успешно удалена")
-                        #     else:
-                        #         self._log_message(LOG_ERROR, f"зона с ID {id} не найден! Запись не удалена")
-                        #
-                        # except FileNotFoundError:
-                        #     self._log_message(LOG_DEBUG, f"файл не найден")
-
-                    case 'request_zone':
-                        rectangles = []
-                        for line in self.zone:
-                            parts = line.strip().split()
-                            if len(parts) == 5:  # Проверяем, что строка содержит 5 значений
-                                _, x1, y1, x2, y2 = parts  # Игнорируем первый элемент (ID)
-                                rectangles.append((float(x1), float(y1), float(x2), float(y2)))
-                        # try:
-                        #     with open(self.zone_file, 'r') as file:
-                        #         for line in file:
-                        #             parts = line.strip().split()
-                        #             if len(parts) == 5:  # Проверяем, что строка содержит 5 значений
-                        #                 _, x1, y1, x2, y2 = parts  # Игнорируем первый элемент (ID)
-                        #                 rectangles.append((float(x1), float(y1), float(x2), float(y2)))
-                        # except FileNotFoundError:
-                        #     self._log_message(LOG_DEBUG, f"файл не найден")
-
-                        q: Queue = self._queues_dir.get_queue(SECURITY_MONITOR_QUEUE_NAME)
-                        q.put(
-                            Event(
-                                source=self._event_source_name,
-                                destination=CENTRAL_CONTROL_SYSTEM_QUEUE_NAME,
-                                operation='update_photo',
-                                parameters=rectangles))
-
-                    case 'add_photo':
-                        lat, lon = event.parameters
-                        self.photo.append(f"{lat} {lon}\n")
-                        # with open(self.photo_file, 'a') as f:
-                        #     f.write(f"{lat} {lon}\n")
-                        self._log_message(LOG_DEBUG, f"снимок сохранен в хранилище")
-
-            except Empty:
+        self._log_message(LOG_INFO, "модуль хранения данных создан")
+
+
+    @handles('add_zone')
+    def _on_add_zone(self, event: Event):
+        id, lon1, lat1, lon2, lat2 = event.parameters
+
+        if ((lat1 >= lat2) or (lon1 >= lon2)):
+            self._log_message(LOG_ERROR, "Некорректные координаты зоны, первая точка должна быть выше и левее второй")
+            return
+
+        id_exists = False
+        # try:
+        #     with open(self.zone_file, 'r') as f:
+        #         for line in f:
+        #             existing_id = line.split()[0]
+        #             if existing_id == str(id):
+        #                 id_exists = True
+        #                 break
+        # except FileNotFoundError:
+        #     pass
+        for line in self.zone:
+            existing_id = line.split()[0]
+            if existing_id == str(id):
+                id_exists = True
                 break
 
+        if not id_exists:
+            # with open(self.zone_file, 'a') as f:
+            #     f.write(f"{id} {lon1} {lat1} {lon2} {lat2}\n")
+            self.zone.append(f"{id} {lon1} {lat1} {lon2} {lat2}\n")
+            self._log_message(LOG_DEBUG, "добавляем новую зону (%s, %s, %s, %s, %s)", id, lon1, lat1, lon2, lat2)
+        else:
+            self._log_message(LOG_ERROR, "зона с ID %s уже существует! Запись не добавлена", id)
+
+    @handles('delete_zone')
+    def _on_delete_zone(self, event: Event):
+        id, = event.parameters
+        new_lines = [line for line in self.zone if line.split()[0] != str(id)]
+        if len(new_lines) != len(self.zone):
+            self.zone = new_lines.copy()
+            self._log_message(LOG_DEBUG, "зона успешно удалена")
+        else:
+            self._log_message(LOG_ERROR, "зона с ID %s не найден! Запись не удалена", id)
+        # try:
+        #     with open(self.zone_file, 'r') as f:
+        #         lines = f.readlines()
+        #
+        #     new_lines = [line for line in lines if line.split()[0] != str(id)]
+        #
+        #     if len(new_lines) != len(lines):
+        #         with open(self.zone_file, 'w') as f:
+        #             f.writelines(new_lines)
+        #         self._log_message(LOG_DEBUG, "зона успешно удалена")
+        #     else:
+        #         self._log_message(LOG_ERROR, "зона с ID %s не найден! Запись не удалена", id)
+        #
+        # except FileNotFoundError:
+        #     self._log_message(LOG_DEBUG, "файл не найден")
+
+    @handles('request_zone')
+    def _on_request_zone(self, event: Event):
+        rectangles = []
+        for line in self.zone:
+            parts = line.strip().split()
+            if len(parts) == 5:  # Проверяем, что строка содержит 5 значений
+                _, x1, y1, x2, y2 = parts  # Игнорируем первый элемент (ID)
+                rectangles.append((float(x1), float(y1), float(x2), float(y2)))
+        # try:
+        #     with open(self.zone_file, 'r') as file:
+        #         for line in file:
+        #             parts = line.strip().split()
+        #             if len(parts) == 5:  # Проверяем, что строка содержит 5 значений
+        #                 _, x1, y1, x2, y2 = parts  # Игнорируем первый элемент (ID)
+        #                 rectangles.append((float(x1), float(y1), float(x2), float(y2)))
+        # except FileNotFoundError:
+        #     self._log_message(LOG_DEBUG, "файл не найден")
+
+        self._reply(event, 'update_photo', rectangles, destination=CENTRAL_CONTROL_SYSTEM_QUEUE_NAME)
+
+    @handles('add_photo')
+    def _on_add_photo(self, event: Event):
+        lat, lon = event.parameters
+        self.photo.append(f"{lat} {lon}\n")
+        # with open(self.photo_file, 'a') as f:
+        #     f.write(f"{lat} {lon}\n")
+        self._log_message(LOG_DEBUG, "снимок сохранен в хранилище")
+
 
     def run(self):
-        self._log_message(LOG_INFO, f"модуль хранения данных активен")
+        self._log_message(LOG_INFO, "модуль хранения данных активен")
 
         while self._quit is False:
             try:
+                self._wait_events()
                 self._check_events_q()
                 self._check_control_q()
             except Exception as e:
-                self._log_message(LOG_ERROR, f"ошибка системы хранения данных: {e}")
+                self._log_message(LOG_ERROR, "ошибка системы хранения данных: %s", e)
 
@@ -1,7 +1,6 @@
 from multiprocessing import Queue
-from queue import Empty
 
-from src.system.custom_process import BaseCustomProcess
+from src.system.custom_process import BaseCustomProcess, handles
 from src.system.queues_dir import QueuesDirectory
 from src.system.event_types import Event
 from src.system.config import CRITICALITY_STR, LOG_DEBUG, \
@@ -15,8 +14,6 @@ class OpticsCheck(BaseCustomProcess):
     log_prefix = "[OPTIC_CHECK]"
     event_source_name = ZONE_CHECK_QUEUE_NAME
     events_q_name = event_source_name
-    m_lat = 0.0
-    m_lon = 0.0
 
 
     def __init__(
@@ -31,72 +28,58 @@ class OpticsCheck(BaseCustomProcess):
             event_source_name=OpticsCheck.event_source_name,
             log_level=log_level)
 
-        self._log_message(LOG_INFO, f"модуль проверки зоны съемки создан")
+        self._log_message(LOG_INFO, "модуль проверки зоны съемки создан")
+
+
+    @handles('request_photo')
+    def _on_request_photo(self, event: Event):
+        self._send_photo_request()
+
+    @handles('check_photo')
+    def _on_check_photo(self, event: Event):
+        # у каждой проверки свой запрос зон, проверки не мешают друг другу
+        lat, lon = event.parameters
+        self._request(
+            CENTRAL_CONTROL_SYSTEM_QUEUE_NAME, 'request_zone',
+            callback=lambda response: self._check_photo(lat, lon, response.parameters))
+        self._log_message(LOG_DEBUG, "проверяем законность снимка (%s, %s)", lat, lon)
+
+    def _check_photo(self, lat, lon, rectangles):
+        """ снимок вне запрещенных зон сохраняется и отображается """
+        for rect in rectangles:
+            lon1, lat1, lon2, lat2 = rect
+            # Проверяем, что координаты полностью внутри текущего прямоугольника
+            if lat1 <= lat and lat <= lat2 and lon1 <= lon and lon <= lon2:
+                return
+        q: Queue = self._queues_dir.get_queue(SECURITY_MONITOR_QUEUE_NAME)
+        q.put(
+            Event(
+                source=self._event_source_name,
+                destination=CENTRAL_CONTROL_SYSTEM_QUEUE_NAME,
+                operation='add_photo',
+                parameters=(lat, lon)))
 
+        q: Queue = self._queues_dir.get_queue(SECURITY_MONITOR_QUEUE_NAME)
+        q.put(
+            Event(
+                source=self._event_source_name,
+                destination=ORBIT_DRAWER_QUEUE_NAME,
+                operation='update_photo_map',
+                parameters=(lat, lon)))
 
-    def _check_events_q(self):
-        """ Метод проверяет наличие сообщений для данного компонента системы """
-        while True:
-            try:
-                # Получаем сообщение из очереди
-                event: Event = self._events_q.get_nowait()
-
-                # Проверяем, что сообщение принадлежит типу Event (см. файл event_types.py)
-                if not isinstance(event, Event):
-                    return
-
-                # Проверяем вид операции и обрабатываем
-                match event.operation:
-                    case 'request_photo':
-                        self._send_photo_request()
-                    case 'check_photo':
-                        q: Queue = self._queues_dir.get_queue(SECURITY_MONITOR_QUEUE_NAME)
-                        self.m_lat, self.m_lon = event.parameters
-                        q.put(
-                            Event(
-                                source=self._event_source_name,
-                                destination=CENTRAL_CONTROL_SYSTEM_QUEUE_NAME,
-                                operation='request_zone',
-                                parameters=None))
-                        self._log_message(LOG_DEBUG, f"проверяем законность снимка ({self.m_lat}, {self.m_lon})")
-                    case 'post_photo':
-                        rectangles = event.parameters
-                        for rect in rectangles:
-                            lon1, lat1, lon2, lat2 = rect
-                            # Проверяем, что координаты полностью внутри текущего прямоугольника
-                            if lat1 <= self.m_lat and self.m_lat <= lat2 and lon1 <= self.m_lon and self.m_lon <= lon2:
-                                return
-                        q: Queue = self._queues_dir.get_queue(SECURITY_MONITOR_QUEUE_NAME)
-                        q.put(
-                            Event(
-                                source=self._event_source_name,
-                                destination=CENTRAL_CONTROL_SYSTEM_QUEUE_NAME,
-                                operation='add_photo',
-                                parameters=(self.m_lat, self.m_lon)))
-
-                        q: Queue = self._queues_dir.get_queue(SECURITY_MONITOR_QUEUE_NAME)
-                        q.put(
-                            Event(
-                                source=self._event_source_name,
-                                destination=ORBIT_DRAWER_QUEUE_NAME,
-                                operation='update_photo_map',
-                                parameters=(self.m_lat, self.m_lon)))
-
-                        self._log_message(LOG_DEBUG, f"сохраняем снимок ({self.m_lat}, {self.m_lon})")
-
-            except Empty:
-                break
+        self._log_message(LOG_DEBUG, "сохраняем снимок (%s, %s)", lat, lon)
 
 
     def run(self):
-        self._log_message(LOG_INFO, f"модуль проверки зоны съемки активен")
+        self._log_message(LOG_INFO, "модуль проверки зоны съемки активен")
 
         while self._quit is False:
             try:
+                self._wait_events()
                 self._check_events_q()
                 self._check_control_q()
             except Exception as e:
-                self._log_message(LOG_ERROR, f"ошибка системы проверки зоны съемки: {e}")
+                self._log_message(LOG_ERROR, "ошибка системы проверки зоны съемки: %s", e)
 
 
     def _send_photo_request(self):
@@ -108,4 +91,4 @@ class OpticsCheck(BaseCustomProcess):
                 destination=CAMERA_QUEUE_NAME,
                 operation='request_photo',
                 parameters=None))
-        self._log_message(LOG_DEBUG, f"запрашиваем снимок")
\ No newline at end of file
+        self._log_message(LOG_DEBUG, "запрашиваем снимок")
\ No newline at end of file
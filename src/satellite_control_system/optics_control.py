@@ -1,7 +1,6 @@
 from multiprocessing import Queue
-from queue import Empty
 
-from src.system.custom_process import BaseCustomProcess
+from src.system.custom_process import BaseCustomProcess, handles
 from src.system.queues_dir import QueuesDirectory
 from src.system.event_types import Event
 from src.system.config import CRITICALITY_STR, LOG_DEBUG, \
@@ -27,38 +26,24 @@ class OpticsControl(BaseCustomProcess):
             event_source_name=OpticsControl.event_source_name,
             log_level=log_level)
 
-        self._log_message(LOG_INFO, f"модуль управления оптикой создан")
+        self._log_message(LOG_INFO, "модуль управления оптикой создан")
 
 
-    def _check_events_q(self):
-        """ Метод проверяет наличие сообщений для данного компонента системы """
-        while True:
-            try:
-                # Получаем сообщение из очереди
-                event: Event = self._events_q.get_nowait()
-
-                # Проверяем, что сообщение принадлежит типу Event (см. Файл event_types.py)
-                if not isinstance(event, Event):
-                    return
-                
-                # Проверяем вид операции и обрабатываем
-                match event.operation:
-                    case 'request_photo':
-                        self._send_photo_request()
+    @handles('request_photo')
+    def _on_request_photo(self, event: Event):
+        self._send_photo_request()
 
-            except Empty:
-                break
 
-    
     def run(self):
-        self._log_message(LOG_INFO, f"модуль управления оптикой активен")
+        self._log_message(LOG_INFO, "модуль управления оптикой активен")
 
         while self._quit is False:
             try:
+                self._wait_events()
                 self._check_events_q()
                 self._check_control_q()
             except Exception as e:
-                self._log_message(LOG_ERROR, f"ошибка системы контроля оптики: {e}")
+                self._log_message(LOG_ERROR, "ошибка системы контроля оптики: %s", e)
 
     
     def _send_photo_request(self):
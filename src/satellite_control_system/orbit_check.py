@@ -3,7 +3,7 @@ from queue import Empty
 
 import math
 
-from src.system.custom_process import BaseCustomProcess
+from src.system.custom_process import BaseCustomProcess, handles
 from src.system.queues_dir import QueuesDirectory
 from src.system.event_types import Event, ControlEvent
 from src.system.config import CRITICALITY_STR, LOG_DEBUG, \
@@ -37,7 +37,7 @@ class OrbitCheck(BaseCustomProcess):
         try:
             request: ControlEvent = self._control_q.get_nowait()
             self._log_message(
-                LOG_DEBUG, f"проверяем запрос {request}")
+                LOG_DEBUG, "проверяем запрос %s", request)
             if not isinstance(request, ControlEvent):
                 return
             if request.operation == 'stop':
@@ -47,36 +47,23 @@ class OrbitCheck(BaseCustomProcess):
             pass
 
 
-    def _check_events_q(self):
-        """ Метод проверяет наличие сообщений для данного компонента системы """
-        while True:
-            try:
-                # Получаем сообщение из очереди
-                event: Event = self._events_q.get_nowait()
-
-                # Проверяем, что сообщение принадлежит типу Event (см. файл event_types.py)
-                if not isinstance(event, Event):
-                    return
-
-                # Проверяем вид операции и обрабатываем
-                match event.operation:
-                    case 'check_orbit':
-                        # Извлекаем параметры новой орбиты
-                        altitude, raan, inclination = event.parameters
-                        self._log_message(LOG_INFO,"Система проверки корректности орбиты получила новые параметры")
-                        self._check_orbit(altitude, raan, inclination)
-            except Empty:
-                break
+    @handles('check_orbit')
+    def _on_check_orbit(self, event: Event):
+        # Извлекаем параметры новой орбиты
+        altitude, raan, inclination = event.parameters
+        self._log_message(LOG_INFO,"Система проверки корректности орбиты получила новые параметры")
+        self._check_orbit(altitude, raan, inclination)
 
     def run(self):
-        self._log_message(LOG_INFO, f"модуль проверки корректности орбиты активен")
+        self._log_message(LOG_INFO, "модуль проверки корректности орбиты активен")
 
         while self._quit is False:
             try:
+                self._wait_events()
                 self._check_events_q()
                 self._check_control_q()
             except Exception as e:
-                self._log_message(LOG_ERROR, f"ошибка модуля проверки корректности орбиты: {e}")
+                self._log_message(LOG_ERROR, "ошибка модуля проверки корректности орбиты: %s", e)
 
 
     def _check_orbit(self, altitude, raan, inclination):
@@ -1,7 +1,7 @@
 from multiprocessing import Queue
 from queue import Empty
 
-from src.system.custom_process import BaseCustomProcess
+from src.system.custom_process import BaseCustomProcess, handles
 from src.system.queues_dir import QueuesDirectory
 from src.system.event_types import Event, ControlEvent
 from src.system.config import CRITICALITY_STR, LOG_DEBUG, \
@@ -35,7 +35,7 @@ class OrbitControl(BaseCustomProcess):
         try:
             request: ControlEvent = self._control_q.get_nowait()
             self._log_message(
-                LOG_DEBUG, f"проверяем запрос {request}")
+                LOG_DEBUG, "проверяем запрос %s", request)
             if not isinstance(request, ControlEvent):
                 return
             if request.operation == 'stop':
@@ -45,37 +45,24 @@ class OrbitControl(BaseCustomProcess):
             pass
 
 
-    def _check_events_q(self):
-        """ Метод проверяет наличие сообщений для данного компонента системы """
-        while True:
-            try:
-                # Получаем сообщение из очереди
-                event: Event = self._events_q.get_nowait()
-
-                # Проверяем, что сообщение принадлежит типу Event (см. файл event_types.py)
-                if not isinstance(event, Event):
-                    return
-                
-                # Проверяем вид операции и обрабатываем
-                match event.operation:
-                    case 'change_orbit':
-                        # Извлекаем параметры новой орбиты
-                        altitude, raan, inclination = event.parameters
-                        self._log_message(LOG_INFO,"Система контроля орбиты получила новые параметры")
-                        self._change_orbit(altitude, raan, inclination)
-            except Empty:
-                break
+    @handles('change_orbit')
+    def _on_change_orbit(self, event: Event):
+        # Извлекаем параметры новой орбиты
+        altitude, raan, inclination = event.parameters
+        self._log_message(LOG_INFO,"Система контроля орбиты получила новые параметры")
+        self._change_orbit(altitude, raan, inclination)
 
 
     def run(self):
-        self._log_message(LOG_INFO, f"модуль управления орбитой активен")
+        self._log_message(LOG_INFO, "модуль управления орбитой активен")
 
         while self._quit is False:
             try:
+                self._wait_events()
                 self._check_events_q()
                 self._check_control_q()
             except Exception as e:
-                self._log_message(LOG_ERROR, f"ошибка модуля контроля орбиты: {e}")
+                self._log_message(LOG_ERROR, "ошибка модуля контроля орбиты: %s", e)
 
     
     def _change_orbit(self, altitude, raan, inclination):
@@ -87,4 +74,4 @@ class OrbitControl(BaseCustomProcess):
                 destination=ORBIT_CHECK_QUEUE_NAME,
                 operation='check_orbit',
                 parameters=(altitude, raan, inclination)))
-        self._log_message(LOG_DEBUG, f"проверяем значения новой орбиты ({altitude}, {raan}, {inclination})")
\ No newline at end of file
+        self._log_message(LOG_DEBUG, "проверяем значения новой орбиты (%s, %s, %s)", altitude, raan, inclination)
\ No newline at end of file
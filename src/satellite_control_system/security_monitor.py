@@ -1,40 +1,42 @@
 from src.system.event_types import Event
 from src.system.security_monitor import BaseSecurityMonitor
 from src.system.security_policy_type import SecurityPolicy
+from src.system.policy_index import PolicyIndex
 from src.system.config import LOG_DEBUG, LOG_ERROR, LOG_INFO, OPTICS_CONTROL_QUEUE_NAME, ORBIT_DRAWER_QUEUE_NAME
 
 
 class SecurityMonitor(BaseSecurityMonitor):
     """ класс монитора безопасности """
 
-    def __init__(self, queues_dir, log_level, policies):
-        super().__init__(queues_dir, log_level)
-        self._security_policies = []
+    def __init__(self, queues_dir, log_level, policies, low_latency=True, shard=None):
+        super().__init__(queues_dir, log_level, low_latency, shard)
+        self._security_policies = PolicyIndex([])
         self._init_security_policies(policies)
     
 
     def _init_security_policies(self, policies):
-        """ инициализация политик безопасности """
-        self._security_policies = policies
-        self._log_message(LOG_INFO, f"изменение политик безопасности: {self._security_policies}")
+        """ инициализация политик безопасности: список политик компилируется в индекс,
+            в политиках допустима подстановка POLICY_WILDCARD """
+        self._security_policies = PolicyIndex(policies)
+        self._log_message(LOG_INFO, "изменение политик безопасности: %s", self._security_policies.policies)
 
 
-    def _check_event(self, event: Event):
-        """ проверка входящих событий """
-        self._log_message(
-            LOG_DEBUG, f"проверка события {event}, по умолчанию выполнение запрещено")
-
-        authorized = False
-        request = SecurityPolicy(
-            source=event.source,
-            destination=event.destination,
-            operation=event.operation)
+    def _check_route(self, source, destination, operation):
+        """ проверка события по заголовку: решение принимается только по
+            отправителю, получателю и операции, параметры не нужны """
+        authorized = self._security_policies.allows(source, destination, operation)
 
-        if request in self._security_policies:
+        if authorized is False:
+            self._log_message(
+                LOG_ERROR, "событие не разрешено политиками безопасности! %s: %s -> %s",
+                operation, source, destination)
+        else:
             self._log_message(
-                LOG_DEBUG, "событие разрешено политиками, выполняем")
-            authorized = True
+                LOG_DEBUG, "событие %s: %s -> %s разрешено политиками, выполняем",
+                operation, source, destination)
+        return authorized
 
-        if authorized is False:
-            self._log_message(LOG_ERROR, f"событие не разрешено политиками безопасности! {event}")
-        return authorized
\ No newline at end of file
+
+    def _check_event(self, event: Event):
+        """ проверка входящих событий """
+        return self._check_route(event.source, event.destination, event.operation)
@@ -1,7 +1,7 @@
 from multiprocessing import Queue, Process
 from queue import Empty
 
-from src.system.custom_process import BaseCustomProcess
+from src.system.custom_process import BaseCustomProcess, handles
 from src.system.queues_dir import QueuesDirectory
 from src.system.event_types import Event, ControlEvent
 from src.system.config import CRITICALITY_STR, LOG_DEBUG, \
@@ -31,7 +31,7 @@ class Camera(BaseCustomProcess):
         try:
             request: ControlEvent = self._control_q.get_nowait()
             self._log_message(
-                LOG_DEBUG, f"проверяем запрос {request}")
+                LOG_DEBUG, "проверяем запрос %s", request)
             if not isinstance(request, ControlEvent):
                 return
             if request.operation == 'stop':
@@ -40,40 +40,32 @@ class Camera(BaseCustomProcess):
             # никаких команд не поступило, ну и ладно
             pass
 
-    def _check_events_q(self):
-        """ Проверка наличия команд """
-        while True:
-            try:
-                event: Event = self._events_q.get_nowait()
+    @handles('request_photo')
+    def _on_request_photo(self, event: Event):
+        request = Event(
+            source=self._event_source_name,
+            destination=SATELITE_QUEUE_NAME,
+            operation="post_camera_coords",
+            parameters=None)
+        sat_q: Queue = self._queues_dir.get_queue(SATELITE_QUEUE_NAME)
+        sat_q.put(request)
+        self._log_message(LOG_DEBUG, "запрашиваем координаты снимка")
 
-                if not isinstance(event, Event):
-                    return
-                
-                match event.operation:
-                    case 'request_photo':
-                        request = Event(
-                            source=self._event_source_name,
-                            destination=SATELITE_QUEUE_NAME,
-                            operation="post_camera_coords",
-                            parameters=None)
-                        sat_q: Queue = self._queues_dir.get_queue(SATELITE_QUEUE_NAME)
-                        sat_q.put(request)
-                        self._log_message(LOG_DEBUG, "запрашиваем координаты снимка")
-                    case 'camera_update':
-                        q: Queue = self._queues_dir.get_queue(SECURITY_MONITOR_QUEUE_NAME)
-                        lat, lon = event.parameters
-                        q.put(
-                            Event(
-                                source=self._event_source_name, 
-                                destination=ZONE_CHECK_QUEUE_NAME,
-                                operation='check_photo',
-                                parameters=(lat, lon)))
-                        self._log_message(LOG_DEBUG, f"создаем снимок ({lat}, {lon})")
-            except Empty:
-                break
+    @handles('camera_update')
+    def _on_camera_update(self, event: Event):
+        q: Queue = self._queues_dir.get_queue(SECURITY_MONITOR_QUEUE_NAME)
+        lat, lon = event.parameters
+        q.put(
+            Event(
+                source=self._event_source_name,
+                destination=ZONE_CHECK_QUEUE_NAME,
+                operation='check_photo',
+                parameters=(lat, lon)))
+        self._log_message(LOG_DEBUG, "создаем снимок (%s, %s)", lat, lon)
 
     def run(self):
         while self._quit is False:
+            self._wait_events()
             self._check_events_q()
             self._check_control_q()
     
@@ -0,0 +1,298 @@
+import numpy as np
+
+from collections import deque
+from multiprocessing import Queue
+from typing import Optional, Sequence, Tuple
+
+from src.system.custom_process import BaseCustomProcess, handles
+from src.system.queues_dir import QueuesDirectory
+from src.system.event_types import Event
+from src.system.config import LOG_DEBUG, LOG_ERROR, LOG_INFO, DEFAULT_LOG_LEVEL, \
+    SATELITE_QUEUE_NAME, CAMERA_QUEUE_NAME, ORBIT_DRAWER_QUEUE_NAME, SCHEDULE_CATCH_UP
+from src.satellite_simulator.orbit import EARTH_RADIUS, PROPAGATION_KEPLER, \
+    PROPAGATION_VERLET, PROPAGATIONS, circular_state, gravity, ground_track, nearest_point, orbit_state
+from src.satellite_simulator.integrators import DEFAULT_TOLERANCE, propagate
+from src.satellite_simulator.satellite import Satellite
+
+# орбита спутника группировки: высота (м), угол положения, наклонение, RAAN (рад.)
+Orbit = Tuple[float, float, float, float]
+
+
+def walker_orbits(count: int, planes: int, altitude: float, inclination: float) -> list:
+    """walker_orbits равномерная группировка: planes плоскостей с равным шагом RAAN,
+    спутники плоскости равномерно распределены по орбите
+
+    Args:
+        count (int): число спутников (делится на planes)
+        planes (int): число орбитальных плоскостей
+        altitude (float): высота орбит (м)
+        inclination (float): наклонение орбит (рад.)
+
+    Returns:
+        list: орбиты (высота, угол положения, наклонение, RAAN)
+    """
+    per_plane = count // planes
+    return [(altitude, 2 * np.pi * slot / per_plane, inclination, 2 * np.pi * plane / planes)
+            for plane in range(planes) for slot in range(per_plane)]
+
+
+class Constellation(BaseCustomProcess):
+    """ Симулятор группировки спутников в одном процессе.
+        Состояния всех спутников хранятся массивами (N, 3) и пересчитываются
+        одним шагом Verlet для всех сразу. Запросы send_data, post_camera_coords
+        и change_orbit относятся к спутнику с номером из параметров события
+        (None - спутник 0), поэтому группировка заменяет Satellite без изменения
+        остальных компонентов. Переход на новую орбиту длится, как у Satellite:
+        параметры переходов хранятся массивами по спутникам, наблюдаемое состояние
+        смешивается с целевой орбитой для всех переходящих спутников сразу """
+    log_prefix = "[CONSTELLATION]"
+    event_source_name = SATELITE_QUEUE_NAME
+    events_q_name = event_source_name
+    orbit_change_coef = Satellite.orbit_change_coef
+
+    def __init__(
+        self,
+        orbits: Sequence[Orbit],
+        queues_dir: QueuesDirectory,
+        log_level: int = DEFAULT_LOG_LEVEL,
+        propagation: str = PROPAGATION_VERLET,
+        tolerance: float = DEFAULT_TOLERANCE
+    ):
+        """
+        Args:
+            orbits (Sequence[Orbit]): орбиты спутников (высота, угол положения, наклонение, RAAN)
+            queues_dir (QueuesDirectory): каталог очередей
+            log_level (int): уровень логирования
+            propagation (str): способ расчета движения PROPAGATION_* (см. orbit.py)
+            tolerance (float): допустимая ошибка шага методов с выбором шага (см. integrators.py)
+        """
+        if propagation not in PROPAGATIONS:
+            raise ValueError(f"неизвестный способ расчета движения {propagation}")
+        super().__init__(
+            log_prefix=Constellation.log_prefix,
+            queues_dir=queues_dir,
+            events_q_name=Constellation.events_q_name,
+            event_source_name=Constellation.event_source_name,
+            log_level=log_level)
+
+        altitude, position_angle, inclination, raan = np.array(orbits, dtype=float).reshape(-1, 4).T
+        self._altitudes = altitude
+        self._inclinations = inclination
+        self._raans = raan
+        self._positions, self._velocities = orbit_state(
+            EARTH_RADIUS + altitude, raan, position_angle, inclination)
+        self._accelerations = gravity(self._positions)
+        # угол положения каждого спутника в момент _epoch_times (начало или смена орбиты)
+        self._epoch_angles = position_angle.copy()
+        self._epoch_times = np.zeros(len(self._positions))
+        # текущие переходы на новую орбиту (см. OrbitTransfer в satellite.py):
+        # признак перехода, начало и длительность (сек. симуляции), целевая орбита
+        # и угол положения на ней в момент начала перехода
+        count = len(self._positions)
+        self._transferring = np.zeros(count, dtype=bool)
+        self._transfer_starts = np.zeros(count)
+        self._transfer_durations = np.zeros(count)
+        self._transfer_altitudes = np.zeros(count)
+        self._transfer_inclinations = np.zeros(count)
+        self._transfer_raans = np.zeros(count)
+        self._transfer_angles = np.zeros(count)
+        # орбиты (высота, наклонение, RAAN), ждущие окончания перехода, по номерам спутников
+        self._pending_orbits = {}
+
+        self._recalc_interval_sec = 0.1 # Время пересчета координат (сек.)
+        self._time_speed_sec = 30 # Время пересчета координат (сек.), время прошедшее для спутников
+        self._propagation = propagation
+        self._tolerance = tolerance
+        self._step_sec = None # длина шага метода с выбором шага, подобранная на прошлом пересчете
+        self._time = 0.0 # время симуляции (сек.)
+        self._log_message(LOG_INFO, "симулятор группировки из %s спутников создан", len(self))
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def _update_positions(self, dt: float):
+        """ Обновление положений и скоростей всех спутников (velocity Verlet).
+            Ускорение в конце шага сохраняется и служит началом следующего """
+        acceleration = self._accelerations
+        self._positions += self._velocities * dt + (0.5 * dt * dt) * acceleration
+        new_acceleration = gravity(self._positions)
+        self._velocities += (0.5 * dt) * (acceleration + new_acceleration)
+        self._accelerations = new_acceleration
+
+    def _advance(self, dt: float):
+        """ Продвижение симуляции на dt секунд выбранным способом расчета движения """
+        self._time += dt
+        if self._propagation == PROPAGATION_KEPLER:
+            self._positions, self._velocities = circular_state(
+                EARTH_RADIUS + self._altitudes, self._raans, self._epoch_angles,
+                self._inclinations, self._time - self._epoch_times)
+        elif self._propagation == PROPAGATION_VERLET:
+            self._update_positions(dt)
+        else:
+            # шаг общий для всей группировки, его ограничивает самый требовательный спутник
+            self._positions, self._velocities, self._step_sec, _ = propagate(
+                self._propagation, self._positions, self._velocities, dt,
+                self._tolerance, self._step_sec)
+        # во время перехода прежняя орбита продолжает рассчитываться выбранным способом,
+        # наблюдаемое состояние - смешение с целевой орбитой (см. _current_state)
+        finished = self._transferring & (self._time >= self._transfer_starts + self._transfer_durations)
+        for index in np.flatnonzero(finished):
+            self._finish_transfer(int(index))
+
+    def ephemeris(self, times):
+        """ephemeris положения и скорости всех спутников на текущих орбитах
+        в моменты времени симуляции times, без пошагового расчета
+
+        Args:
+            times: время симуляции (сек.), число или массив моментов формы (T,)
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: положения и скорости, форма (T, N, 3)
+        """
+        elapsed = np.asarray(times, dtype=float)[..., None] - self._epoch_times
+        return circular_state(
+            EARTH_RADIUS + self._altitudes, self._raans, self._epoch_angles,
+            self._inclinations, elapsed)
+
+    def _index(self, event: Event) -> Optional[int]:
+        """ номер спутника из параметров события, None - номер вне группировки """
+        index = event.parameters if isinstance(event.parameters, (int, np.integer)) else 0
+        if not 0 <= index < len(self):
+            self._log_message(LOG_ERROR, "нет спутника с номером %s", index)
+            return None
+        return index
+
+    def _current_state(self):
+        """ Положения и скорости всех спутников с учетом переходов на новые орбиты:
+            у переходящих спутников - плавное смешение состояния на прежней орбите
+            и точки целевой орбиты, в которой спутник окажется к этому моменту """
+        indices = np.flatnonzero(self._transferring)
+        if not len(indices):
+            return self._positions, self._velocities
+        elapsed = self._time - self._transfer_starts[indices]
+        target_positions, target_velocities = circular_state(
+            EARTH_RADIUS + self._transfer_altitudes[indices], self._transfer_raans[indices],
+            self._transfer_angles[indices], self._transfer_inclinations[indices], elapsed)
+        durations = self._transfer_durations[indices]
+        progress = np.divide(elapsed, durations, out=np.ones_like(elapsed), where=durations > 0)
+        progress = np.minimum(progress, 1.0)
+        # smoothstep: без скачка скорости на концах
+        weight = (progress * progress * (3 - 2 * progress))[:, None]
+        positions = self._positions.copy()
+        velocities = self._velocities.copy()
+        positions[indices] = (1 - weight) * positions[indices] + weight * target_positions
+        velocities[indices] = (1 - weight) * velocities[indices] + weight * target_velocities
+        return positions, velocities
+
+    def get_earth_coordinates(self, index: int):
+        """ Координаты, на которые смотрит камера спутника index, направленная в центр земли """
+        if not self._transferring[index]:
+            return ground_track(self._positions[index])
+        return ground_track(self._current_state()[0][index])
+
+    def _begin_transfer(self, index: int, new_altitude: float, new_inclination: float, new_raan: float):
+        """ Начинает переход спутника index на новую орбиту к ближайшей точке на ней.
+            Длительность перехода (в реальном времени) пропорциональна расстоянию """
+        best_angle, distance = nearest_point(
+            self._positions[index], EARTH_RADIUS + new_altitude, new_raan, new_inclination)
+        time_spent = float(distance) * self.orbit_change_coef
+        self._transferring[index] = True
+        self._transfer_starts[index] = self._time
+        self._transfer_durations[index] = time_spent * self._time_speed_sec / self._recalc_interval_sec
+        self._transfer_altitudes[index] = new_altitude
+        self._transfer_inclinations[index] = new_inclination
+        self._transfer_raans[index] = new_raan
+        self._transfer_angles[index] = best_angle
+        self._log_message(
+            LOG_DEBUG, "спутник %s начал переход на новую орбиту, расстояние %.1f м, переход займет %s сек.",
+            index, distance, time_spent)
+
+    def _finish_transfer(self, index: int):
+        """ Завершает переход спутника index: спутник движется по целевой орбите,
+            ждущий переход (если есть) начинается сразу """
+        new_altitude = self._transfer_altitudes[index]
+        new_inclination = self._transfer_inclinations[index]
+        new_raan = self._transfer_raans[index]
+        angle = self._transfer_angles[index]
+        start_time = self._transfer_starts[index]
+        position, velocity = circular_state(
+            EARTH_RADIUS + new_altitude, new_raan, angle, new_inclination, self._time - start_time)
+
+        self._transferring[index] = False
+        self._altitudes[index] = new_altitude
+        self._inclinations[index] = new_inclination
+        self._raans[index] = new_raan
+        self._positions[index] = position
+        self._velocities[index] = velocity
+        self._accelerations[index] = gravity(position)
+        self._epoch_angles[index] = angle
+        self._epoch_times[index] = start_time
+        self._step_sec = None
+        self._log_message(
+            LOG_INFO, "орбита спутника %s изменена: alt=%s, RAAN=%s, incl=%s",
+            index, new_altitude, new_raan, new_inclination)
+        pending = self._pending_orbits.get(index)
+        if pending:
+            self._begin_transfer(index, *pending.popleft())
+
+    @handles('send_data')
+    def _on_send_data(self, event: Event):
+        index = self._index(event)
+        if index is None:
+            return
+        q: Queue = self._queues_dir.get_queue(ORBIT_DRAWER_QUEUE_NAME)
+        q.put(
+            Event(
+                source=self.event_source_name,
+                destination=ORBIT_DRAWER_QUEUE_NAME,
+                operation='update_orbit_data',
+                parameters=self.get_earth_coordinates(index)))
+
+    @handles('change_orbit')
+    def _on_change_orbit(self, event: Event):
+        # (высота, наклонение, RAAN) - спутник 0, (высота, наклонение, RAAN, номер) - спутник с номером
+        new_altitude, new_inclination, new_raan, *rest = event.parameters
+        index = int(rest[0]) if rest else 0
+        if not 0 <= index < len(self):
+            self._log_message(LOG_ERROR, "нет спутника с номером %s", index)
+            return
+        if self._transferring[index]:
+            # как у Satellite, новый переход начинается после окончания текущего
+            self._pending_orbits.setdefault(index, deque()).append((new_altitude, new_inclination, new_raan))
+            self._log_message(
+                LOG_DEBUG, "переход спутника %s отложен до окончания текущего перехода", index)
+            return
+        self._begin_transfer(index, new_altitude, new_inclination, new_raan)
+
+    @handles('post_camera_coords')
+    def _on_post_camera_coords(self, event: Event):
+        index = self._index(event)
+        if index is None:
+            return
+        camera_q: Queue = self._queues_dir.get_queue(CAMERA_QUEUE_NAME)
+        camera_q.put(
+            Event(
+                source=self._event_source_name,
+                destination=CAMERA_QUEUE_NAME,
+                operation="camera_update",
+                parameters=self.get_earth_coordinates(index)))
+        self._log_message(LOG_DEBUG, "обработан запрос на снимок спутника %s", index)
+
+    def _prepare(self):
+        self._log_message(LOG_INFO, "старт симуляции группировки")
+
+        # пересчет всех спутников - одним шагом по таймеру, пропущенные
+        # из-за долгой обработки пересчеты выполняются подряд
+        self._add_timer(
+            self._recalc_interval_sec,
+            lambda: self._advance(self._time_speed_sec),
+            policy=SCHEDULE_CATCH_UP,
+            name='recalc')
+
+    def run(self):
+        self._prepare()
+
+        while self._quit is False:
+            self._wait_events()
+            self._check_events_q()
+            self._check_control_q()
@@ -0,0 +1,179 @@
+""" модуль численного интегрирования движения спутников
+
+    Методы шага (velocity Verlet, RK4, Дорман-Принс 5(4), симплектический метод
+    Йошиды 4 порядка) работают с состояниями формы (3,) и (N, 3): одним вызовом
+    можно продвинуть всю группировку.
+
+    propagate продвигает состояние на интервал пересчета шагами наибольшей длины,
+    при которой оценка локальной ошибки не больше заданной точности. Для
+    Дормана-Принса ошибка оценивается встроенным методом 4 порядка, для остальных -
+    сравнением одного шага с двумя половинными. Длина последнего принятого шага
+    возвращается и служит начальной для следующего интервала.
+"""
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from src.satellite_simulator.orbit import gravity, PROPAGATION_RK4, PROPAGATION_RK45, \
+    PROPAGATION_VERLET, PROPAGATION_YOSHIDA4
+
+# допустимая локальная ошибка шага по умолчанию: относительная ошибка положения и скорости
+DEFAULT_TOLERANCE = 1e-9
+# пределы изменения длины шага за одну попытку и запас относительно оценки
+_MIN_FACTOR = 0.2
+_MAX_FACTOR = 5.0
+_SAFETY = 0.9
+# шаг короче этой доли интервала принимается без проверки (защита от зацикливания)
+_MIN_STEP_FRACTION = 1e-9
+
+State = Tuple[np.ndarray, np.ndarray]
+
+
+def verlet_step(pos: np.ndarray, vel: np.ndarray, h: float) -> State:
+    """ шаг velocity Verlet (2 порядок, симплектический) """
+    acc = gravity(pos)
+    pos = pos + vel * h + (0.5 * h * h) * acc
+    vel = vel + (0.5 * h) * (acc + gravity(pos))
+    return pos, vel
+
+
+def rk4_step(pos: np.ndarray, vel: np.ndarray, h: float) -> State:
+    """ шаг классического метода Рунге-Кутты 4 порядка """
+    k1r, k1v = vel, gravity(pos)
+    k2r, k2v = vel + 0.5 * h * k1v, gravity(pos + 0.5 * h * k1r)
+    k3r, k3v = vel + 0.5 * h * k2v, gravity(pos + 0.5 * h * k2r)
+    k4r, k4v = vel + h * k3v, gravity(pos + h * k3r)
+    return (pos + (h / 6) * (k1r + 2 * k2r + 2 * k3r + k4r),
+            vel + (h / 6) * (k1v + 2 * k2v + 2 * k3v + k4v))
+
+
+# коэффициенты композиции Йошиды: три шага leapfrog с долями W1, W0, W1
+_W1 = 1 / (2 - 2 ** (1 / 3))
+_W0 = -2 ** (1 / 3) * _W1
+_YOSHIDA_DRIFT = (_W1 / 2, (_W0 + _W1) / 2, (_W0 + _W1) / 2, _W1 / 2)
+_YOSHIDA_KICK = (_W1, _W0, _W1)
+
+
+def yoshida4_step(pos: np.ndarray, vel: np.ndarray, h: float) -> State:
+    """ шаг симплектического метода Йошиды 4 порядка (сдвиг - толчок, 3 вычисления ускорения) """
+    for idx, kick in enumerate(_YOSHIDA_KICK):
+        pos = pos + (_YOSHIDA_DRIFT[idx] * h) * vel
+        vel = vel + (kick * h) * gravity(pos)
+    return pos + (_YOSHIDA_DRIFT[3] * h) * vel, vel
+
+
+# таблица Бутчера метода Дормана-Принса 5(4)
+_DP_C = (0.0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1.0, 1.0)
+_DP_A = (
+    (),
+    (1 / 5,),
+    (3 / 40, 9 / 40),
+    (44 / 45, -56 / 15, 32 / 9),
+    (19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729),
+    (9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656),
+    (35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84),
+)
+_DP_B5 = (35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84, 0.0)
+_DP_B4 = (5179 / 57600, 0.0, 7571 / 16695, 393 / 640, -92097 / 339200, 187 / 2100, 1 / 40)
+_DP_E = tuple(b5 - b4 for b5, b4 in zip(_DP_B5, _DP_B4))
+
+
+def rk45_step(pos: np.ndarray, vel: np.ndarray, h: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """ шаг метода Дормана-Принса: решение 5 порядка и оценка ошибки (разность с решением 4 порядка) """
+    kr, kv = [], []
+    for stage in range(7):
+        stage_pos, stage_vel = pos, vel
+        for a, dr, dv in zip(_DP_A[stage], kr, kv):
+            if a:
+                stage_pos = stage_pos + (h * a) * dr
+                stage_vel = stage_vel + (h * a) * dv
+        kr.append(stage_vel)
+        kv.append(gravity(stage_pos))
+    new_pos = pos + h * sum(b * k for b, k in zip(_DP_B5, kr) if b)
+    new_vel = vel + h * sum(b * k for b, k in zip(_DP_B5, kv) if b)
+    err_pos = h * sum(e * k for e, k in zip(_DP_E, kr) if e)
+    err_vel = h * sum(e * k for e, k in zip(_DP_E, kv) if e)
+    return new_pos, new_vel, err_pos, err_vel
+
+
+class Integrator(NamedTuple):
+    """ метод интегрирования: шаг, порядок точности, есть ли встроенная оценка ошибки """
+    step: Callable
+    order: int
+    embedded: bool
+
+
+INTEGRATORS: Dict[str, Integrator] = {
+    PROPAGATION_VERLET: Integrator(verlet_step, 2, False),
+    PROPAGATION_RK4: Integrator(rk4_step, 4, False),
+    PROPAGATION_RK45: Integrator(rk45_step, 4, True),
+    PROPAGATION_YOSHIDA4: Integrator(yoshida4_step, 4, False),
+}
+
+
+def _error_norm(pos: np.ndarray, vel: np.ndarray, err_pos: np.ndarray, err_vel: np.ndarray) -> float:
+    """ наибольшая по спутникам относительная ошибка положения и скорости """
+    rel_pos = np.linalg.norm(err_pos, axis=-1) / np.linalg.norm(pos, axis=-1)
+    rel_vel = np.linalg.norm(err_vel, axis=-1) / np.linalg.norm(vel, axis=-1)
+    return float(max(np.max(rel_pos), np.max(rel_vel)))
+
+
+def _attempt(integrator: Integrator, pos: np.ndarray, vel: np.ndarray, h: float):
+    """ шаг длины h и оценка его ошибки """
+    if integrator.embedded:
+        new_pos, new_vel, err_pos, err_vel = integrator.step(pos, vel, h)
+    else:
+        # два половинных шага точнее одного полного, разность по Ричардсону
+        full_pos, full_vel = integrator.step(pos, vel, h)
+        new_pos, new_vel = integrator.step(*integrator.step(pos, vel, h / 2), h / 2)
+        scale = 1 / (2 ** integrator.order - 1)
+        err_pos = (new_pos - full_pos) * scale
+        err_vel = (new_vel - full_vel) * scale
+    return new_pos, new_vel, _error_norm(new_pos, new_vel, err_pos, err_vel)
+
+
+def propagate(
+    method: str,
+    pos: np.ndarray,
+    vel: np.ndarray,
+    dt: float,
+    tolerance: float = DEFAULT_TOLERANCE,
+    h: Optional[float] = None,
+) -> Tuple[np.ndarray, np.ndarray, float, int]:
+    """propagate продвижение состояния на dt секунд шагами наибольшей длины,
+    при которой оценка локальной ошибки шага не больше tolerance
+
+    Args:
+        method (str): PROPAGATION_VERLET, PROPAGATION_RK4, PROPAGATION_RK45 или PROPAGATION_YOSHIDA4
+        pos (np.ndarray): положения, форма (3,) или (N, 3)
+        vel (np.ndarray): скорости той же формы
+        dt (float): интервал (сек.)
+        tolerance (float): допустимая относительная ошибка положения и скорости за шаг
+        h (Optional[float]): начальная длина шага (результат прошлого вызова), None - dt
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, float, int]: положения, скорости,
+            длина шага для следующего вызова, число принятых шагов
+    """
+    integrator = INTEGRATORS[method]
+    h = dt if h is None else h
+    min_step = dt * _MIN_STEP_FRACTION
+    exponent = 1 / (integrator.order + 1)
+    elapsed = 0.0
+    steps = 0
+    while elapsed < dt:
+        h_try = min(h, dt - elapsed)
+        new_pos, new_vel, error = _attempt(integrator, pos, vel, h_try)
+        if error > 0:
+            factor = min(_MAX_FACTOR, max(_MIN_FACTOR, _SAFETY * (tolerance / error) ** exponent))
+        else:
+            factor = _MAX_FACTOR
+        if error <= tolerance or h_try <= min_step:
+            pos, vel = new_pos, new_vel
+            elapsed += h_try
+            steps += 1
+            # укороченный до конца интервала шаг не уменьшает длину следующих
+            h = max(h, h_try * factor) if h_try < h else h_try * factor
+        else:
+            h = h_try * factor
+    return pos, vel, h, steps
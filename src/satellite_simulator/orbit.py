@@ -0,0 +1,120 @@
+""" модуль круговых орбит спутников
+
+    Положение и скорость на круговой орбите задаются радиусом, RAAN, наклонением
+    и углом положения спутника на орбите. Угол растет равномерно со средним
+    движением n = sqrt(GM / r^3), поэтому состояние в любой момент времени
+    вычисляется сразу, без пошагового интегрирования (режим PROPAGATION_KEPLER).
+    Все функции принимают массивы параметров и моментов времени (broadcasting numpy).
+"""
+import numpy as np
+from typing import Tuple
+
+G = 6.67430e-11  # Gravitational constant (m^3 kg^-1 s^-2)
+EARTH_MASS = 5.972e24  # kg
+EARTH_RADIUS = 6.371e6  # m
+GM = G * EARTH_MASS
+
+# способы расчета движения спутника
+PROPAGATION_VERLET = "verlet"      # velocity Verlet, один шаг на пересчет
+PROPAGATION_KEPLER = "kepler"      # аналитическое решение для круговой орбиты
+PROPAGATION_RK4 = "rk4"            # Рунге-Кутта 4 порядка с выбором шага по точности
+PROPAGATION_RK45 = "rk45"          # Дорман-Принс 5(4) с выбором шага по точности
+PROPAGATION_YOSHIDA4 = "yoshida4"  # симплектический метод Йошиды 4 порядка с выбором шага
+PROPAGATIONS = (PROPAGATION_VERLET, PROPAGATION_KEPLER,
+                PROPAGATION_RK4, PROPAGATION_RK45, PROPAGATION_YOSHIDA4)
+
+
+def orbit_state(radius, raan, position_angle, inclination) -> Tuple[np.ndarray, np.ndarray]:
+    """orbit_state положение и скорость на круговой орбите, те же формулы,
+    что у Satellite, но для массивов параметров (по одной орбите на элемент)
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: положения и скорости, форма (..., 3)
+    """
+    radius, raan, position_angle, inclination = np.broadcast_arrays(
+        radius, raan, position_angle, inclination)
+    cos_raan, sin_raan = np.cos(raan), np.sin(raan)
+    cos_angle, sin_angle = np.cos(position_angle), np.sin(position_angle)
+    cos_incl, sin_incl = np.cos(inclination), np.sin(inclination)
+    speed = np.sqrt(GM / radius)
+    position = np.stack([
+        radius * (cos_raan * cos_angle - sin_raan * sin_angle * cos_incl),
+        radius * (sin_raan * cos_angle + cos_raan * sin_angle * cos_incl),
+        radius * sin_angle * sin_incl], axis=-1)
+    velocity = np.stack([
+        -speed * (cos_raan * sin_angle + sin_raan * cos_angle * cos_incl),
+        speed * (-sin_raan * sin_angle + cos_raan * cos_angle * cos_incl),
+        speed * cos_angle * sin_incl], axis=-1)
+    return position, velocity
+
+
+def nearest_point(position, radius, raan, inclination) -> Tuple[np.ndarray, np.ndarray]:
+    """nearest_point ближайшая к положению точка круговой орбиты (точное решение).
+    Орбита - окружность radius * (e1 cos u + e2 sin u) в плоскости с базисом
+    e1, e2, ближайшая точка лежит в направлении проекции положения на эту плоскость.
+    Параметры орбит могут быть массивами - тогда решение для всех орбит сразу
+
+    Args:
+        position: положение, форма (3,) или (..., 3)
+        radius: радиус орбиты (м)
+        raan: долгота восходящего узла (рад.)
+        inclination: наклонение (рад.)
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: угол положения ближайшей точки (рад., от 0 до 2pi)
+            и расстояние до нее (м)
+    """
+    position = np.asarray(position, dtype=float)
+    cos_raan, sin_raan = np.cos(raan), np.sin(raan)
+    cos_incl, sin_incl = np.cos(inclination), np.sin(inclination)
+    x, y, z = np.moveaxis(position, -1, 0)
+    along_node = x * cos_raan + y * sin_raan                             # проекция на e1
+    across_node = (-x * sin_raan + y * cos_raan) * cos_incl + z * sin_incl  # проекция на e2
+    angle = np.mod(np.arctan2(across_node, along_node), 2 * np.pi)
+    in_plane = np.hypot(along_node, across_node)
+    # |x - p|^2 = |x|^2 - 2 radius |проекция| + radius^2
+    distance = np.sqrt(np.maximum(
+        np.sum(position * position, axis=-1) - 2 * radius * in_plane + radius * radius, 0.0))
+    return angle, distance
+
+
+def gravity(positions: np.ndarray) -> np.ndarray:
+    """ ускорения в поле тяготения Земли для положений (..., 3) """
+    r2 = np.sum(positions * positions, axis=-1, keepdims=True)
+    return positions * (-GM / (r2 * np.sqrt(r2)))
+
+
+def specific_energy(positions: np.ndarray, velocities: np.ndarray) -> np.ndarray:
+    """ удельная механическая энергия (Дж/кг) для состояний (..., 3), сохраняется на орбите """
+    return (0.5 * np.sum(velocities * velocities, axis=-1)
+            - GM / np.sqrt(np.sum(positions * positions, axis=-1)))
+
+
+def mean_motion(radius):
+    """ угловая скорость движения по круговой орбите радиуса radius (рад./сек.) """
+    return np.sqrt(GM / radius ** 3)
+
+
+def circular_state(radius, raan, position_angle, inclination, t) -> Tuple[np.ndarray, np.ndarray]:
+    """circular_state положение и скорость через время t после момента,
+    когда спутник был в точке position_angle орбиты
+
+    Args:
+        radius: радиус орбиты (м)
+        raan: долгота восходящего узла (рад.)
+        position_angle: угол положения в начальный момент (рад.)
+        inclination: наклонение (рад.)
+        t: время от начального момента (сек.), число или массив моментов
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: положения и скорости, форма (..., 3)
+    """
+    return orbit_state(radius, raan, position_angle + mean_motion(radius) * t, inclination)
+
+
+def ground_track(positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """ широты и долготы (град.) точек под спутником для положений (..., 3) """
+    x, y, z = np.moveaxis(positions, -1, 0)
+    lat = np.degrees(np.arcsin(z / np.sqrt(x * x + y * y + z * z)))
+    lon = np.degrees(np.arctan2(y, x))
+    return lat, lon
@@ -1,24 +1,16 @@
-import numpy as np
-import urllib.request
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
-from matplotlib.patches import Rectangle
-
-
-
 from multiprocessing import Queue, Process
-from queue import Empty
-from time import sleep
-from mpl_toolkits.mplot3d import Axes3D
-from PIL import Image
 
-from src.system.custom_process import BaseCustomProcess
+# matplotlib, PIL и urllib импортируются в процессе отрисовщика при его запуске (_setup_figure):
+# остальным компонентам и главному процессу они не нужны, а загружаются долго.
+# numpy импортируется там же, но выигрыша не дает: главный процесс все равно
+# загружает его с симулятором спутника (Satellite, Constellation)
+from src.system.custom_process import BaseCustomProcess, handles
 from src.system.queues_dir import QueuesDirectory
 from src.system.event_types import Event, ControlEvent
 from src.satellite_control_system.restricted_zone import RestrictedZone
 from src.system.config import CRITICALITY_STR, LOG_DEBUG, \
     LOG_ERROR, LOG_INFO, DEFAULT_LOG_LEVEL, \
-    ORBIT_DRAWER_QUEUE_NAME, SATELITE_QUEUE_NAME
+    ORBIT_DRAWER_QUEUE_NAME, SATELITE_QUEUE_NAME, SCHEDULE_SKIP
 
 
 class OrbitDrawer(BaseCustomProcess):
@@ -39,9 +31,24 @@ class OrbitDrawer(BaseCustomProcess):
             event_source_name=OrbitDrawer.event_source_name,
             log_level=log_level)
         
-        # Set up figure
         self._num_frames = 50
         self._positions = []
+        self._camera_coords = []
+        self._restricted_zone_patches = []
+        self._frame_interval_sec = 0.25 # период обновления окна (сек.)
+        self._frame_pause_sec = 0.1 # время обработки событий окна за кадр (сек.)
+
+        self._log_message(LOG_INFO, "отрисовщик создан")
+
+
+    def _setup_figure(self):
+        """ создание окна с картой, выполняется в процессе отрисовщика """
+        import urllib.request
+        import numpy as np
+        import matplotlib.pyplot as plt
+        from PIL import Image
+
+        # Set up figure
         self._fig, self._ax = plt.subplots(figsize=(10, 5))
 
         url = "https://upload.wikimedia.org/wikipedia/commons/thumb/8/83/Equirectangular_projection_SW.jpg/1920px-Equirectangular_projection_SW.jpg"
@@ -52,35 +59,23 @@ class OrbitDrawer(BaseCustomProcess):
         self._ax.imshow(world_map, extent=[-180, 180, -90, 90])
         self._trajectory, =  self._ax.plot([], [], 'ro-', markersize=7, linewidth=5)
 
-        self._camera_coords = []
         self._photos, = self._ax.plot([], [], marker='*', markersize=15, linestyle='None', c='yellow')
 
-        self._restricted_zone_patches = []
-
-        self._log_message(LOG_INFO, f"отрисовщик создан")
-
 
-    def _check_events_q(self):
-        while True:
-            try:
-                event: Event = self._events_q.get_nowait()
+    @handles('update_orbit_data')
+    def _on_update_orbit_data(self, event: Event):
+        lat, lon = event.parameters
+        self._append_positions(lat, lon)
 
-                if not isinstance(event, Event):
-                    return
-                
-                match(event.operation):
-                    case 'update_orbit_data':
-                        lat, lon = event.parameters
-                        self._append_positions(lat, lon)
-                    case 'update_photo_map':
-                        lat, lon = event.parameters
-                        self._append_photos(lat, lon)
-                    case 'draw_restricted_zone':
-                        zone : RestrictedZone = event.parameters
-                        self._append_restricted_zones(zone)
+    @handles('update_photo_map')
+    def _on_update_photo_map(self, event: Event):
+        lat, lon = event.parameters
+        self._append_photos(lat, lon)
 
-            except Empty:
-                break
+    @handles('draw_restricted_zone')
+    def _on_draw_restricted_zone(self, event: Event):
+        zone : RestrictedZone = event.parameters
+        self._append_restricted_zones(zone)
 
 
     def _append_positions(self, lat, lon):
@@ -97,6 +92,9 @@ class OrbitDrawer(BaseCustomProcess):
         self._photos.set_data(lons, lats)
 
     def _append_restricted_zones(self, zone: RestrictedZone):
+        import numpy as np
+        from matplotlib.patches import Rectangle
+
         width = np.abs(zone.lon_top_right - zone.lon_bot_left)
         height = np.abs(zone.lat_bot_left - zone.lat_top_right)
 
@@ -115,6 +113,11 @@ class OrbitDrawer(BaseCustomProcess):
 
 
     def run(self):
+        import matplotlib.pyplot as plt
+        import matplotlib.animation as animation
+
+        self._setup_figure()
+
         def init():
             self._trajectory.set_data([], [])
             self._photos.set_data([], [])
@@ -140,8 +143,16 @@ class OrbitDrawer(BaseCustomProcess):
         plt.title("Real-time Satellite Ground Track")
         plt.ion()
 
+        # окно обновляется по таймеру с постоянной частотой, между кадрами
+        # отрисовщик разбирает события. Кадры, пропущенные из-за долгой
+        # отрисовки, не наверстываются
+        self._add_timer(
+            self._frame_interval_sec,
+            lambda: plt.pause(self._frame_pause_sec),
+            policy=SCHEDULE_SKIP,
+            name='frame')
+
         while self._quit is False:
+            self._wait_events()
             self._check_events_q()
-            self._check_control_q()
-            plt.pause(0.1)
-            sleep(0.15)
\ No newline at end of file
+            self._check_control_q()
\ No newline at end of file
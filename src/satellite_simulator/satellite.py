@@ -1,21 +1,30 @@
 import numpy as np
 
+from collections import deque
 from multiprocessing import Queue, Process
-from queue import Empty
-from time import sleep
+from typing import NamedTuple
 
-from src.system.custom_process import BaseCustomProcess
+from src.system.custom_process import BaseCustomProcess, handles
 from src.system.queues_dir import QueuesDirectory
 from src.system.event_types import Event, ControlEvent
 from src.system.config import CRITICALITY_STR, LOG_DEBUG, \
     LOG_ERROR, LOG_INFO, DEFAULT_LOG_LEVEL, \
-    SATELITE_QUEUE_NAME, CAMERA_QUEUE_NAME, ORBIT_DRAWER_QUEUE_NAME
+    SATELITE_QUEUE_NAME, CAMERA_QUEUE_NAME, ORBIT_DRAWER_QUEUE_NAME, SCHEDULE_CATCH_UP
+from src.satellite_simulator.orbit import G, EARTH_MASS, EARTH_RADIUS, \
+    PROPAGATION_KEPLER, PROPAGATION_VERLET, PROPAGATIONS, circular_state, nearest_point
+from src.satellite_simulator.integrators import DEFAULT_TOLERANCE, propagate
 
 
+class OrbitTransfer(NamedTuple):
+    """ переход на орбиту: начало и длительность (сек. симуляции), целевая орбита
+        и угол положения на ней в момент начала перехода """
+    start_time: float
+    duration: float
+    altitude: float
+    inclination: float
+    raan: float
+    angle: float
 
-G = 6.67430e-11  # Gravitational constant (m^3 kg^-1 s^-2)
-EARTH_MASS = 5.972e24  # kg
-EARTH_RADIUS = 6.371e6  # m
 
 class Satellite(BaseCustomProcess):
     """ Симулятор спутника """
@@ -31,8 +40,12 @@ class Satellite(BaseCustomProcess):
         inclination: float,
         raan: float,
         queues_dir: QueuesDirectory,
-        log_level: int = DEFAULT_LOG_LEVEL
+        log_level: int = DEFAULT_LOG_LEVEL,
+        propagation: str = PROPAGATION_VERLET,
+        tolerance: float = DEFAULT_TOLERANCE
     ):
+        if propagation not in PROPAGATIONS:
+            raise ValueError(f"неизвестный способ расчета движения {propagation}")
         super().__init__(
             log_prefix=Satellite.log_prefix,
             queues_dir=queues_dir,
@@ -62,7 +75,16 @@ class Satellite(BaseCustomProcess):
         
         self._recalc_interval_sec = 0.1 # Время пересчета координат (сек.)
         self._time_speed_sec = 30 # Время пересчета координат (сек.), время прошедшее для спутника
-        self._log_message(LOG_INFO, f"симулятор создан")
+        # способ расчета движения: пошагово (Verlet, один шаг на пересчет), аналитически (kepler)
+        # или методом с выбором шага по точности tolerance (см. integrators.py)
+        self._propagation = propagation
+        self._tolerance = tolerance
+        self._step_sec = None # длина шага метода с выбором шага, подобранная на прошлом пересчете
+        self._time = 0.0 # время симуляции (сек.)
+        self._epoch_time = 0.0 # время симуляции, когда спутник был в точке _position_angle
+        self._transfer = None # текущий переход на новую орбиту (OrbitTransfer)
+        self._pending_orbits = deque() # орбиты (высота, наклонение, RAAN), ждущие окончания перехода
+        self._log_message(LOG_INFO, "симулятор создан")
 
 
     def _compute_position(
@@ -95,39 +117,95 @@ class Satellite(BaseCustomProcess):
         ])
     
 
-    def _change_orbit(
-            self, 
-            new_altitude: float, 
+    def _set_orbit(
+            self,
+            new_altitude: float,
+            new_inclination: float,
+            new_raan: float,
+            position_angle: float,
+            epoch_time: float):
+        """ Сохраняет параметры новой орбиты, спутник был в точке position_angle
+            в момент epoch_time, состояние вычисляется для текущего времени """
+        self._altitude = new_altitude
+        self._radius = EARTH_RADIUS + new_altitude
+        self._raan = new_raan
+        self._inclination = new_inclination
+        self._position_angle = position_angle
+        self._epoch_time = epoch_time
+        self._position, self._velocity = circular_state(
+            self._radius, new_raan, position_angle, new_inclination, self._time - epoch_time)
+        self._step_sec = None
+        self._log_message(LOG_INFO, "орбита изменена: alt=%s, RAAN=%s, incl=%s", new_altitude, new_raan, new_inclination)
+
+
+    def _begin_transfer(
+            self,
+            new_altitude: float,
             new_inclination: float,
             new_raan: float):
-        """ Меняет орбиту спутника на новую.
-            Новая позиция спутника -- ближайшая точка на новой орбите"""
+        """ Начинает переход на новую орбиту к ближайшей точке на ней.
+            Длительность перехода (в реальном времени) пропорциональна расстоянию """
+        best_angle, distance = nearest_point(
+            self._position, EARTH_RADIUS + new_altitude, new_raan, new_inclination)
+        time_spent = float(distance) * self.orbit_change_coef
+        self._transfer = OrbitTransfer(
+            start_time=self._time,
+            duration=time_spent * self._time_speed_sec / self._recalc_interval_sec,
+            altitude=new_altitude,
+            inclination=new_inclination,
+            raan=new_raan,
+            angle=float(best_angle))
+        self._log_message(
+            LOG_DEBUG, "начат переход на новую орбиту, расстояние %.1f м, переход займет %s сек.",
+            distance, time_spent)
 
-        new_radius = EARTH_RADIUS + new_altitude
-        current_pos = self._position
 
-        # Поиск ближайшей позиции на новой траектории
-        angles = np.linspace(0, 2 * np.pi, 360)
-        positions = np.array([self._compute_position(new_radius, new_raan, a, new_inclination) for a in angles])
-        distances = np.linalg.norm(positions - current_pos, axis=1)
-        best_idx = np.argmin(distances)
-        best_angle = angles[best_idx]
-        closest_position = positions[best_idx]
+    def _finish_transfer(self):
+        """ Завершает текущий переход: спутник движется по целевой орбите,
+            ждущий переход (если есть) начинается сразу """
+        transfer = self._transfer
+        self._transfer = None
+        self._set_orbit(transfer.altitude, transfer.inclination, transfer.raan,
+                        transfer.angle, transfer.start_time)
+        self._log_message(
+            LOG_DEBUG, "произошел переход на новую орбиту, переход занял %s сек.",
+            transfer.duration * self._recalc_interval_sec / self._time_speed_sec)
+        if self._pending_orbits:
+            self._begin_transfer(*self._pending_orbits.popleft())
 
-        # Расчет новой скорости
-        new_velocity = self._compute_velocity(new_radius, new_raan, best_angle, new_inclination)
 
-        # Сохранение новых параметров
-        self._altitude = new_altitude
-        self._radius = new_radius
-        self._raan = new_raan
-        self._inclination = new_inclination
-        self._position_angle = best_angle
-        self._position = closest_position
-        self._velocity = new_velocity
-        self._log_message(LOG_INFO, f"орбита изменена: alt={new_altitude}, RAAN={new_raan}, incl={new_inclination}")
-        
-        return distances[best_idx]
+    def _current_state(self):
+        """ Положение и скорость спутника с учетом перехода на новую орбиту:
+            во время перехода - плавное смешение состояния на прежней орбите
+            и точки целевой орбиты, в которой спутник окажется к этому моменту """
+        transfer = self._transfer
+        if transfer is None:
+            return self._position, self._velocity
+        elapsed = self._time - transfer.start_time
+        target_position, target_velocity = circular_state(
+            EARTH_RADIUS + transfer.altitude, transfer.raan, transfer.angle,
+            transfer.inclination, elapsed)
+        progress = min(1.0, elapsed / transfer.duration) if transfer.duration > 0 else 1.0
+        weight = progress * progress * (3 - 2 * progress) # smoothstep: без скачка скорости на концах
+        return ((1 - weight) * self._position + weight * target_position,
+                (1 - weight) * self._velocity + weight * target_velocity)
+
+
+    def transfer_distances(self, altitudes, inclinations, raans):
+        """transfer_distances расстояния от текущей позиции до ближайших точек
+        орбит-кандидатов (для выбора орбиты), все кандидаты - одним вызовом
+
+        Args:
+            altitudes: высоты орбит (м), число или массив
+            inclinations: наклонения (рад.)
+            raans: долготы восходящего узла (рад.)
+
+        Returns:
+            np.ndarray: расстояния (м)
+        """
+        _, distances = nearest_point(
+            self._current_state()[0], EARTH_RADIUS + np.asarray(altitudes, dtype=float), raans, inclinations)
+        return distances
 
 
     def _update_position(self, dt):
@@ -142,62 +220,105 @@ class Satellite(BaseCustomProcess):
         self._velocity += 0.5 * (acceleration + new_acceleration) * dt
 
 
+    def _advance(self, dt):
+        """ Продвижение симуляции на dt секунд выбранным способом расчета движения """
+        self._time += dt
+        if self._propagation == PROPAGATION_KEPLER:
+            # состояние вычисляется сразу для текущего времени, шаг может быть любым
+            self._position, self._velocity = circular_state(
+                self._radius, self._raan, self._position_angle, self._inclination,
+                self._time - self._epoch_time)
+        elif self._propagation == PROPAGATION_VERLET:
+            self._update_position(dt)
+        else:
+            self._position, self._velocity, self._step_sec, _ = propagate(
+                self._propagation, self._position, self._velocity, dt,
+                self._tolerance, self._step_sec)
+        # во время перехода прежняя орбита продолжает рассчитываться выбранным способом,
+        # наблюдаемое состояние - смешение с целевой орбитой (см. _current_state)
+        transfer = self._transfer
+        if transfer is not None and self._time >= transfer.start_time + transfer.duration:
+            self._finish_transfer()
+
+
+    def ephemeris(self, times):
+        """ephemeris положения и скорости спутника на текущей орбите в моменты
+        времени симуляции times, без пошагового расчета
+
+        Args:
+            times: время симуляции (сек.), число или массив моментов
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: положения и скорости, форма (..., 3)
+        """
+        return circular_state(
+            self._radius, self._raan, self._position_angle, self._inclination,
+            np.asarray(times, dtype=float) - self._epoch_time)
+
+
     def get_earth_coordinates(self):
         """ Координаты, на которые смотрит камера спутника, направленная в центр земли """
-        lat = np.degrees(np.arcsin(self._position[2] / np.linalg.norm(self._position)))
-        lon = np.degrees(np.arctan2(self._position[1], self._position[0]))
+        position, _ = self._current_state()
+        lat = np.degrees(np.arcsin(position[2] / np.linalg.norm(position)))
+        lon = np.degrees(np.arctan2(position[1], position[0]))
         return lat, lon
 
 
-    def _check_events_q(self):
-        """ Проверка наличия команд """
-        while True:
-            try:
-                event: Event = self._events_q.get_nowait()
-
-                if not isinstance(event, Event):
-                    return
-                
-                match event.operation:
-                    case 'send_data':
-                        q: Queue = self._queues_dir.get_queue(ORBIT_DRAWER_QUEUE_NAME)
-                        lat, lon = self.get_earth_coordinates()
-                        q.put(
-                            Event(
-                                source=self.event_source_name, 
-                                destination=ORBIT_DRAWER_QUEUE_NAME, 
-                                operation='update_orbit_data', 
-                                parameters=(lat, lon)))
-                    case 'change_orbit':
-                        new_altitude, new_inclination, new_raan = event.parameters
-                        distance = self._change_orbit(new_altitude, new_inclination, new_raan)
-                        time_spent = distance * self.orbit_change_coef
-                        sleep(time_spent) # переходим к новой орбите
-                        self._log_message(LOG_DEBUG, f"произошел переход на новую орбиту, переход занял {time_spent} сек.")
-                    case 'post_camera_coords':
-                        lat, lon = self.get_earth_coordinates()
-                        request = Event(
-                            source=self._event_source_name,
-                            destination=CAMERA_QUEUE_NAME,
-                            operation="camera_update",
-                            parameters=(lat, lon))
-                        camera_q: Queue = self._queues_dir.get_queue(CAMERA_QUEUE_NAME)
-                        camera_q.put(request)
-                        self._log_message(LOG_DEBUG, "обработан запрос на снимок")
-
-            except Empty:
-                break
+    @handles('send_data')
+    def _on_send_data(self, event: Event):
+        q: Queue = self._queues_dir.get_queue(ORBIT_DRAWER_QUEUE_NAME)
+        lat, lon = self.get_earth_coordinates()
+        q.put(
+            Event(
+                source=self.event_source_name,
+                destination=ORBIT_DRAWER_QUEUE_NAME,
+                operation='update_orbit_data',
+                parameters=(lat, lon)))
+
+    @handles('change_orbit')
+    def _on_change_orbit(self, event: Event):
+        # переход моделируется в симуляции и идет по таймеру пересчета,
+        # запросы координат во время перехода обслуживаются без задержки
+        new_altitude, new_inclination, new_raan = event.parameters
+        if self._transfer is not None:
+            # как и раньше, новый переход начинается после окончания текущего
+            self._pending_orbits.append((new_altitude, new_inclination, new_raan))
+            self._log_message(LOG_DEBUG, "переход на орбиту отложен до окончания текущего перехода")
+            return
+        self._begin_transfer(new_altitude, new_inclination, new_raan)
+
+    @handles('post_camera_coords')
+    def _on_post_camera_coords(self, event: Event):
+        lat, lon = self.get_earth_coordinates()
+        request = Event(
+            source=self._event_source_name,
+            destination=CAMERA_QUEUE_NAME,
+            operation="camera_update",
+            parameters=(lat, lon))
+        camera_q: Queue = self._queues_dir.get_queue(CAMERA_QUEUE_NAME)
+        camera_q.put(request)
+        self._log_message(LOG_DEBUG, "обработан запрос на снимок")
 
 
+    def _prepare(self):
+        self._log_message(LOG_INFO, "старт симуляции спутника")
+
+        # пересчет координат выполняется по таймеру,
+        # между срабатываниями процесс ждет сообщений, а не спит.
+        # Пропущенные из-за долгой обработки пересчеты выполняются подряд,
+        # поэтому время симуляции не отстает от реального
+        self._add_timer(
+            self._recalc_interval_sec,
+            lambda: self._advance(self._time_speed_sec),
+            policy=SCHEDULE_CATCH_UP,
+            name='recalc')
+
 
     def run(self):
-        self._log_message(LOG_INFO, f"старт симуляции спутника")
+        self._prepare()
 
         while self._quit is False:
-            self._update_position(self._time_speed_sec)
+            self._wait_events()
             self._check_events_q() # Вызываем метод базового класса для контроля управляющий команд
             self._check_control_q()
-            # self._log_message(LOG_DEBUG, f"позиция спутника {self._position}")            
-            
-
-            sleep(self._recalc_interval_sec)
\ No newline at end of file
+            # self._log_message(LOG_DEBUG, "позиция спутника %s", self._position)            
\ No newline at end of file
@@ -0,0 +1,307 @@
+""" модуль совместного размещения компонентов в одном процессе
+
+    Несколько компонентов (BaseCustomProcess) работают сопрограммами одного
+    цикла asyncio в одном процессе ComponentHost, а не каждый в своем процессе.
+    События между ними передаются в памяти, без кодирования и каналов ОС,
+    но каждое проходит ту же проверку политик безопасности, что и в мониторе
+    (PolicyIndex): в процессе размещения монитор заменяется шлюзом LocalSecurityGateway.
+    Получатель получает свою копию события, как после передачи через монитор,
+    а проверенные шлюзом события попадают в его файл записи (capture_to).
+    События для компонентов вне процесса шлюз передает настоящему монитору,
+    входящие события из очередей компонентов перекладываются в их локальные очереди.
+"""
+import asyncio
+from multiprocessing import Process
+from queue import Empty
+from time import monotonic
+from typing import Callable, Dict, Iterable, List, Optional
+
+from src.system.custom_process import BaseCustomProcess
+from src.system.event_capture import CAPTURE_DENIED, CAPTURE_FORWARDED, CaptureWriter
+from src.system.event_queue import EventQueue
+from src.system.event_types import Event, ControlEvent
+from src.system.log_pipeline import LoggingMixin, LogQueue
+from src.system.policy_index import PolicyIndex
+from src.system.priority import PriorityLanes, item_priority
+from src.system.queues_dir import QueuesDirectory
+from src.system.security_policy_type import SecurityPolicy
+from src.system.wire_format import decode_event, encode_event
+from src.system.config import DEFAULT_LOG_LEVEL, LOG_DEBUG, LOG_ERROR, LOG_INFO, \
+    SECURITY_MONITOR_QUEUE_NAME
+
+
+class LocalQueue:
+    """ очередь событий компонента внутри процесса размещения: события хранятся
+        в памяти как есть, по полосам приоритета, при добавлении вызывается on_put
+        (пробуждение компонента). Интерфейс получателя совпадает с EventQueue без ожидания (get_nowait) """
+
+    def __init__(self, on_put: Callable[[], None]):
+        self._events = PriorityLanes()
+        self._on_put = on_put
+        self._meter = None
+
+    def set_meter(self, meter: Optional[Callable[[object], None]]):
+        self._meter = meter
+
+    def put(self, event, block: bool = True, timeout: Optional[float] = None):
+        self._events.push(event, item_priority(event))
+        self._on_put()
+
+    def put_nowait(self, event):
+        self.put(event)
+
+    def put_many(self, events: Iterable[Event], block: bool = True, timeout: Optional[float] = None):
+        self._events.extend(events)
+        self._on_put()
+
+    def get(self, block: bool = True, timeout: Optional[float] = None):
+        if not self._events:
+            if self._meter is not None:
+                self._meter(None)
+            raise Empty
+        event = self._events.pop()
+        if self._meter is not None:
+            self._meter(event)
+        return event
+
+    def get_nowait(self):
+        return self.get(False)
+
+    def get_many(self, max_items: Optional[int] = None) -> List[Event]:
+        count = len(self._events) if max_items is None else min(max_items, len(self._events))
+        return [self._events.pop() for _ in range(count)]
+
+    def buffered(self) -> bool:
+        return bool(self._events)
+
+    def empty(self) -> bool:
+        return not self._events
+
+    def depth(self) -> int:
+        return len(self._events)
+
+    def channel_backlog(self) -> int:
+        return 0
+
+    def overflow_stats(self) -> dict:
+        return {}
+
+    def waitables(self) -> list:
+        return []
+
+
+class LocalSecurityGateway(LoggingMixin):
+    """ монитор безопасности внутри процесса размещения: компоненты отправляют
+        ему события как монитору (get_queue(SECURITY_MONITOR_QUEUE_NAME)).
+        Событие для компонента этого же процесса проверяется по политикам,
+        записывается в файл записи (если задан) и его копия кладется в локальную
+        очередь получателя, остальные события передаются монитору (и записываются им) """
+    log_prefix = "[HOST_SECURITY]"
+
+    def __init__(self, policies: PolicyIndex, local_queues: Dict[str, LocalQueue],
+                 upstream, log_queue: Optional[LogQueue], log_level: int,
+                 capture: Optional[CaptureWriter] = None):
+        self._policies = policies
+        self._local_queues = local_queues
+        self._upstream = upstream
+        self._log_q = log_queue
+        self.log_level = log_level
+        self._capture = capture
+
+    def _log_queue(self) -> Optional[LogQueue]:
+        return self._log_q
+
+    def put(self, event: Event, block: bool = True, timeout: Optional[float] = None):
+        queue = self._local_queues.get(event.destination)
+        if queue is None:
+            self._upstream.put(event, block, timeout)
+            return
+        frame = encode_event(event)
+        authorized = self._policies.allows(event.source, event.destination, event.operation)
+        if self._capture is not None:
+            self._capture.append(frame, CAPTURE_FORWARDED if authorized else CAPTURE_DENIED)
+        if not authorized:
+            self._log_message(
+                LOG_ERROR, "событие не разрешено политиками безопасности! %s: %s -> %s",
+                event.operation, event.source, event.destination)
+            return
+        self._log_message(
+            LOG_DEBUG, "событие %s: %s -> %s разрешено политиками, выполняем",
+            event.operation, event.source, event.destination)
+        # отправитель может изменить отправленное событие, получатель получает копию
+        delivered = decode_event(frame)
+        if delivered.trace_id is not None:
+            # переход трассы "пересылка монитором", как при пересылке через процесс монитора
+            delivered.hops.append((SECURITY_MONITOR_QUEUE_NAME, monotonic()))
+        queue.put(delivered)
+
+    def put_nowait(self, event: Event):
+        self.put(event)
+
+    def put_many(self, events: Iterable[Event], block: bool = True, timeout: Optional[float] = None):
+        upstream = []
+        for event in events:
+            if event.destination in self._local_queues:
+                self.put(event)
+            else:
+                upstream.append(event)
+        if upstream:
+            self._upstream.put_many(upstream, block, timeout)
+
+
+class ComponentHost(LoggingMixin, Process):
+    """ процесс, в котором группа компонентов работает сопрограммами одного цикла asyncio.
+        Для контейнера компонентов выглядит как один компонент: start, stop, join, wait_ready.
+        Компоненты создаются как обычно (их очереди регистрируются в каталоге),
+        но сами процессы компонентов не запускаются: вместо run() компонента
+        выполняются его настройка _prepare() и базовый цикл обработки событий """
+    log_prefix = "[HOST]"
+
+    def __init__(
+        self,
+        queues_dir: QueuesDirectory,
+        components: List[BaseCustomProcess],
+        policies: Iterable[SecurityPolicy],
+        log_level: int = DEFAULT_LOG_LEVEL,
+    ):
+        """
+        Args:
+            queues_dir (QueuesDirectory): каталог очередей
+            components (List[BaseCustomProcess]): размещаемые компоненты
+            policies (Iterable[SecurityPolicy]): политики безопасности для событий между ними
+            log_level (int): уровень логирования
+        """
+        super().__init__()
+        self._queues_dir = queues_dir
+        self._components = list(components)
+        self._policies = PolicyIndex(policies)
+        self.log_level = log_level
+        self._control_q = EventQueue()
+        self._quit = False
+        self._wakeups: Dict[str, asyncio.Event] = {}
+        # файл записи событий, проверенных шлюзом (см. event_capture.py), None - без записи
+        self._capture_path = None
+        self._capture = None
+        names = ", ".join(component._events_q_name for component in self._components)
+        self._log_message(LOG_INFO, "создан процесс размещения компонентов: %s", names)
+
+    def _log_queue(self) -> Optional[LogQueue]:
+        return self._queues_dir.log_queue
+
+    def capture_to(self, path: Optional[str]):
+        """capture_to включает запись событий, проверенных шлюзом (пересланных и запрещенных),
+        вызывается до запуска. События в другие процессы записывает монитор безопасности
+        в свои файлы, записи читаются вместе (см. read_captures)
+
+        Args:
+            path (Optional[str]): файл записи, None - без записи
+        """
+        self._capture_path = path
+
+    @property
+    def components(self) -> List[BaseCustomProcess]:
+        return self._components
+
+    def _install(self, loop: asyncio.AbstractEventLoop):
+        """ замена очередей компонентов на локальные и монитора на шлюз (в процессе размещения) """
+        local_queues = {}
+        for component in self._components:
+            name = component._events_q_name
+            wakeup = self._wakeups[name] = asyncio.Event()
+            external: EventQueue = component._events_q
+            local = LocalQueue(wakeup.set)
+            component._events_q = local
+            local_queues[name] = local
+
+            # события из других процессов перекладываются в локальную очередь
+            def drain(external=external, local=local):
+                events = external.get_many()
+                if events:
+                    local.put_many(events)
+
+            for waitable in external.waitables():
+                loop.add_reader(waitable.fileno(), drain)
+
+        upstream = self._queues_dir.queues[SECURITY_MONITOR_QUEUE_NAME]
+        self._queues_dir.queues[SECURITY_MONITOR_QUEUE_NAME] = LocalSecurityGateway(
+            self._policies, local_queues, upstream, self._queues_dir.log_queue, self.log_level,
+            self._capture)
+        for waitable in self._control_q.waitables():
+            loop.add_reader(waitable.fileno(), self._check_control_q)
+
+    def _check_control_q(self):
+        try:
+            request: ControlEvent = self._control_q.get_nowait()
+        except Empty:
+            return
+        if isinstance(request, ControlEvent) and request.operation == 'stop':
+            self._quit = True
+            for wakeup in self._wakeups.values():
+                wakeup.set()
+
+    async def _serve(self, component: BaseCustomProcess):
+        """ цикл компонента: то же, что run() в его процессе - настройка (_prepare),
+            затем _wait_events + _check_events_q """
+        wakeup = self._wakeups[component._events_q_name]
+        try:
+            component._prepare()
+        except Exception as e:
+            component._log_message(LOG_ERROR, "ошибка настройки компонента: %s", e)
+            return
+        component._log_message(LOG_INFO, "компонент активен в процессе размещения")
+        while self._quit is False:
+            buffered = component._events_q.buffered()
+            component._before_wait(idle=not buffered)
+            if not buffered:
+                timeout = None
+                if component._timers:
+                    timeout = max(0.0, component._timers[0][0] - monotonic())
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                # даем поработать остальным компонентам
+                await asyncio.sleep(0)
+            wakeup.clear()
+            if self._quit:
+                break
+            try:
+                component._run_timers()
+                component._check_events_q()
+            except Exception as e:
+                component._log_message(LOG_ERROR, "ошибка компонента: %s", e)
+
+    async def _main(self):
+        loop = asyncio.get_running_loop()
+        self._install(loop)
+        await asyncio.gather(*(self._serve(component) for component in self._components))
+
+    def run(self):
+        self._log_message(LOG_INFO, "процесс размещения компонентов активен")
+        if self._capture_path is not None:
+            self._capture = CaptureWriter(self._capture_path)
+            self._log_message(LOG_INFO, "события записываются в %s", self._capture_path)
+        try:
+            asyncio.run(self._main())
+        finally:
+            if self._capture is not None:
+                self._capture.close()
+        for component in self._components:
+            component._flush_log()
+
+    def start(self):
+        for component in self._components:
+            component._add_service_timers()
+        super().start()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else monotonic() + timeout
+        for component in self._components:
+            remaining = None if deadline is None else max(0.0, deadline - monotonic())
+            if not component.wait_ready(remaining):
+                return False
+        return True
+
+    def stop(self):
+        self._control_q.put(ControlEvent(operation="stop"))
@@ -11,6 +11,41 @@ CENTRAL_CONTROL_SYSTEM_QUEUE_NAME = "central_control"
 DATA_STORAGE_QUEUE_NAME = "data_storage"
 COMMAND_HANDLER_QUEUE_NAME = "handler"
 SATELLITE_CONTROL_SYSTEM_QUEUE_NAME = "satellite_control_system"
+METRICS_QUEUE_NAME = "metrics"
+TRACES_QUEUE_NAME = "traces"
+
+# период отправки метрик компонентов сборщику (сек.)
+METRICS_INTERVAL_SEC = 1.0
+# время ожидания ответа на запрос компонента по умолчанию (сек.)
+REQUEST_TIMEOUT_SEC = 5.0
+# период проверки истекших запросов (сек.)
+REQUEST_CHECK_INTERVAL_SEC = 0.1
+
+# транспорты выделенных каналов между компонентами
+TRANSPORT_PIPE = "pipe"  # multiprocessing.Queue (канал ОС и поток-отправитель)
+TRANSPORT_SHM = "shm"    # кольцевой буфер в разделяемой памяти
+
+# политики периодических таймеров, когда срабатывания пропущены из-за долгой обработки
+SCHEDULE_CATCH_UP = "catch_up"  # пропущенные срабатывания выполняются подряд
+SCHEDULE_SKIP = "skip"          # пропущенные срабатывания отбрасываются
+# наибольшее число пропущенных срабатываний, выполняемых подряд (catch_up)
+SCHEDULE_MAX_CATCH_UP = 10
+
+# классы приоритета событий (полосы очереди), меньшее значение - выше приоритет
+PRIORITY_COMMAND = 0    # команды управления: изменение орбиты, зоны, снимки
+PRIORITY_NORMAL = 1     # прочие запросы
+PRIORITY_TELEMETRY = 2  # телеметрия: положение спутника, камера, отрисовка, метрики
+PRIORITY_LANES = 3
+# после стольких выдач подряд из старших полос ожидающая младшая полоса
+# получает внеочередную выдачу (защита от голодания)
+PRIORITY_STARVATION_LIMIT = 16
+
+# политики переполнения очередей с ограниченной емкостью
+OVERFLOW_BLOCK = "block"              # отправитель ждет освобождения места
+OVERFLOW_DROP_OLDEST = "drop_oldest"  # получатель отбрасывает самые старые события
+OVERFLOW_DROP_NEWEST = "drop_newest"  # новое событие отбрасывается
+OVERFLOW_COALESCE = "coalesce"        # получатель оставляет последнее событие каждой операции
+OVERFLOW_REJECT = "reject"            # новое событие отклоняется с уведомлением отправителя
 
 DEFAULT_LOG_LEVEL = 2  # 1 - errors, 2 - verbose, 3 - debug
 LOG_FAILURE = 0
@@ -0,0 +1,15 @@
+""" модуль связывания запросов и ответов между компонентами
+
+    Запрос (BaseCustomProcess._request) получает номер (Event.correlation_id).
+    Номер не наследуется событиями, созданными при обработке запроса: его
+    переносит только BaseCustomProcess._reply - в ответ или в пересылку запроса
+    дальше (например, через ЦСУ). Поэтому прочие события, отправленные
+    спрашивающему компоненту во время обработки, не завершают его запрос.
+    Компонент, отправивший запрос, узнает ответ по номеру.
+"""
+import random
+
+
+def new_correlation_id() -> int:
+    """ случайный номер нового запроса """
+    return random.getrandbits(63)
@@ -1,12 +1,57 @@
+import multiprocessing
 from abc import abstractmethod
+from concurrent.futures import Future
+from heapq import heappush, heappop
 from multiprocessing import Process, Queue
+from multiprocessing.connection import wait
 from queue import Empty
+from time import monotonic
+from typing import Callable, Dict, Optional
 
-from src.system.event_types import Event, ControlEvent
+from src.system.event_types import Event, ControlEvent, ServiceRecord
+from src.system.event_queue import EventQueue
+from src.system.log_pipeline import LoggingMixin, LogQueue
+from src.system.metrics import ComponentMetrics
+from src.system import correlation, tracing
 from src.system.queues_dir import QueuesDirectory
-from src.system.config import DEFAULT_LOG_LEVEL, CRITICALITY_STR, LOG_DEBUG
+from src.system.scheduler import FixedRateSchedule
+from src.system.config import DEFAULT_LOG_LEVEL, LOG_DEBUG, LOG_ERROR, METRICS_QUEUE_NAME, \
+    METRICS_INTERVAL_SEC, REQUEST_CHECK_INTERVAL_SEC, REQUEST_TIMEOUT_SEC, SCHEDULE_SKIP, \
+    SECURITY_MONITOR_QUEUE_NAME, TRACES_QUEUE_NAME
+
+
+def handles(*operations: str):
+    """handles помечает метод компонента обработчиком событий с указанными операциями,
+    метод вызывается с событием: handler(self, event)
+
+    Args:
+        operations (str): операции событий
+
+    Returns:
+        Callable: декоратор метода
+    """
+    def mark(method):
+        method._handles_operations = operations
+        return method
+    return mark
+
+
+class BaseCustomProcess(LoggingMixin, Process):
+    # реестр обработчиков: операция -> имя метода, помеченного handles.
+    # Строится при создании класса и дополняется реестром базового класса
+    _handlers: Dict[str, str] = {}
+    # очередь компонента служебная (сборщики метрик и трасс): принимает записи
+    # ServiceRecord напрямую от компонентов, события в нее не маршрутизируются
+    service_queue = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        handlers = dict(cls._handlers)
+        for name, member in vars(cls).items():
+            for operation in getattr(member, '_handles_operations', ()):
+                handlers[operation] = name
+        cls._handlers = handlers
 
-class BaseCustomProcess(Process):
     def __init__(
         self,
         log_prefix: str,
@@ -18,27 +63,62 @@ class BaseCustomProcess(Process):
         super().__init__()
 
         self._queues_dir = queues_dir
-        self._events_q = Queue()
+        self._events_q = EventQueue(*queues_dir.queue_limit(events_q_name))
         self._events_q_name = events_q_name
         self._event_source_name = event_source_name
         self.log_prefix = log_prefix
-        queues_dir.register(queue=self._events_q, name=self._events_q_name)
+        if self.service_queue:
+            queues_dir.register_service_queue(queue=self._events_q, name=self._events_q_name)
+        else:
+            queues_dir.register(queue=self._events_q, name=self._events_q_name)
 
         self.log_level = log_level
-        self._control_q = Queue()
+        self._control_q = EventQueue()
+
+        # таймеры компонента: куча из (время срабатывания, номер, расписание, обработчик)
+        self._timers = []
+        self._timers_count = 0
+        # расписания именованных таймеров, их статистика входит в метрики
+        self._schedules: Dict[str, FixedRateSchedule] = {}
+
+        # метрики и трассировка компонента, обработка события отсчитывается
+        # от выдачи его из очереди до следующей выдачи или ожидания
+        self._metrics = ComponentMetrics()
+
+        # готовность компонента: процесс запущен и впервые ждет событий
+        self._ready = multiprocessing.Event()
+        self._ready_signalled = False
+
+        # запросы, ожидающие ответа: номер -> (срок, Future, обработчик ответа, операция)
+        self._requests: Dict[int, tuple] = {}
+        self._requests_timer = False
 
         self._quit = False
-    
-    def _log_message(self, criticality: int, message: str):
-        """_log_message печатает сообщение заданного уровня критичности
+
+    def _log_queue(self) -> Optional[LogQueue]:
+        return self._queues_dir.log_queue
+
+
+    def _on_event(self, event):
+        """_on_event вызывается очередью событий при каждой выдаче события
 
         Args:
-            criticality (int): уровень критичности
-            message (str): текст сообщения
+            event: выданное событие, None - очередь пуста
         """
-        if criticality <= self.log_level:
-            print(f"[{CRITICALITY_STR[criticality]}]{self.log_prefix} {message}")
-    
+        self._metrics.on_get(event)
+        self._finish_trace()
+        if event is not None:
+            tracing.begin(event, self._events_q_name)
+
+    def _finish_trace(self):
+        """ завершение обработки трассируемого события, путь последнего
+            на своем пути события отправляется сборщику трасс """
+        finished = tracing.end()
+        if finished is None:
+            return
+        q = self._queues_dir.get_service_queue(TRACES_QUEUE_NAME)
+        if q is not None:
+            q.put(ServiceRecord(source=self._events_q_name, operation='trace', payload=finished))
 
 
     def _check_control_q(self):
@@ -46,7 +126,7 @@ class BaseCustomProcess(Process):
         try:
             request: ControlEvent = self._control_q.get_nowait()
             self._log_message(
-                LOG_DEBUG, f"проверяем запрос {request}")
+                LOG_DEBUG, "проверяем запрос %s", request)
             if not isinstance(request, ControlEvent):
                 return
             if request.operation == 'stop':
@@ -56,13 +136,255 @@ class BaseCustomProcess(Process):
             pass
 
 
-    @abstractmethod
+    def _add_timer(self, interval_sec: float, callback: Callable[[], None],
+                   policy: str = SCHEDULE_SKIP, name: Optional[str] = None) -> FixedRateSchedule:
+        """_add_timer регистрирует периодический таймер компонента,
+        обработчик вызывается из _wait_events. Сроки срабатываний лежат на сетке
+        с шагом interval_sec и не сдвигаются временем обработки (см. scheduler.py)
+
+        Args:
+            interval_sec (float): период срабатывания (сек.)
+            callback (Callable[[], None]): обработчик таймера
+            policy (str): SCHEDULE_SKIP - пропущенные из-за долгой обработки срабатывания
+                отбрасываются, SCHEDULE_CATCH_UP - выполняются подряд
+            name (Optional[str]): имя таймера, статистика именованных таймеров
+                (дрожание, пропуски) отправляется с метриками компонента
+
+        Returns:
+            FixedRateSchedule: расписание таймера
+        """
+        schedule = FixedRateSchedule(interval_sec, policy)
+        if name is not None:
+            self._schedules[name] = schedule
+        self._timers_count += 1
+        heappush(self._timers, (schedule.deadline, self._timers_count, schedule, callback))
+        return schedule
+
+
+    def _run_timers(self):
+        """ вызов обработчиков всех таймеров, время которых наступило """
+        now = monotonic()
+        while self._timers and self._timers[0][0] <= now:
+            _, number, schedule, callback = heappop(self._timers)
+            for _ in range(schedule.due(now)):
+                callback()
+            heappush(self._timers, (schedule.deadline, number, schedule, callback))
+
+
+    def _signal_ready(self):
+        """ при первом ожидании событий: подключает учет метрик к очереди событий
+            и сообщает запустившему процессу, что компонент готов принимать события """
+        if not self._ready_signalled:
+            # обработчик назначается в процессе компонента: при запуске через spawn
+            # и forkserver очередь передается в процесс без него
+            self._events_q.set_meter(self._on_event)
+            self._ready.set()
+            self._ready_signalled = True
+
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """wait_ready ожидание готовности запущенного компонента
+
+        Args:
+            timeout (Optional[float]): максимальное время ожидания (сек.)
+
+        Returns:
+            bool: компонент готов
+        """
+        return self._ready.wait(timeout)
+
+
+    def _before_wait(self, idle: bool):
+        """_before_wait завершение итерации цикла компонента перед ожиданием событий
+
+        Args:
+            idle (bool): компонент собирается простаивать (событий в буфере нет)
+        """
+        if idle:
+            # перед простоем накопленный журнал уходит процессу записи
+            self._flush_log()
+        self._signal_ready()
+        self._metrics.end()
+        self._finish_trace()
+        self._metrics.loop()
+
+
+    def _wait_events(self, timeout: Optional[float] = None):
+        """_wait_events блокирует процесс до прихода сообщения в очередь событий
+        или в очередь управляющих команд, либо до срабатывания ближайшего таймера.
+        Все сообщения, накопившиеся за время ожидания, затем разбираются
+        одной пачкой в _check_events_q, поэтому процесс не крутит пустой цикл
+
+        Args:
+            timeout (Optional[float]): максимальное время ожидания (сек.),
+                None - ждать без ограничения (до сообщения или таймера)
+        """
+        if self._events_q.buffered():
+            # в очереди остались распакованные из пачки события, ждать нечего
+            timeout = 0
+        elif self._timers:
+            timer_timeout = max(0.0, self._timers[0][0] - monotonic())
+            timeout = timer_timeout if timeout is None else min(timeout, timer_timeout)
+        self._before_wait(idle=timeout != 0)
+        wait(self._events_q.waitables() + self._control_q.waitables(), timeout)
+        self._run_timers()
+
+
+    def _publish_metrics(self):
+        """ отправка метрик компонента сборщику метрик (служебная очередь, см. queues_dir.py) """
+        q = self._queues_dir.get_service_queue(METRICS_QUEUE_NAME)
+        if q is None:
+            return
+        q.put(
+            ServiceRecord(
+                source=self._events_q_name,
+                operation='metrics',
+                payload=self._metrics.snapshot(
+                    self._events_q.depth(), self._events_q.channel_backlog(),
+                    self._events_q.overflow_stats(),
+                    {name: schedule.stats() for name, schedule in self._schedules.items()})))
+
+
     def _check_events_q(self):
+        """_check_events_q разбирает все доступные события и передает каждое обработчику
+        его операции из реестра (см. handles). Время обработки по операциям учитывают
+        метрики компонента, события без обработчика учитываются отдельно
+        """
+        while True:
+            try:
+                event: Event = self._events_q.get_nowait()
+            except Empty:
+                break
+            if isinstance(event, Event):
+                self._dispatch(event)
+
+    def _dispatch(self, event: Event):
+        """ вызов обработчика операции события (или ответа на запрос компонента),
+            ошибка обработчика не прерывает разбор пачки """
+        try:
+            if event.correlation_id is not None:
+                request = self._requests.pop(event.correlation_id, None)
+                if request is not None:
+                    self._complete_request(request, event)
+                    return
+            name = self._handlers.get(event.operation)
+            if name is None:
+                self._metrics.unknown_operation(event.operation)
+                self._log_message(
+                    LOG_DEBUG, "нет обработчика операции %s (от %s)", event.operation, event.source)
+                return
+            getattr(self, name)(event)
+        except Exception as e:
+            self._log_message(LOG_ERROR, "ошибка обработки %s от %s: %s", event.operation, event.source, e)
+
+    def _request(
+        self,
+        destination: str,
+        operation: str,
+        parameters=None,
+        callback: Optional[Callable[[Event], None]] = None,
+        timeout_sec: float = REQUEST_TIMEOUT_SEC,
+        via: str = SECURITY_MONITOR_QUEUE_NAME,
+    ) -> Future:
+        """_request отправка запроса с новым номером (Event.correlation_id).
+        Ответом считается первое пришедшее событие с тем же номером (его отправляет
+        получатель или следующий по цепочке через _reply), оно не передается
+        обработчику операции, а завершает запрос. Запросов может быть несколько одновременно
+
+        Args:
+            destination (str): получатель
+            operation (str): операция
+            parameters: параметры запроса
+            callback (Optional[Callable[[Event], None]]): обработчик ответа
+            timeout_sec (float): время ожидания ответа (сек.)
+            via (str): очередь для отправки, по умолчанию - монитор безопасности
+
+        Returns:
+            Future: результат - событие-ответ, по истечении времени - исключение TimeoutError.
+                Ответ приходит в цикле компонента, поэтому ждать Future.result() в обработчике нельзя
+        """
+        correlation_id = correlation.new_correlation_id()
+        future = Future()
+        self._requests[correlation_id] = (monotonic() + timeout_sec, future, callback, operation)
+        if not self._requests_timer:
+            self._add_timer(REQUEST_CHECK_INTERVAL_SEC, self._expire_requests)
+            self._requests_timer = True
+        q = self._queues_dir.get_queue(via)
+        q.put(
+            Event(
+                source=self._event_source_name,
+                destination=destination,
+                operation=operation,
+                parameters=parameters,
+                correlation_id=correlation_id))
+        return future
+
+    def _reply(
+        self,
+        request: Event,
+        operation: str,
+        parameters=None,
+        destination: Optional[str] = None,
+        via: str = SECURITY_MONITOR_QUEUE_NAME,
+    ):
+        """_reply ответ на событие-запрос или пересылка запроса дальше:
+        только так событие получает номер запроса (correlation_id) исходного события
+
+        Args:
+            request (Event): обрабатываемое событие
+            operation (str): операция ответа
+            parameters: параметры ответа
+            destination (Optional[str]): получатель, None - отправитель запроса
+            via (str): очередь для отправки, по умолчанию - монитор безопасности
+        """
+        q = self._queues_dir.get_queue(via)
+        q.put(
+            Event(
+                source=self._event_source_name,
+                destination=request.source if destination is None else destination,
+                operation=operation,
+                parameters=parameters,
+                correlation_id=request.correlation_id))
+
+    def _complete_request(self, request: tuple, response: Event):
+        """ завершение запроса ответом """
+        _, future, callback, _ = request
+        future.set_result(response)
+        if callback is not None:
+            callback(response)
+
+    def _expire_requests(self):
+        """ завершение запросов, ответ на которые не пришел вовремя """
+        now = monotonic()
+        expired = [correlation_id for correlation_id, request in self._requests.items()
+                   if request[0] <= now]
+        for correlation_id in expired:
+            _, future, _, operation = self._requests.pop(correlation_id)
+            self._log_message(LOG_ERROR, "нет ответа на запрос %s (%x)", operation, correlation_id)
+            future.set_exception(TimeoutError(f"нет ответа на запрос {operation}"))
+
+    def _prepare(self):
+        """ настройка компонента перед циклом обработки событий (таймеры, начальное
+            состояние): вызывается из run() и процессом размещения ComponentHost,
+            который выполняет цикл компонента вместо run() """
         pass
 
     @abstractmethod
     def run(self):
         pass
 
+    def _add_service_timers(self):
+        """ служебные таймеры компонента, регистрируются перед запуском """
+        if METRICS_QUEUE_NAME in self._queues_dir.service_queues and self._events_q_name != METRICS_QUEUE_NAME:
+            # сборщик метрик зарегистрирован - компонент периодически отправляет ему метрики
+            self._add_timer(METRICS_INTERVAL_SEC, self._publish_metrics)
+
+    def start(self):
+        self._add_service_timers()
+        # каталог очередей копируется в дочерний процесс при запуске,
+        # в копии запоминается владелец - ему выдаются его выделенные каналы
+        with self._queues_dir.bound_to(self._event_source_name):
+            super().start()
+
     def stop(self):
-        self._control_q.put(ControlEvent(operation="stop"))
\ No newline at end of file
+        self._control_q.put(ControlEvent(operation="stop"))
@@ -0,0 +1,167 @@
+""" модуль записи и воспроизведения событий, проходящих через монитор безопасности
+
+    Монитор (BaseSecurityMonitor.capture_to) дописывает каждое проверенное
+    событие в файл записи: время проверки (time.monotonic), решение монитора
+    (переслано или запрещено) и кадр события в формате wire_format как есть.
+    Файл отображается в память (mmap) и только дополняется, при нехватке места
+    увеличивается. В заголовке файла хранится конец последней полной записи,
+    поэтому запись, прерванная аварийным завершением процесса, не читается.
+
+    Воспроизведение (replay) подает кадры записи в очередь монитора новой системы
+    с интервалами как при записи или с максимальной скоростью.
+"""
+import heapq
+import mmap
+import os
+import struct
+from time import monotonic, sleep
+from typing import Iterable, Iterator, Optional, Sequence, Tuple
+
+from src.system.wire_format import decode_header, restamp
+
+# признак файла записи, конец последней полной записи
+_FILE_HEADER = struct.Struct('<8sQ')
+_MAGIC = b'SATCAP01'
+# длина кадра, время проверки, решение монитора
+_RECORD = struct.Struct('<IdB')
+
+CAPTURE_DENIED = 0
+CAPTURE_FORWARDED = 1
+
+# начальный размер файла записи, при заполнении размер удваивается
+CAPTURE_INITIAL_BYTES = 1 << 22
+
+# запись: время проверки, решение монитора, кадр события
+CaptureRecord = Tuple[float, int, bytes]
+
+
+class CaptureWriter:
+    """ запись кадров в отображенный в память файл, только дополнение """
+
+    def __init__(self, path: str, initial_bytes: int = CAPTURE_INITIAL_BYTES):
+        """
+        Args:
+            path (str): файл записи (перезаписывается)
+            initial_bytes (int): начальный размер файла (байт)
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._file = open(path, 'w+b')
+        self._size = max(initial_bytes, _FILE_HEADER.size + _RECORD.size)
+        self._file.truncate(self._size)
+        self._map = mmap.mmap(self._file.fileno(), self._size)
+        self._end = _FILE_HEADER.size
+        _FILE_HEADER.pack_into(self._map, 0, _MAGIC, self._end)
+
+    def _grow(self, need: int):
+        """ увеличение файла, чтобы поместилось еще need байт """
+        size = self._size
+        while self._end + need > size:
+            size *= 2
+        self._map.close()
+        self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+        self._size = size
+
+    def append(self, frame, verdict: int, timestamp: Optional[float] = None):
+        """append дописывает кадр в файл записи
+
+        Args:
+            frame (bytes | memoryview): кадр события
+            verdict (int): CAPTURE_FORWARDED или CAPTURE_DENIED
+            timestamp (Optional[float]): время проверки, None - текущее (time.monotonic)
+        """
+        need = _RECORD.size + len(frame)
+        if self._end + need > self._size:
+            self._grow(need)
+        start = self._end
+        _RECORD.pack_into(self._map, start, len(frame),
+                          monotonic() if timestamp is None else timestamp, verdict)
+        self._map[start + _RECORD.size:start + need] = frame
+        self._end = start + need
+        # запись становится видимой читателю после обновления конца в заголовке
+        _FILE_HEADER.pack_into(self._map, 0, _MAGIC, self._end)
+
+    def close(self):
+        """ сброс на диск и обрезка файла по последней записи """
+        if self._map.closed:
+            return
+        self._map.flush()
+        self._map.close()
+        self._file.truncate(self._end)
+        self._file.close()
+
+
+def read_capture(path: str) -> Iterator[CaptureRecord]:
+    """read_capture чтение файла записи
+
+    Args:
+        path (str): файл записи
+
+    Yields:
+        CaptureRecord: время проверки, решение монитора, кадр события
+    """
+    with open(path, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            magic, end = _FILE_HEADER.unpack_from(data, 0)
+            if magic != _MAGIC:
+                raise ValueError(f"{path} не является файлом записи событий")
+            offset = _FILE_HEADER.size
+            while offset < end:
+                length, timestamp, verdict = _RECORD.unpack_from(data, offset)
+                offset += _RECORD.size
+                yield timestamp, verdict, data[offset:offset + length]
+                offset += length
+
+
+def read_captures(paths: Iterable[str]) -> Iterator[CaptureRecord]:
+    """ чтение нескольких файлов записи (экземпляров группы мониторов) в порядке времени """
+    return heapq.merge(*(read_capture(path) for path in paths), key=lambda record: record[0])
+
+
+def replay(
+    records: Iterable[CaptureRecord],
+    queue,
+    realtime: bool = False,
+    sources: Optional[Sequence[str]] = None,
+    batch_size: int = 256,
+) -> int:
+    """replay подача записанных кадров в очередь монитора безопасности.
+    Кадрам ставится текущее время создания, блок трассы отбрасывается
+
+    Args:
+        records (Iterable[CaptureRecord]): записи (read_capture, read_captures)
+        queue: очередь монитора безопасности (put_frames)
+        realtime (bool): True - с интервалами как при записи, False - с максимальной скоростью
+        sources (Optional[Sequence[str]]): подавать только события этих отправителей,
+            None - все записанные события
+        batch_size (int): размер пачки при подаче с максимальной скоростью
+
+    Returns:
+        int: число поданных событий
+    """
+    count = 0
+    batch = []
+    first_record = None
+    started = monotonic()
+    for timestamp, _, frame in records:
+        if sources is not None and decode_header(frame)[0] not in sources:
+            continue
+        if realtime:
+            if first_record is None:
+                first_record = timestamp
+            delay = (timestamp - first_record) - (monotonic() - started)
+            if delay > 0:
+                sleep(delay)
+            queue.put_frames([restamp(frame, monotonic())])
+        else:
+            batch.append(restamp(frame, monotonic()))
+            if len(batch) >= batch_size:
+                queue.put_frames(batch)
+                batch = []
+        count += 1
+    if batch:
+        queue.put_frames(batch)
+    return count
@@ -0,0 +1,302 @@
+""" модуль очереди событий с поддержкой пакетной передачи """
+import multiprocessing
+from multiprocessing.connection import wait
+from multiprocessing.queues import Queue
+from queue import Empty, Full
+from time import monotonic
+from typing import Callable, Iterable, List, Optional
+
+from src.system.event_types import Event, ControlEvent
+from src.system.overflow import EventSlots, OverflowCounters, QueueRejected
+from src.system.priority import PriorityLanes, item_priority
+from src.system.wire_format import FRAME_BATCH, encode, encode_batch, decode_frames, decode_header, \
+    frame_count, frame_priority, split_batch
+from src.system.config import OVERFLOW_BLOCK, OVERFLOW_COALESCE, OVERFLOW_DROP_OLDEST, OVERFLOW_REJECT
+
+
+def _event_key(item):
+    """ ключ объединения события при политике coalesce: (отправитель, операция) """
+    if isinstance(item, Event):
+        return item.source, item.operation
+    return None
+
+
+def _frame_key(frame):
+    """ ключ объединения кадра при политике coalesce: (отправитель, операция) """
+    try:
+        source, _, operation, _, _, _ = decode_header(frame)
+    except ValueError:
+        return None
+    return source, operation
+
+
+class EventQueue(Queue):
+    """ очередь событий между процессами.
+        События и управляющие команды передаются кадрами компактного двоичного
+        формата (см. wire_format.py), через канал идут готовые байты.
+        Помимо обычных put/get поддерживает put_many/get_many: пачка событий
+        упаковывается в один кадр, что экономит запись в канал и пробуждение
+        потока-отправителя на каждое событие.
+        Получатель распаковывает пачку прозрачно, события из нее
+        выдаются по одному и через get/get_nowait.
+
+        К очереди можно подключить выделенные входящие каналы других транспортов
+        (см. QueuesDirectory.register_channel), получатель читает их вместе
+        с основной очередью теми же get/get_many.
+
+        Получатель забирает из каналов все доступное и раскладывает события
+        по полосам классов приоритета (см. priority.py): события выдаются
+        начиная со старшей полосы, а не в порядке поступления.
+
+        Емкость очереди (maxsize) - число событий: для политик block, drop_newest
+        и reject - отправленных, но еще не забранных получателем из основной очереди
+        и подключенных каналов (пачка считается по числу событий), для политик
+        drop_oldest и coalesce - в каждой полосе буфера получателя.
+        Поведение при переполнении задается политикой (см. overflow.py) """
+
+    def __init__(self, maxsize: int = 0, overflow_policy: str = OVERFLOW_BLOCK):
+        # буфер получателя сокращается до емкости при каждом чтении
+        trim = maxsize > 0 and overflow_policy in (OVERFLOW_DROP_OLDEST, OVERFLOW_COALESCE)
+        # канал ОС не ограничивается: емкость считается в событиях местами _slots
+        # (пачка - одна запись канала), а при сокращении на стороне получателя
+        # отправитель не ограничивается вовсе, иначе отбрасывались бы новые события
+        super().__init__(0, ctx=multiprocessing.get_context())
+        self._slots = EventSlots(maxsize) if maxsize > 0 and not trim else None
+        self._channels = []
+        # обработчик выдачи событий для учета метрик получателя
+        self._meter = None
+        self._capacity = maxsize
+        self._overflow_policy = overflow_policy
+        # счетчики переполнения, только у очереди с ограниченной емкостью
+        self.overflow = OverflowCounters() if maxsize > 0 else None
+        self._trim = trim
+
+    def __getstate__(self):
+        return (super().__getstate__(), self._channels, self._capacity,
+                self._overflow_policy, self.overflow, self._trim, self._slots)
+
+    def __setstate__(self, state):
+        (state, self._channels, self._capacity, self._overflow_policy,
+         self.overflow, self._trim, self._slots) = state
+        self._meter = None
+        super().__setstate__(state)
+
+    def _reset(self, after_fork=False):
+        super()._reset(after_fork)
+        # распакованные, но еще не выданные события по полосам приоритета (своя копия в каждом процессе)
+        self._pending = PriorityLanes()
+        # прочитанные, но еще не выданные кадры (get_frames)
+        self._pending_frames = PriorityLanes()
+
+    def set_meter(self, meter: Optional[Callable[[object], None]]):
+        """set_meter назначает обработчик, вызываемый при каждой выдаче через get/get_nowait
+        с выданным событием или с None, если очередь оказалась пуста
+
+        Args:
+            meter (Optional[Callable[[object], None]]): обработчик, None - не вызывать
+        """
+        self._meter = meter
+
+    def attach(self, channel):
+        """attach подключает выделенный входящий канал, канал получает политику переполнения очереди
+
+        Args:
+            channel: канал с интерфейсом fill/waitables/set_overflow (например, ShmRingQueue)
+        """
+        if self.overflow is not None:
+            channel.set_overflow(self._overflow_policy, self.overflow, self._slots)
+        self._channels.append(channel)
+
+    def _send(self, obj, count: int, block: bool, timeout: Optional[float]):
+        """ запись в канал с учетом политики переполнения, count - число событий в записи """
+        if self._slots is not None:
+            if self._overflow_policy == OVERFLOW_BLOCK:
+                if not self._slots.acquire(count, block, timeout):
+                    raise Full
+            elif not self._slots.acquire(count, False):
+                if self._overflow_policy == OVERFLOW_REJECT:
+                    self.overflow.add(OverflowCounters.REJECTED, count)
+                    raise QueueRejected(f"очередь переполнена, емкость {self._capacity}")
+                self.overflow.add(OverflowCounters.DROPPED, count)
+                return
+        super().put(obj)
+
+    def _take(self, block: bool = False, timeout: Optional[float] = None):
+        """ запись из основной очереди, занятые ею места освобождаются """
+        item = super().get(block, timeout)
+        if self._slots is not None:
+            self._slots.release(frame_count(item) if isinstance(item, bytes) else 1)
+        return item
+
+    def put(self, obj, block: bool = True, timeout: Optional[float] = None):
+        if isinstance(obj, (Event, ControlEvent)):
+            obj = encode(obj)
+        self._send(obj, 1, block, timeout)
+
+    def put_many(self, events: Iterable[Event], block: bool = True, timeout: Optional[float] = None):
+        """put_many отправляет пачку событий одной записью в канал
+
+        Args:
+            events (Iterable[Event]): события
+            block (bool): ждать освобождения места в очереди
+            timeout (Optional[float]): время ожидания (сек.)
+        """
+        self.put_frames([encode(event) for event in events], block, timeout)
+
+    def put_frames(self, frames: List[bytes], block: bool = True, timeout: Optional[float] = None):
+        """put_frames отправляет готовые кадры без повторного кодирования
+        (так монитор безопасности пересылает события, не распаковывая их параметры)
+
+        Args:
+            frames (List[bytes]): кадры событий (bytes или memoryview)
+            block (bool): ждать освобождения места в очереди
+            timeout (Optional[float]): время ожидания (сек.)
+        """
+        if not frames:
+            return
+        if len(frames) == 1:
+            self._send(bytes(frames[0]), 1, block, timeout)
+        else:
+            self._send(encode_batch(frames), len(frames), block, timeout)
+
+    def _unpack(self, item):
+        """ раскладывает полученную из канала запись в буфер распакованных событий """
+        if isinstance(item, bytes):
+            self._pending.extend(decode_frames(item))
+        else:
+            self._pending.append(item)
+
+    def _fill(self) -> bool:
+        """ без ожидания забирает новые записи из основной очереди и подключенных каналов,
+            возвращает False, если читать было нечего """
+        got = False
+        # читаем все доступное, чтобы старшие события не ждали за младшими в канале
+        while True:
+            try:
+                self._unpack(self._take())
+                got = True
+            except Empty:
+                break
+        for channel in self._channels:
+            got = channel.fill(self._pending) or got
+        if self._trim:
+            self._pending.trim(self._capacity, self._overflow_policy, self.overflow, _event_key)
+        return got
+
+    def get(self, block: bool = True, timeout: Optional[float] = None):
+        if self._meter is None:
+            return self._get(block, timeout)
+        try:
+            item = self._get(block, timeout)
+        except Empty:
+            self._meter(None)
+            raise
+        self._meter(item)
+        return item
+
+    def _get(self, block: bool, timeout: Optional[float]):
+        if self._pending:
+            return self._pending.pop()
+        if not self._channels:
+            self._unpack(self._take(block, timeout))
+            self._fill()
+            return self._pending.pop()
+
+        if self._fill():
+            return self._pending.pop()
+        if not block:
+            raise Empty
+        deadline = None if timeout is None else monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - monotonic())
+            wait(self.waitables(), remaining)
+            if self._fill():
+                return self._pending.pop()
+            if deadline is not None and monotonic() >= deadline:
+                raise Empty
+
+    def get_many(self, max_items: Optional[int] = None) -> List[Event]:
+        """get_many забирает без ожидания все доступные события, но не больше max_items
+
+        Args:
+            max_items (Optional[int]): ограничение на размер пачки, None - без ограничения
+
+        Returns:
+            List[Event]: события, пустой список если очередь пуста
+        """
+        events = []
+        while max_items is None or len(events) < max_items:
+            if not self._pending and not self._fill():
+                break
+            events.append(self._pending.pop())
+        return events
+
+    def get_frames(self, max_items: Optional[int] = None) -> list:
+        """get_frames забирает без ожидания доступные записи в виде кадров, не распаковывая их.
+        Кадры выдаются по полосам приоритета (класс записан в заголовке кадра),
+        не выданные сверх max_items остаются в буфере до следующего вызова
+
+        Args:
+            max_items (Optional[int]): ограничение на число кадров, None - без ограничения
+
+        Returns:
+            list: кадры событий (bytes или memoryview), пустой список если очередь пуста
+        """
+        pending = self._pending_frames
+        # события, уже распакованные вызовом get, кодируются обратно
+        while self._pending:
+            item = self._pending.pop()
+            if isinstance(item, (Event, ControlEvent)):
+                pending.push(encode(item), item_priority(item))
+        while True:
+            try:
+                item = self._take()
+            except Empty:
+                break
+            if not isinstance(item, bytes):
+                # запись неизвестного формата, пропускаем
+                continue
+            if item[0] == FRAME_BATCH:
+                pending.extend(split_batch(item), frame_priority)
+            else:
+                pending.push(item, frame_priority(item))
+        for channel in self._channels:
+            frames = []
+            channel.fill_frames(frames)
+            pending.extend(frames, frame_priority)
+        if self._trim:
+            pending.trim(self._capacity, self._overflow_policy, self.overflow, _frame_key)
+        count = len(pending) if max_items is None else min(max_items, len(pending))
+        return [pending.pop() for _ in range(count)]
+
+    def depth(self) -> int:
+        """ число ожидающих записей основной очереди (пачка считается одной записью)
+            вместе с уже распакованными событиями """
+        try:
+            return len(self._pending) + len(self._pending_frames) + self.qsize()
+        except NotImplementedError:
+            # qsize недоступен на некоторых платформах
+            return len(self._pending) + len(self._pending_frames)
+
+    def overflow_stats(self) -> dict:
+        """ счетчики переполнения: отброшенные, объединенные и отклоненные события """
+        return {} if self.overflow is None else self.overflow.snapshot()
+
+    def channel_backlog(self) -> int:
+        """ объем непрочитанных данных в подключенных каналах (байт) """
+        return sum(channel.backlog() for channel in self._channels)
+
+    def buffered(self) -> bool:
+        """ есть ли уже распакованные события, которые не требуют чтения из канала """
+        return bool(self._pending) or bool(self._pending_frames)
+
+    def empty(self) -> bool:
+        return (not self._pending and not self._pending_frames and super().empty()
+                and all(channel.empty() for channel in self._channels))
+
+    def waitables(self) -> list:
+        """ объекты для multiprocessing.connection.wait, готовые к чтению при новых событиях """
+        waitables = [self._reader]
+        for channel in self._channels:
+            waitables.extend(channel.waitables())
+        return waitables
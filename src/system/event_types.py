@@ -1,9 +1,12 @@
 """ типы данных для информационных и управляющих сообщений """
-from dataclasses import dataclass
-from typing import Any, Optional
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import Any, List, Optional, Tuple
 
+from src.system.tracing import current_trace_id, current_hops
 
-@dataclass
+
+@dataclass(slots=True)
 class Event:
     """ формат событий для обработки """
     source: str       # отправитель
@@ -14,9 +17,29 @@ class Event:
     extra_parameters: Any = None      # доп. параметры
     signature: Optional[str] = None   # цифровая подпись или аналог\
                                       # для проверки целостности и аутентичности сообщения
+    timestamp: float = field(default_factory=monotonic)  # время создания события (time.monotonic),\
+                                      # часы общие для всех процессов, по нему считаются задержки
+    trace_id: Optional[int] = field(default_factory=current_trace_id)  # номер трассы запроса,\
+                                      # наследуется от обрабатываемого события (см. tracing.py)
+    hops: Optional[List[Tuple[str, float]]] = field(default_factory=current_hops)  # переходы трассы:\
+                                      # (этап, time.monotonic())
+    priority: Optional[int] = None    # класс приоритета PRIORITY_*, None - по операции\
+                                      # (см. priority.py)
+    correlation_id: Optional[int] = None  # номер запроса, в ответ переносится явно\
+                                      # (BaseCustomProcess._reply, см. correlation.py)
+
+
+@dataclass(slots=True)
+class ServiceRecord:
+    """ служебная запись для сборщиков метрик и трасс. Не событие: передается
+        по служебной очереди напрямую, минуя монитор безопасности, и не может
+        быть командой компоненту (см. queues_dir.py) """
+    source: str     # компонент-отправитель
+    operation: str  # вид записи: 'metrics' или 'trace'
+    payload: Any    # снимок метрик или путь трассы
 
 
-@dataclass
+@dataclass(slots=True)
 class ControlEvent:
     """ формат управляющих команд для сущностей (например, для остановки работы) """
     operation: str  # код операции
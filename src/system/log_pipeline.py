@@ -0,0 +1,212 @@
+""" модуль журналирования: буфер сообщений в каждом процессе и отдельный процесс записи
+
+    Компоненты пишут журнал через _log_message (LoggingMixin). Сообщение, не прошедшее
+    по уровню критичности, не форматируется вовсе: аргументы передаются отдельно
+    от шаблона, в стиле "получен запрос %s", event. Прошедшие сообщения копятся
+    в буфере процесса и уходят процессу записи LogWriter одной записью очереди -
+    когда процесс собирается ждать новых событий или буфер заполнился.
+    LogWriter выводит журнал на консоль и в файл JSONL с ротацией по размеру.
+"""
+import json
+import multiprocessing
+import os
+import sys
+from datetime import datetime
+from multiprocessing import Process
+from multiprocessing.queues import Queue
+from multiprocessing.util import Finalize
+from time import time
+from typing import Optional
+
+from src.system.config import CRITICALITY_STR, DEFAULT_LOG_LEVEL, LOG_ERROR
+
+
+# размер буфера процесса, при котором он отправляется, не дожидаясь простоя
+LOG_FLUSH_SIZE = 256
+
+
+def format_console(criticality: int, prefix: str, message: str) -> str:
+    """ строка журнала для консоли """
+    return f"[{CRITICALITY_STR[criticality]}]{prefix} {message}"
+
+
+class LogQueue(Queue):
+    """ очередь записей журнала с буфером на стороне отправителя.
+        Буфер свой в каждом процессе, при завершении процесса
+        остаток буфера отправляется автоматически """
+
+    def __init__(self):
+        super().__init__(0, ctx=multiprocessing.get_context())
+
+    def _reset(self, after_fork=False):
+        super()._reset(after_fork)
+        self._records = []
+        self._finalizer = None
+        # процесс записи остановлен, сообщения печатаются сразу
+        self.stopped = False
+
+    def emit(self, record: tuple):
+        """emit добавляет запись в буфер процесса
+
+        Args:
+            record (tuple): (время, критичность, префикс, pid, сообщение)
+        """
+        if self._finalizer is None:
+            # выполняется при выходе из процесса раньше остановки потока очереди
+            self._finalizer = Finalize(self, self.flush, exitpriority=20)
+        self._records.append(record)
+        if len(self._records) >= LOG_FLUSH_SIZE:
+            self.flush()
+
+    def flush(self):
+        """ отправка буфера процесса одной записью очереди """
+        if self._records:
+            records, self._records = self._records, []
+            self.put(records)
+
+
+class LoggingMixin:
+    """ общий для компонентов метод журналирования _log_message """
+    log_prefix = ""
+    log_level = DEFAULT_LOG_LEVEL
+
+    def _log_queue(self) -> Optional[LogQueue]:
+        """ очередь процесса записи журнала, None - печатать сразу на консоль """
+        return None
+
+    def _log_message(self, criticality: int, message: str, *args):
+        """_log_message записывает в журнал сообщение заданного уровня критичности.
+        Сообщение форматируется, только если проходит по уровню
+
+        Args:
+            criticality (int): уровень критичности
+            message (str): текст сообщения или шаблон в стиле %
+            args: аргументы шаблона
+        """
+        if criticality > self.log_level:
+            return
+        if args:
+            message = message % args
+        log_queue = self._log_queue()
+        if log_queue is None or log_queue.stopped:
+            print(format_console(criticality, self.log_prefix, message))
+        else:
+            log_queue.emit((time(), criticality, self.log_prefix, os.getpid(), message))
+            if criticality <= LOG_ERROR:
+                # ошибки не ждут заполнения буфера или простоя процесса
+                log_queue.flush()
+
+    def _flush_log(self):
+        """ отправка накопленных в процессе сообщений процессу записи журнала """
+        log_queue = self._log_queue()
+        if log_queue is not None:
+            log_queue.flush()
+
+
+class JsonlSink:
+    """ файл журнала в формате JSON Lines с ротацией по размеру:
+        при превышении max_bytes файл переименовывается в path.1,
+        предыдущие копии сдвигаются, хранится не больше backup_count копий """
+
+    def __init__(self, path: str, max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5):
+        self._path = path
+        self._max_bytes = max_bytes
+        self._backup_count = backup_count
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _rotate(self):
+        self._file.close()
+        for idx in range(self._backup_count - 1, 0, -1):
+            older = f"{self._path}.{idx}"
+            if os.path.exists(older):
+                os.replace(older, f"{self._path}.{idx + 1}")
+        if self._backup_count > 0:
+            os.replace(self._path, f"{self._path}.1")
+        else:
+            os.remove(self._path)
+        self._file = open(self._path, 'a', encoding='utf-8')
+
+    def write(self, records: list):
+        lines = []
+        for timestamp, criticality, prefix, pid, message in records:
+            lines.append(json.dumps({
+                "time": datetime.fromtimestamp(timestamp).isoformat(timespec='microseconds'),
+                "level": CRITICALITY_STR[criticality],
+                "component": prefix,
+                "pid": pid,
+                "message": message,
+            }, ensure_ascii=False))
+        self._file.write('\n'.join(lines) + '\n')
+        self._file.flush()
+        if self._file.tell() >= self._max_bytes:
+            self._rotate()
+
+    def close(self):
+        self._file.close()
+
+
+class LogWriter(Process):
+    """ процесс записи журнала: принимает пачки записей от всех процессов системы
+        и выводит их на консоль и (если задан путь) в файл JSONL """
+
+    def __init__(
+        self,
+        queues_dir,
+        path: Optional[str] = None,
+        console: bool = True,
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 5,
+    ):
+        """
+        Args:
+            queues_dir (QueuesDirectory): каталог очередей, через него компоненты
+                находят очередь журнала
+            path (Optional[str]): файл журнала JSONL, None - без записи в файл
+            console (bool): выводить журнал на консоль
+            max_bytes (int): размер файла, после которого выполняется ротация (байт)
+            backup_count (int): число хранимых копий файла
+        """
+        super().__init__()
+        self._log_q = LogQueue()
+        self._path = path
+        self._console = console
+        self._max_bytes = max_bytes
+        self._backup_count = backup_count
+        queues_dir.register_log_queue(self._log_q)
+
+    @property
+    def queue(self) -> LogQueue:
+        return self._log_q
+
+    def _write(self, records: list, sink: Optional[JsonlSink]):
+        if self._console:
+            sys.stdout.write(''.join(
+                format_console(criticality, prefix, message) + '\n'
+                for _, criticality, prefix, _, message in records))
+            sys.stdout.flush()
+        if sink is not None:
+            sink.write(records)
+
+    def run(self):
+        sink = None
+        if self._path is not None:
+            sink = JsonlSink(self._path, self._max_bytes, self._backup_count)
+        try:
+            while True:
+                records = self._log_q.get()
+                if records is None:
+                    # команда остановки, к этому моменту все процессы уже отправили буферы
+                    break
+                self._write(records, sink)
+        finally:
+            if sink is not None:
+                sink.close()
+
+    def stop(self):
+        # буфер текущего процесса отправляется раньше команды остановки
+        self._log_q.flush()
+        self._log_q.put(None)
+        self._log_q.stopped = True
@@ -0,0 +1,175 @@
+""" модуль сбора статистики работы компонентов """
+from bisect import bisect_left
+from time import monotonic, perf_counter
+from typing import Dict, List, Optional
+
+
+# границы корзин гистограммы задержек (сек.): геометрическая сетка от 1 мкс до ~100 с,
+# шаг 25% - точность оценки перцентилей не хуже четверти значения
+_LATENCY_BUCKETS: List[float] = []
+_bound = 1e-6
+while _bound < 100.0:
+    _LATENCY_BUCKETS.append(_bound)
+    _bound *= 1.25
+del _bound
+
+
+class LatencyStats:
+    """ накопитель статистики задержек: количество, среднее, максимум и перцентили.
+        Отдельные замеры не хранятся, только счетчики корзин гистограммы """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._buckets = [0] * (len(_LATENCY_BUCKETS) + 1)
+
+    def add(self, value: float):
+        """add учитывает один замер
+
+        Args:
+            value (float): задержка (сек.)
+        """
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+        self._buckets[bisect_left(_LATENCY_BUCKETS, value)] += 1
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """percentile оценка перцентиля по гистограмме
+
+        Args:
+            q (float): уровень перцентиля от 0 до 100
+
+        Returns:
+            float: верхняя граница корзины, в которую попал перцентиль (сек.)
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q / 100 * self.count
+        accumulated = 0
+        for idx, bucket_count in enumerate(self._buckets):
+            accumulated += bucket_count
+            if accumulated >= rank and bucket_count:
+                if idx < len(_LATENCY_BUCKETS):
+                    return min(_LATENCY_BUCKETS[idx], self.max)
+                return self.max
+        return self.max
+
+    def __str__(self) -> str:
+        return (f"n={self.count} "
+                f"avg={self.mean * 1000:.3f} мс "
+                f"p50={self.percentile(50) * 1000:.3f} мс "
+                f"p99={self.percentile(99) * 1000:.3f} мс "
+                f"max={self.max * 1000:.3f} мс")
+
+
+class ComponentMetrics:
+    """ счетчики работы одного компонента: принятые и обработанные события
+        по операциям, время обработки, число итераций цикла.
+
+        Обработка события считается законченной, когда компонент берет
+        из очереди следующее событие или переходит к ожиданию, поэтому
+        код обработчиков компонентов не меняется """
+
+    def __init__(self):
+        self.received: Dict[str, int] = {}
+        self.handler_time: Dict[str, LatencyStats] = {}
+        # события операций, для которых у компонента нет обработчика
+        self.unknown: Dict[str, int] = {}
+        self.loops = 0
+        self._started = monotonic()
+        self._current: Optional[str] = None
+        self._current_start = 0.0
+        self._last_snapshot = self._started
+        self._last_loops = 0
+
+    def begin(self, operation: str):
+        """begin начало обработки события (предыдущее считается обработанным)
+
+        Args:
+            operation (str): операция события
+        """
+        now = perf_counter()
+        if self._current is not None:
+            self._account(now)
+        self.received[operation] = self.received.get(operation, 0) + 1
+        self._current = operation
+        self._current_start = now
+
+    def end(self):
+        """ окончание обработки текущего события """
+        if self._current is not None:
+            self._account(perf_counter())
+
+    def _account(self, now: float):
+        stats = self.handler_time.get(self._current)
+        if stats is None:
+            stats = self.handler_time[self._current] = LatencyStats()
+        stats.add(now - self._current_start)
+        self._current = None
+
+    def on_get(self, item):
+        """on_get обработчик выдачи из очереди событий: item - выданное событие,
+        None - очередь пуста
+
+        Args:
+            item: событие или None
+        """
+        if item is None:
+            self.end()
+        else:
+            self.begin(getattr(item, 'operation', type(item).__name__))
+
+    def unknown_operation(self, operation: str):
+        """ учет события с операцией, для которой у компонента нет обработчика """
+        self.unknown[operation] = self.unknown.get(operation, 0) + 1
+
+    def loop(self):
+        """ учет одной итерации цикла компонента """
+        self.loops += 1
+
+    def snapshot(self, queue_depth: int = 0, channel_bytes: int = 0,
+                 overflow: Optional[dict] = None, schedules: Optional[dict] = None) -> dict:
+        """snapshot текущее состояние счетчиков для отправки сборщику метрик
+
+        Args:
+            queue_depth (int): число ожидающих записей в очереди событий
+            channel_bytes (int): объем непрочитанных данных выделенных каналов (байт)
+            overflow (Optional[dict]): счетчики переполнения очереди событий
+            schedules (Optional[dict]): статистика именованных таймеров (FixedRateSchedule.stats)
+
+        Returns:
+            dict: метрики компонента
+        """
+        now = monotonic()
+        elapsed = now - self._last_snapshot
+        loops_per_sec = (self.loops - self._last_loops) / elapsed if elapsed > 0 else 0.0
+        self._last_snapshot = now
+        self._last_loops = self.loops
+        operations = {}
+        for operation, received in self.received.items():
+            stats = self.handler_time.get(operation) or LatencyStats()
+            operations[operation] = {
+                "received": received,
+                "handled": stats.count,
+                "avg_ms": stats.mean * 1000,
+                "p99_ms": stats.percentile(99) * 1000,
+                "max_ms": stats.max * 1000,
+            }
+        return {
+            "uptime_sec": now - self._started,
+            "loops": self.loops,
+            "loops_per_sec": loops_per_sec,
+            "queue_depth": queue_depth,
+            "channel_bytes": channel_bytes,
+            "overflow": overflow or {},
+            "operations": operations,
+            "unknown_operations": dict(self.unknown),
+            "schedules": schedules or {},
+        }
@@ -0,0 +1,113 @@
+""" модуль сборщика метрик компонентов """
+import json
+import os
+from queue import Empty
+from time import time
+from typing import Optional
+
+from src.system.custom_process import BaseCustomProcess
+from src.system.queues_dir import QueuesDirectory
+from src.system.event_types import ServiceRecord
+from src.system.config import DEFAULT_LOG_LEVEL, LOG_ERROR, LOG_INFO, METRICS_QUEUE_NAME
+
+
+class MetricsCollector(BaseCustomProcess):
+    """ сборщик метрик: принимает периодические записи 'metrics' от компонентов
+        (см. BaseCustomProcess._publish_metrics), хранит последний снимок каждого
+        компонента, периодически выводит сводку в журнал и, если задан путь,
+        дописывает снимки в файл JSON Lines.
+
+        Очередь сборщика служебная: записи ServiceRecord идут в нее напрямую,
+        минуя монитор безопасности (см. queues_dir.py) """
+    log_prefix = "[METRICS]"
+    event_source_name = METRICS_QUEUE_NAME
+    events_q_name = event_source_name
+    service_queue = True
+
+    def __init__(
+        self,
+        queues_dir: QueuesDirectory,
+        path: Optional[str] = None,
+        report_interval_sec: float = 10.0,
+        log_level: int = DEFAULT_LOG_LEVEL,
+    ):
+        """
+        Args:
+            queues_dir (QueuesDirectory): каталог очередей
+            path (Optional[str]): файл снимков метрик (JSON Lines), None - без записи в файл
+            report_interval_sec (float): период вывода сводки в журнал (сек.)
+            log_level (int): уровень логирования
+        """
+        super().__init__(
+            log_prefix=MetricsCollector.log_prefix,
+            queues_dir=queues_dir,
+            events_q_name=MetricsCollector.events_q_name,
+            event_source_name=MetricsCollector.event_source_name,
+            log_level=log_level)
+        self._path = path
+        self._report_interval_sec = report_interval_sec
+        self._file = None
+        # последний снимок метрик каждого компонента
+        self.latest = {}
+
+        self._log_message(LOG_INFO, "создан сборщик метрик")
+
+    def _check_events_q(self):
+        """ Метод проверяет наличие сообщений для данного компонента системы """
+        while True:
+            try:
+                record: ServiceRecord = self._events_q.get_nowait()
+                if not isinstance(record, ServiceRecord) or record.operation != 'metrics':
+                    continue
+                self.latest[record.source] = record.payload
+                if self._file is not None:
+                    self._file.write(json.dumps(
+                        {"time": time(), "component": record.source, **record.payload},
+                        ensure_ascii=False) + '\n')
+            except Empty:
+                break
+        if self._file is not None:
+            self._file.flush()
+
+    def _report(self):
+        """ вывод сводки последних метрик компонентов """
+        for component, snapshot in sorted(self.latest.items()):
+            operations = ", ".join(
+                f"{operation}: {stats['handled']}/{stats['received']} "
+                f"avg={stats['avg_ms']:.3f} p99={stats['p99_ms']:.3f} мс"
+                for operation, stats in snapshot["operations"].items())
+            self._log_message(
+                LOG_INFO, "%s: %.1f итераций/с, очередь %s, каналы %s байт; %s",
+                component, snapshot["loops_per_sec"], snapshot["queue_depth"],
+                snapshot["channel_bytes"], operations or "событий нет")
+            unknown = snapshot.get("unknown_operations")
+            if unknown:
+                self._log_message(LOG_INFO, "%s: события без обработчика %s", component, unknown)
+            for name, schedule in snapshot.get("schedules", {}).items():
+                self._log_message(
+                    LOG_INFO, "%s: таймер %s, период %.1f мс, срабатываний %s, пропущено %s, "
+                    "опоздание p50=%.3f p99=%.3f max=%.3f мс",
+                    component, name, schedule["interval_ms"], schedule["ticks"], schedule["skipped"],
+                    schedule["jitter_p50_ms"], schedule["jitter_p99_ms"], schedule["jitter_max_ms"])
+
+    def run(self):
+        self._log_message(LOG_INFO, "сборщик метрик активен")
+        if self._path is not None:
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self._path, 'a', encoding='utf-8')
+        self._add_timer(self._report_interval_sec, self._report)
+
+        try:
+            while self._quit is False:
+                try:
+                    self._wait_events()
+                    self._check_events_q()
+                    self._check_control_q()
+                except Exception as e:
+                    self._log_message(LOG_ERROR, "ошибка сборщика метрик: %s", e)
+            self._report()
+        finally:
+            if self._file is not None:
+                self._file.close()
@@ -0,0 +1,133 @@
+""" модуль группы экземпляров монитора безопасности """
+import os
+from time import monotonic
+from typing import Callable, Dict, Iterable, List, Optional
+from zlib import crc32
+
+from src.system.config import DEFAULT_LOG_LEVEL, LOG_INFO, SECURITY_MONITOR_QUEUE_NAME
+from src.system.event_types import Event
+from src.system.log_pipeline import LoggingMixin, LogQueue
+from src.system.queues_dir import QueuesDirectory
+from src.system.security_monitor import BaseSecurityMonitor
+from src.system.wire_format import decode_header
+
+
+def capture_shard_path(path: str, shard: int) -> str:
+    """ файл записи экземпляра группы: номер экземпляра перед расширением """
+    root, ext = os.path.splitext(path)
+    return f"{root}.{shard}{ext}"
+
+
+class ShardedQueue:
+    """ очередь-маршрутизатор монитора безопасности.
+        Регистрируется в каталоге под именем SECURITY_MONITOR_QUEUE_NAME,
+        отправители пишут в нее как раньше, а событие попадает в очередь
+        экземпляра монитора, отвечающего за получателя события.
+        Все события одному получателю проходят через один экземпляр,
+        поэтому порядок их доставки сохраняется """
+
+    def __init__(self, shard_queues: List, assignment: Optional[Dict[str, int]] = None):
+        self._shard_queues = shard_queues
+        # закрепление получателей за экземплярами, остальные распределяются по хешу имени
+        self._assignment = dict(assignment or {})
+
+    def shard_of(self, destination: str) -> int:
+        """ номер экземпляра монитора, отвечающего за получателя """
+        shard = self._assignment.get(destination)
+        if shard is None:
+            shard = crc32(str(destination).encode('utf-8')) % len(self._shard_queues)
+            self._assignment[destination] = shard
+        return shard
+
+    def put(self, event: Event, block: bool = True, timeout: Optional[float] = None):
+        self._shard_queues[self.shard_of(event.destination)].put(event, block, timeout)
+
+    def put_nowait(self, event: Event):
+        self.put(event, False)
+
+    def put_many(self, events: Iterable[Event], block: bool = True, timeout: Optional[float] = None):
+        """put_many раскладывает пачку по экземплярам, каждому - одной записью """
+        batches = {}
+        for event in events:
+            batches.setdefault(self.shard_of(event.destination), []).append(event)
+        for shard, batch in batches.items():
+            self._shard_queues[shard].put_many(batch, block, timeout)
+
+    def put_frames(self, frames: list, block: bool = True, timeout: Optional[float] = None):
+        """put_frames раскладывает готовые кадры по экземплярам по получателю из заголовка """
+        batches = {}
+        for frame in frames:
+            destination = decode_header(frame)[1]
+            batches.setdefault(self.shard_of(destination), []).append(frame)
+        for shard, batch in batches.items():
+            self._shard_queues[shard].put_frames(batch, block, timeout)
+
+
+class SecurityMonitorGroup(LoggingMixin):
+    """ группа процессов монитора безопасности, разделенных по получателям событий.
+        Для контейнера компонентов выглядит как один компонент: start, stop и join
+        применяются ко всем экземплярам сразу """
+
+    def __init__(
+        self,
+        queues_dir: QueuesDirectory,
+        shards: int,
+        monitor_factory: Callable[[int], BaseSecurityMonitor],
+        destinations: Iterable[str] = (),
+        log_level: int = DEFAULT_LOG_LEVEL,
+    ):
+        """
+        Args:
+            queues_dir (QueuesDirectory): каталог очередей
+            shards (int): число экземпляров монитора
+            monitor_factory (Callable[[int], BaseSecurityMonitor]): создает экземпляр
+                монитора с заданным номером (передается в параметр shard монитора)
+            destinations (Iterable[str]): известные получатели, они закрепляются
+                за экземплярами по кругу для равномерной нагрузки
+            log_level (int): уровень логирования группы
+        """
+        self.log_prefix = "[SECURITY_GROUP]"
+        self.log_level = log_level
+        self._queues_dir = queues_dir
+        self._monitors = [monitor_factory(shard) for shard in range(shards)]
+        assignment = {destination: idx % shards for idx, destination in enumerate(destinations)}
+        self._queue = ShardedQueue([monitor._events_q for monitor in self._monitors], assignment)
+        queues_dir.register(queue=self._queue, name=SECURITY_MONITOR_QUEUE_NAME)
+        self._log_message(LOG_INFO, "создана группа мониторов безопасности из %s экземпляров", shards)
+
+    def _log_queue(self) -> Optional[LogQueue]:
+        return self._queues_dir.log_queue
+
+    @property
+    def monitors(self) -> List[BaseSecurityMonitor]:
+        return self._monitors
+
+    def capture_to(self, path: Optional[str]):
+        """capture_to включает запись проверенных событий, у каждого экземпляра свой файл:
+        к имени добавляется номер экземпляра (записи читаются вместе, см. read_captures)
+
+        Args:
+            path (Optional[str]): файл записи, None - без записи
+        """
+        for shard, monitor in enumerate(self._monitors):
+            monitor.capture_to(None if path is None else capture_shard_path(path, shard))
+
+    def start(self):
+        for monitor in self._monitors:
+            monitor.start()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else monotonic() + timeout
+        for monitor in self._monitors:
+            remaining = None if deadline is None else max(0.0, deadline - monotonic())
+            if not monitor.wait_ready(remaining):
+                return False
+        return True
+
+    def stop(self):
+        for monitor in self._monitors:
+            monitor.stop()
+
+    def join(self, timeout: Optional[float] = None):
+        for monitor in self._monitors:
+            monitor.join(timeout)
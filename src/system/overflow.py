@@ -0,0 +1,135 @@
+""" модуль политик переполнения очередей с ограниченной емкостью
+
+    Политики block, drop_newest и reject выполняются на стороне отправителя:
+    когда в очереди нет места, отправитель ждет, отбрасывает событие или
+    получает исключение QueueRejected. Место считается в событиях (EventSlots):
+    пачка занимает по месту на каждое свое событие, места общие для основной
+    очереди и подключенных к ней выделенных каналов.
+    Политики drop_oldest и coalesce выполняются на стороне получателя: отправитель
+    не ждет, а получатель при каждом чтении забирает из канала все доступное
+    и сокращает свой буфер до емкости очереди, отбрасывая самые старые события
+    или оставляя по одному (последнему) событию на ключ (отправитель, операция).
+    Если заполнен сам буфер выделенного канала в разделяемой памяти (его размер
+    задан в байтах), новые события отбрасываются.
+    Счетчики отброшенных, объединенных и отклоненных событий общие для всех
+    процессов (разделяемая память).
+"""
+import multiprocessing
+from queue import Full
+from time import monotonic
+from typing import Callable, Hashable, Optional
+
+from src.system.config import OVERFLOW_COALESCE
+
+
+class QueueRejected(Full):
+    """ очередь получателя переполнена, событие отклонено (политика reject) """
+
+
+class OverflowCounters:
+    """ счетчики событий, не доставленных из-за переполнения очереди """
+    DROPPED = 0
+    COALESCED = 1
+    REJECTED = 2
+
+    def __init__(self):
+        self._values = multiprocessing.Array('q', 3)
+
+    def add(self, index: int, count: int = 1):
+        with self._values.get_lock():
+            self._values[index] += count
+
+    def snapshot(self) -> dict:
+        with self._values.get_lock():
+            dropped, coalesced, rejected = self._values[:]
+        return {"dropped": dropped, "coalesced": coalesced, "rejected": rejected}
+
+
+class EventSlots:
+    """ места очереди с ограниченной емкостью, общие для всех процессов: отправитель
+        занимает место на каждое событие записи, получатель освобождает места,
+        когда забирает запись из канала. Пачка занимает места целиком или не
+        занимает вовсе, поэтому одновременные отправители не делят остаток мест """
+
+    def __init__(self, capacity: int):
+        self._capacity = capacity
+        self._used = multiprocessing.Value('q', 0, lock=False)
+        self._changed = multiprocessing.Condition()
+
+    def acquire(self, count: int, block: bool = True, timeout: Optional[float] = None) -> bool:
+        """acquire занимает места для count событий (пачка больше емкости занимает всю очередь)
+
+        Args:
+            count (int): число событий
+            block (bool): ждать освобождения мест
+            timeout (Optional[float]): время ожидания (сек.), None - без ограничения
+
+        Returns:
+            bool: места заняты
+        """
+        count = min(count, self._capacity)
+        deadline = None if timeout is None or not block else monotonic() + timeout
+        if not self._changed.acquire(block, timeout if block else None):
+            return False
+        try:
+            # ожидание условия отпускает блокировку, отправители и получатели
+            # держат ее только на время изменения счетчика
+            if block:
+                remaining = None if deadline is None else max(0.0, deadline - monotonic())
+                free = self._changed.wait_for(
+                    lambda: self._used.value + count <= self._capacity, remaining)
+            else:
+                free = self._used.value + count <= self._capacity
+            if free:
+                self._used.value += count
+            return free
+        finally:
+            self._changed.release()
+
+    def release(self, *counts: int):
+        """ освобождение мест событий, забранных получателем: по числу событий
+            на каждую забранную запись """
+        with self._changed:
+            self._used.value -= sum(min(count, self._capacity) for count in counts)
+            self._changed.notify_all()
+
+
+def trim_pending(pending, capacity: int, policy: str, counters: OverflowCounters,
+                 key: Callable[[object], Optional[Hashable]]):
+    """trim_pending сокращает буфер получателя до емкости по политике drop_oldest или coalesce
+
+    Args:
+        pending (deque | list): буфер получателя, изменяется на месте
+        capacity (int): емкость очереди
+        policy (str): OVERFLOW_DROP_OLDEST или OVERFLOW_COALESCE
+        counters (OverflowCounters): счетчики переполнения
+        key (Callable[[object], Optional[Hashable]]): ключ объединения элемента буфера,
+            None - элемент не объединяется
+    """
+    if len(pending) <= capacity:
+        return
+    if policy == OVERFLOW_COALESCE:
+        # от каждого ключа остается последнее событие, на месте последнего вхождения
+        kept = []
+        seen = set()
+        for item in reversed(pending):
+            item_key = key(item)
+            if item_key is not None:
+                if item_key in seen:
+                    continue
+                seen.add(item_key)
+            kept.append(item)
+        kept.reverse()
+        coalesced = len(pending) - len(kept)
+        if coalesced:
+            counters.add(OverflowCounters.COALESCED, coalesced)
+            pending.clear()
+            pending.extend(kept)
+    excess = len(pending) - capacity
+    if excess > 0:
+        if isinstance(pending, list):
+            del pending[:excess]
+        else:
+            for _ in range(excess):
+                pending.popleft()
+        counters.add(OverflowCounters.DROPPED, excess)
@@ -0,0 +1,82 @@
+""" модуль скомпилированного индекса политик безопасности """
+from typing import Dict, Iterable, Set
+
+from src.system.security_policy_type import SecurityPolicy, POLICY_WILDCARD
+
+
+class _AllOperations:
+    """ множество, содержащее любую операцию """
+
+    def __contains__(self, operation) -> bool:
+        return True
+
+    def __repr__(self) -> str:
+        return POLICY_WILDCARD
+
+
+_ALL_OPERATIONS = _AllOperations()
+_NO_OPERATIONS = frozenset()
+
+
+class PolicyIndex:
+    """ индекс политик безопасности, построенный один раз при запуске.
+
+        Политики раскладываются во вложенные словари
+        отправитель -> получатель -> множество разрешенных операций.
+        Правила с подстановкой (POLICY_WILDCARD) заранее объединяются с правилами
+        для конкретных имен, поэтому решение - это два поиска в словаре и одна
+        проверка принадлежности множеству, без перебора политик и без создания
+        объектов на каждое событие """
+
+    def __init__(self, policies: Iterable[SecurityPolicy]):
+        self.policies = list(policies)
+        self._index: Dict[str, Dict[str, object]] = {}
+        self._compile()
+
+    def _compile(self):
+        # исходные правила: (отправитель, получатель) -> операции
+        rules: Dict[tuple, Set[str]] = {}
+        for policy in self.policies:
+            rules.setdefault((policy.source, policy.destination), set()).add(policy.operation)
+
+        sources = {source for source, _ in rules} | {POLICY_WILDCARD}
+        for source in sources:
+            source_keys = {source, POLICY_WILDCARD}
+            destinations = {dst for src, dst in rules if src in source_keys} | {POLICY_WILDCARD}
+            by_destination = {}
+            for destination in destinations:
+                operations = set()
+                for key in ((src, dst) for src in source_keys for dst in {destination, POLICY_WILDCARD}):
+                    operations |= rules.get(key, set())
+                by_destination[destination] = self._freeze(operations)
+            self._index[source] = by_destination
+
+    @staticmethod
+    def _freeze(operations: Set[str]):
+        if POLICY_WILDCARD in operations:
+            return _ALL_OPERATIONS
+        if not operations:
+            return _NO_OPERATIONS
+        return frozenset(operations)
+
+    def allows(self, source: str, destination: str, operation: str) -> bool:
+        """allows проверка, разрешена ли операция политиками
+
+        Args:
+            source (str): отправитель
+            destination (str): получатель
+            operation (str): операция
+
+        Returns:
+            bool: True, если хотя бы одна политика разрешает событие
+        """
+        by_destination = self._index.get(source)
+        if by_destination is None:
+            by_destination = self._index[POLICY_WILDCARD]
+        operations = by_destination.get(destination)
+        if operations is None:
+            operations = by_destination[POLICY_WILDCARD]
+        return operation in operations
+
+    def __len__(self) -> int:
+        return len(self.policies)
@@ -0,0 +1,130 @@
+""" модуль приоритетных полос очереди событий
+
+    Каждое событие относится к классу приоритета (Event.priority, по умолчанию
+    определяется операцией по таблице OPERATION_PRIORITIES). Получатель раскладывает
+    прочитанные из канала события по полосам своего класса и выдает их начиная
+    со старшей полосы, поэтому команда не ждет обработки накопившейся телеметрии.
+    Чтобы младшие полосы не простаивали при постоянном потоке старших, полоса,
+    которую обошли PRIORITY_STARVATION_LIMIT раз подряд, выдает одно событие вне очереди.
+"""
+from collections import deque
+from typing import Callable, Hashable, Optional
+
+from src.system.event_types import Event
+from src.system.overflow import OverflowCounters, trim_pending
+from src.system.config import PRIORITY_COMMAND, PRIORITY_LANES, PRIORITY_NORMAL, \
+    PRIORITY_STARVATION_LIMIT, PRIORITY_TELEMETRY
+
+# класс приоритета операции, операции не из таблицы - PRIORITY_NORMAL
+OPERATION_PRIORITIES = {
+    # команды управления
+    'ORBIT': PRIORITY_COMMAND,
+    'ADD ZONE': PRIORITY_COMMAND,
+    'REMOVE ZONE': PRIORITY_COMMAND,
+    'MAKE PHOTO': PRIORITY_COMMAND,
+    'change_orbit': PRIORITY_COMMAND,
+    'check_orbit': PRIORITY_COMMAND,
+    'add_zone': PRIORITY_COMMAND,
+    'delete_zone': PRIORITY_COMMAND,
+    'rejected': PRIORITY_COMMAND,
+    # телеметрия
+    'update_orbit_data': PRIORITY_TELEMETRY,
+    'camera_update': PRIORITY_TELEMETRY,
+    'post_camera_coords': PRIORITY_TELEMETRY,
+    'send_data': PRIORITY_TELEMETRY,
+    'update_photo_map': PRIORITY_TELEMETRY,
+    'draw_restricted_zone': PRIORITY_TELEMETRY,
+    'metrics': PRIORITY_TELEMETRY,
+    'trace': PRIORITY_TELEMETRY,
+}
+
+
+def event_priority(event: Event) -> int:
+    """ класс приоритета события: заданный явно (классы вне диапазона - крайние,
+        как в PriorityLanes.push) или по операции """
+    if event.priority is not None:
+        return min(max(event.priority, 0), PRIORITY_LANES - 1)
+    return OPERATION_PRIORITIES.get(event.operation, PRIORITY_NORMAL)
+
+
+def item_priority(item) -> int:
+    """ класс приоритета элемента буфера получателя: события или управляющей команды """
+    if isinstance(item, Event):
+        return event_priority(item)
+    return PRIORITY_COMMAND
+
+
+class PriorityLanes:
+    """ буфер получателя из полос по классам приоритета с защитой от голодания """
+
+    def __init__(self, lanes: int = PRIORITY_LANES,
+                 starvation_limit: int = PRIORITY_STARVATION_LIMIT):
+        """
+        Args:
+            lanes (int): число полос
+            starvation_limit (int): сколько раз подряд полосу можно обойти
+        """
+        self._lanes = [deque() for _ in range(lanes)]
+        # сколько раз подряд ожидающую полосу обошли
+        self._skipped = [0] * lanes
+        self._starvation_limit = starvation_limit
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def push(self, item, priority: int):
+        """ добавление элемента в полосу его класса (классы вне диапазона - в крайние полосы) """
+        lane = min(max(priority, 0), len(self._lanes) - 1)
+        self._lanes[lane].append(item)
+        self._size += 1
+
+    def append(self, item):
+        """ добавление элемента в полосу по его классу приоритета """
+        self.push(item, item_priority(item))
+
+    def extend(self, items, priority: Callable[[object], int] = item_priority):
+        """ раскладывает элементы по полосам по их классу приоритета """
+        for item in items:
+            self.push(item, priority(item))
+
+    def pop(self):
+        """pop выдает следующий элемент: из старшей непустой полосы или из младшей,
+        которую обошли starvation_limit раз подряд
+
+        Returns:
+            object: элемент буфера
+
+        Raises:
+            IndexError: буфер пуст
+        """
+        if self._size == 0:
+            raise IndexError("буфер пуст")
+        lanes = self._lanes
+        skipped = self._skipped
+        chosen = None
+        for lane, items in enumerate(lanes):
+            if not items:
+                continue
+            if chosen is None:
+                chosen = lane
+            elif skipped[lane] >= self._starvation_limit:
+                chosen = lane
+                break
+        for lane in range(len(lanes)):
+            if lane == chosen:
+                skipped[lane] = 0
+            elif lanes[lane]:
+                skipped[lane] += 1
+        self._size -= 1
+        return lanes[chosen].popleft()
+
+    def trim(self, capacity: int, policy: str, counters: OverflowCounters,
+             key: Callable[[object], Optional[Hashable]]):
+        """ сокращение каждой полосы до емкости по политике переполнения (см. overflow.py) """
+        for items in self._lanes:
+            trim_pending(items, capacity, policy, counters, key)
+        self._size = sum(len(items) for items in self._lanes)
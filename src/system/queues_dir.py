@@ -1,52 +1,177 @@
-""" модуль каталога очередей сообщений """
-from multiprocessing import Queue
-from typing import Union
+""" модуль каталога очередей сообщений
 
-from src.system.config import CRITICALITY_STR, DEFAULT_LOG_LEVEL, LOG_ERROR, LOG_INFO
+    Очереди компонентов принимают события (Event) только через монитор безопасности.
+    Служебные очереди (register_service_queue) - исключение: в них компоненты
+    напрямую пишут записи ServiceRecord для сборщиков метрик и трасс. Обход монитора
+    здесь допустим, потому что это поток диагностики в одну сторону: сборщик
+    только сохраняет записи и ничего не пересылает, записи не являются событиями
+    и не попадают в обработчики операций, а get_queue служебные очереди не выдает,
+    поэтому ни компонент, ни монитор не могут отправить в них событие.
+"""
+import platform
+from contextlib import contextmanager
+from typing import Optional, Union
 
+from src.system.event_queue import EventQueue
+from src.system.log_pipeline import LoggingMixin, LogQueue
+from src.system.shm_ring import ORDERED_STORES, ShmRingQueue
+from src.system.config import LOG_ERROR, LOG_INFO, OVERFLOW_BLOCK, OVERFLOW_COALESCE, \
+    OVERFLOW_DROP_NEWEST, OVERFLOW_DROP_OLDEST, OVERFLOW_REJECT, TRANSPORT_PIPE, TRANSPORT_SHM
 
-class QueuesDirectory:
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST,
+                     OVERFLOW_COALESCE, OVERFLOW_REJECT)
+
+
+class QueuesDirectory(LoggingMixin):
     """ каталог очередей сообщений """
     log_prefix = "[QUEUES]"
-    log_level = DEFAULT_LOG_LEVEL
 
     def __init__(self):
+        # очередь процесса записи журнала, None - журнал печатается на консоль
+        self.log_queue = None
+
         self._log_message(LOG_INFO, "создан каталог очередей")
 
         # словарь с очередями компонентов
         self.queues = {}
+        # выделенные каналы (отправитель, получатель) -> канал
+        self.channels = {}
+        # имя компонента, которому принадлежит копия каталога в текущем процессе
+        self.owner = None
+        # ограничения очередей: имя -> (емкость, политика переполнения)
+        self.queue_limits = {}
+        # служебные очереди сборщиков метрик и трасс: имя -> очередь
+        self.service_queues = {}
+
+    def _log_queue(self) -> Optional[LogQueue]:
+        return self.log_queue
+
+    def register_log_queue(self, queue: LogQueue):
+        """register_log_queue регистрация очереди процесса записи журнала,
+        выполняется до запуска компонентов
+
+        Args:
+            queue (LogQueue): очередь журнала
+        """
+        self.log_queue = queue
+        self._log_message(LOG_INFO, "журнал передается процессу записи")
 
-    def _log_message(self, criticality: int, message: str):
-        """_log_message печатает сообщение заданного уровня критичности
+    def limit_queue(self, name: str, capacity: int, policy: str = OVERFLOW_BLOCK):
+        """limit_queue задает емкость и политику переполнения очереди компонента,
+        выполняется до создания компонента (очередь создается с этими параметрами)
 
         Args:
-            criticality (int): уровень критичности
-            message (str): текст сообщения
+            name (str): имя очереди
+            capacity (int): емкость очереди (событий, пачка считается по числу событий,
+                в том числе в выделенных каналах к очереди), 0 - без ограничения
+            policy (str): политика переполнения OVERFLOW_*
         """
-        if criticality <= self.log_level:
-            print(f"[{CRITICALITY_STR[criticality]}]{self.log_prefix} {message}")
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"неизвестная политика переполнения {policy}")
+        self.queue_limits[name] = (capacity, policy)
+        self._log_message(LOG_INFO, "очередь %s: емкость %s, при переполнении %s", name, capacity, policy)
 
-    def register(self, queue: Queue, name: str):
+    def queue_limit(self, name: str) -> tuple:
+        """ емкость и политика переполнения очереди, по умолчанию без ограничения """
+        return self.queue_limits.get(name, (0, OVERFLOW_BLOCK))
+
+    def register(self, queue: EventQueue, name: str):
         """register регистрация очереди с заданным именем
 
         Args:
-            queue (Queue): очередь
+            queue (EventQueue): очередь
             name (str): имя
         """
-        self._log_message(LOG_INFO, f"регистрируем очередь {name}")
+        self._log_message(LOG_INFO, "регистрируем очередь %s", name)
         self.queues[name] = queue
 
-    def get_queue(self, name:str) -> Union[Queue, None]:
-        """get_queue выдаёт из каталога очередь с указанным именем
+    def register_service_queue(self, queue: EventQueue, name: str):
+        """register_service_queue регистрация служебной очереди сборщика
+        (записи ServiceRecord от компонентов напрямую, минуя монитор)
+
+        Args:
+            queue (EventQueue): очередь
+            name (str): имя
+        """
+        self._log_message(LOG_INFO, "регистрируем служебную очередь %s", name)
+        self.service_queues[name] = queue
+
+    def get_service_queue(self, name: str) -> Optional[EventQueue]:
+        """ служебная очередь с указанным именем, None - сборщик не зарегистрирован """
+        return self.service_queues.get(name)
+
+    def register_channel(self, source: str, destination: str,
+                         transport: str = TRANSPORT_SHM, capacity: int = 1 << 20):
+        """register_channel создание выделенного канала от одного отправителя к получателю.
+        Отправитель продолжает брать очередь через get_queue(destination), а получатель
+        читает канал вместе со своей очередью, поэтому код компонентов не меняется.
+        Каналы регистрируются до запуска компонентов
+
+        Args:
+            source (str): имя отправителя (единственного пишущего в канал)
+            destination (str): имя очереди получателя
+            transport (str): TRANSPORT_SHM - кольцевой буфер в разделяемой памяти,
+                TRANSPORT_PIPE - общая очередь получателя (выделенный канал не создается)
+            capacity (int): размер буфера канала (байт)
+        """
+        if transport == TRANSPORT_PIPE:
+            return
+        if transport != TRANSPORT_SHM:
+            raise ValueError(f"неизвестный транспорт {transport}")
+        if not ORDERED_STORES:
+            # без строгого порядка записей кольцевой буфер небезопасен (см. shm_ring)
+            self._log_message(
+                LOG_INFO, "канал %s -> %s: архитектура %s без строгого порядка записей, используется %s",
+                source, destination, platform.machine(), TRANSPORT_PIPE)
+            return
+
+        queue = self.queues.get(destination)
+        if queue is None:
+            self._log_message(LOG_ERROR, "канал %s -> %s: очередь получателя не найдена", source, destination)
+            return
+        channel = ShmRingQueue(capacity)
+        queue.attach(channel)
+        self.channels[(source, destination)] = channel
+        self._log_message(LOG_INFO, "регистрируем канал %s -> %s (%s)", source, destination, transport)
+
+    @contextmanager
+    def bound_to(self, owner: str):
+        """bound_to временно назначает владельца каталога,
+        используется при запуске процесса компонента, чтобы копия каталога
+        в дочернем процессе выдавала владельцу его выделенные каналы
+
+        Args:
+            owner (str): имя компонента
+        """
+        previous, self.owner = self.owner, owner
+        try:
+            yield self
+        finally:
+            self.owner = previous
+
+    def get_queue(self, name:str) -> Union[EventQueue, ShmRingQueue, None]:
+        """get_queue выдаёт из каталога очередь с указанным именем,
+        если у владельца каталога есть выделенный канал к этой очереди - выдаётся канал
 
         Args:
             name (str): имя очереди
 
         Returns:
-            Union[Queue, None]: очередь или None если такой очереди нет
+            Union[EventQueue, ShmRingQueue, None]: очередь или None если такой очереди нет
         """
+        if self.owner is not None:
+            channel = self.channels.get((self.owner, name))
+            if channel is not None:
+                return channel
         try:
             return self.queues[name]
         except KeyError as e:
-            self._log_message(LOG_ERROR, f"очередь не найдена {e}")
+            self._log_message(LOG_ERROR, "очередь не найдена %s", e)
             return None
+
+    def close(self):
+        """ освобождение разделяемой памяти выделенных каналов (вызывается создателем каталога) """
+        for (source, destination), channel in self.channels.items():
+            self._log_message(LOG_INFO, "удаляем канал %s -> %s", source, destination)
+            channel.unlink()
+        self.channels.clear()
@@ -0,0 +1,88 @@
+""" модуль периодических срабатываний с постоянной частотой
+
+    Сроки срабатываний лежат на сетке start + k * interval и не зависят от того,
+    сколько длилась обработка: время обработки не сдвигает следующие сроки,
+    поэтому реальный период в среднем равен заданному. Если обработка затянулась
+    и сроки нескольких срабатываний прошли, политика SCHEDULE_CATCH_UP выполняет
+    пропущенные срабатывания подряд (не больше max_catch_up), а SCHEDULE_SKIP
+    отбрасывает их и ждет следующего срока сетки.
+
+    Для каждого расписания копится статистика опоздания срабатываний относительно
+    срока (дрожание) и число отброшенных срабатываний.
+"""
+from time import monotonic
+from typing import Optional
+
+from src.system.config import SCHEDULE_CATCH_UP, SCHEDULE_MAX_CATCH_UP, SCHEDULE_SKIP
+from src.system.metrics import LatencyStats
+
+SCHEDULE_POLICIES = (SCHEDULE_CATCH_UP, SCHEDULE_SKIP)
+
+
+class FixedRateSchedule:
+    """ расписание срабатываний с постоянной частотой: deadline - срок ближайшего,
+        due(now) - сколько раз выполнить обработчик сейчас """
+
+    def __init__(
+        self,
+        interval_sec: float,
+        policy: str = SCHEDULE_SKIP,
+        max_catch_up: int = SCHEDULE_MAX_CATCH_UP,
+        start: Optional[float] = None,
+    ):
+        """
+        Args:
+            interval_sec (float): период срабатываний (сек.)
+            policy (str): SCHEDULE_CATCH_UP или SCHEDULE_SKIP
+            max_catch_up (int): наибольшее число пропущенных срабатываний, выполняемых подряд
+            start (Optional[float]): начало сетки (time.monotonic), None - текущее время
+        """
+        if interval_sec <= 0:
+            raise ValueError(f"период расписания должен быть положительным: {interval_sec}")
+        if policy not in SCHEDULE_POLICIES:
+            raise ValueError(f"неизвестная политика расписания {policy}")
+        self.interval_sec = interval_sec
+        self.policy = policy
+        self.max_catch_up = max_catch_up
+        self.deadline = (monotonic() if start is None else start) + interval_sec
+        self.ticks = 0
+        self.skipped = 0
+        self.jitter = LatencyStats()
+
+    def due(self, now: Optional[float] = None) -> int:
+        """due число срабатываний, которые нужно выполнить сейчас, и переход к следующему сроку сетки
+
+        Args:
+            now (Optional[float]): текущее время (time.monotonic), None - взять текущее
+
+        Returns:
+            int: 0 - срок еще не наступил, 1 - обычное срабатывание,
+                больше 1 - с наверстыванием пропущенных (SCHEDULE_CATCH_UP)
+        """
+        if now is None:
+            now = monotonic()
+        late = now - self.deadline
+        if late < 0:
+            return 0
+        self.jitter.add(late)
+        # сроки, прошедшие после текущего, - пропущенные срабатывания
+        missed = int(late // self.interval_sec)
+        runs = 1
+        if self.policy == SCHEDULE_CATCH_UP:
+            runs += min(missed, self.max_catch_up)
+        self.skipped += missed + 1 - runs
+        self.ticks += runs
+        self.deadline += (missed + 1) * self.interval_sec
+        return runs
+
+    def stats(self) -> dict:
+        """ статистика расписания для метрик компонента """
+        return {
+            "interval_ms": self.interval_sec * 1000,
+            "policy": self.policy,
+            "ticks": self.ticks,
+            "skipped": self.skipped,
+            "jitter_p50_ms": self.jitter.percentile(50) * 1000,
+            "jitter_p99_ms": self.jitter.percentile(99) * 1000,
+            "jitter_max_ms": self.jitter.max * 1000,
+        }
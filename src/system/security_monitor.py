@@ -1,9 +1,11 @@
 """ модуль монитора безопасности """
 from abc import abstractmethod
 from multiprocessing import Queue, Process
-from queue import Empty
+from queue import Empty, Full
 
-from time import sleep
+import struct
+from time import monotonic, sleep
+from typing import List, Optional, Tuple
 
 from src.system.custom_process import BaseCustomProcess
 from src.system.config import LOG_ERROR, SECURITY_MONITOR_QUEUE_NAME,\
@@ -11,6 +13,15 @@ from src.system.config import LOG_ERROR, SECURITY_MONITOR_QUEUE_NAME,\
     LOG_DEBUG, LOG_INFO
 from src.system.queues_dir import QueuesDirectory
 from src.system.event_types import Event, ControlEvent
+from src.system.event_capture import CAPTURE_DENIED, CAPTURE_FORWARDED, CaptureWriter
+from src.system.metrics import LatencyStats
+from src.system.overflow import QueueRejected
+from src.system.wire_format import FRAME_TRACED_EVENT, append_hop, decode_header, decode_event
+
+
+def shard_queue_name(shard: int) -> str:
+    """ имя очереди экземпляра монитора с номером shard в группе """
+    return f"{SECURITY_MONITOR_QUEUE_NAME}#{shard}"
 
 
 class BaseSecurityMonitor(BaseCustomProcess):
@@ -19,62 +30,196 @@ class BaseSecurityMonitor(BaseCustomProcess):
     event_source_name = SECURITY_MONITOR_QUEUE_NAME
     events_q_name = event_source_name
 
-    def __init__(self, queues_dir: QueuesDirectory, log_level: int):
+    def __init__(self, queues_dir: QueuesDirectory, log_level: int, low_latency: bool = True,
+                 shard: Optional[int] = None):
+        # экземпляр, работающий как часть группы (см. monitor_group.py), получает
+        # собственную очередь, но пересылает события от имени монитора безопасности
+        events_q_name = BaseSecurityMonitor.events_q_name
+        log_prefix = BaseSecurityMonitor.log_prefix
+        if shard is not None:
+            events_q_name = shard_queue_name(shard)
+            log_prefix = f"[SECURITY#{shard}]"
+
         # вызываем конструктор базового класса
         super().__init__(
-            log_prefix=BaseSecurityMonitor.log_prefix,
+            log_prefix=log_prefix,
             queues_dir=queues_dir,
-            events_q_name=BaseSecurityMonitor.event_source_name,
+            events_q_name=events_q_name,
             event_source_name=BaseSecurityMonitor.event_source_name,
             log_level=log_level)
 
+        # режим работы: True - пересылка сразу по приходу события,
+        # False - периодический разбор очереди с интервалом _recalc_interval_sec
+        self._low_latency = low_latency
         # инициализируем интервал обновления
         self._recalc_interval_sec = 0.1
+        # максимальное число событий, разбираемых за один проход,
+        # чтобы под нагрузкой не откладывать проверку управляющих команд
+        self._batch_size = 256
+        # статистика задержек пересылки по переходам (отправитель, получатель)
+        self._hop_latency = {}
+        self._latency_report_interval_sec = 10.0
+        # файл записи проверенных событий (см. event_capture.py), None - без записи
+        self._capture_path = None
+        self._capture = None
         self._log_message(LOG_INFO, "создан монитор безопасности")
 
+    def capture_to(self, path: Optional[str]):
+        """capture_to включает запись всех проверенных событий (пересланных и запрещенных),
+        вызывается до запуска монитора
+
+        Args:
+            path (Optional[str]): файл записи, None - без записи
+        """
+        self._capture_path = path
+
 
     def _check_events_q(self):
-        """_check_events_q в цикле проверим все входящие сообщения,
-        выход из цикла по условию отсутствия новых сообщений
+        """_check_events_q забирает пачку входящих кадров (не больше _batch_size),
+        проверяет каждый по заголовку и пересылает разрешенные получателям,
+        по одной записи в очередь на каждого получателя.
+        Параметры событий не распаковываются и передаются получателю теми же байтами
         """
 
-        while True:
+        frames = self._events_q.get_frames(self._batch_size)
+        if not frames:
+            # в очереди нет команд на обработку
+            return
+
+        # разрешенные кадры, сгруппированные по получателям с сохранением порядка
+        batches = {}
+        for frame in frames:
             try:
-                event: Event = self._events_q.get_nowait()
-            except Empty:
-                # в очереди не команд на обработку,
-                # выходим из цикла проверки
-                break
-            if not isinstance(event, Event):
-                # событие неправильного типа, пропускаем
+                source, destination, operation, _, timestamp, _ = decode_header(frame)
+            except (ValueError, IndexError, struct.error):
+                # сообщение неправильного формата, пропускаем
+                self._log_message(LOG_ERROR, "получен кадр неизвестного формата")
                 continue
 
-            self._log_message(LOG_DEBUG, f"получен запрос {event}")
-
-            if self._check_event(event):
-                self._proceed(event)
+            self._log_message(
+                LOG_DEBUG, "получен запрос %s: %s -> %s", operation, source, destination)
+            self._metrics.begin(operation)
+
+            authorized = self._check_route(source, destination, operation)
+            if authorized is None:
+                # заголовка недостаточно, проверяем событие целиком
+                authorized = self._check_event(decode_event(frame))
+            if self._capture is not None:
+                self._capture.append(frame, CAPTURE_FORWARDED if authorized else CAPTURE_DENIED)
+            if authorized:
+                if frame[0] == FRAME_TRACED_EVENT:
+                    # переход трассы "пересылка монитором"
+                    frame = append_hop(frame, self._event_source_name, monotonic())
+                batch = batches.get(destination)
+                if batch is None:
+                    batch = batches[destination] = []
+                batch.append((frame, source, timestamp))
+        self._metrics.end()
+
+        for destination, batch in batches.items():
+            self._proceed(destination, batch)
                 
 
+    def _check_route(self, source: str, destination: str, operation: str) -> Optional[bool]:
+        """_check_route проверка события по заголовку, без распаковки параметров
+
+        Args:
+            source (str): отправитель
+            destination (str): получатель
+            operation (str): операция
+
+        Returns:
+            Optional[bool]: решение или None, если для решения нужно событие целиком
+                (тогда вызывается _check_event)
+        """
+        return None
+
     @abstractmethod
     def _check_event(self, event: Event):
         """ проверка события на допустимость политиками безопасности """
 
-    def _proceed(self, event: Event):
-        """ отправить проверенное событие конечному получателю """
-        destination_q = self._queues_dir.get_queue(event.destination)
+    def _proceed(self, destination: str, batch: List[Tuple[bytes, str, float]]):
+        """ отправить пачку проверенных кадров конечному получателю
+
+        Args:
+            destination (str): получатель
+            batch (List[Tuple[bytes, str, float]]): кадры с отправителем и временем создания
+        """
+        destination_q = self._queues_dir.get_queue(destination)
         if destination_q is None:
-            self._log_message(
-                LOG_ERROR, f"ошибка обработки запроса {event}, получатель не найден")
+            for _, source, _ in batch:
+                self._log_message(
+                    LOG_ERROR, "ошибка обработки запроса от %s, получатель %s не найден", source, destination)
         else:
-            destination_q.put(event)
+            try:
+                destination_q.put_frames([frame for frame, _, _ in batch])
+            except QueueRejected:
+                self._notify_rejected(destination, batch)
+                return
+            now = monotonic()
+            for _, source, timestamp in batch:
+                self._account_latency(source, destination, now - timestamp)
+            self._log_message(
+                LOG_DEBUG, "%s запрос(ов) отправлено получателю %s", len(batch), destination)
+
+
+    def _notify_rejected(self, destination: str, batch: List[Tuple[bytes, str, float]]):
+        """ уведомление отправителей о событиях, отклоненных переполненной очередью получателя """
+        for frame, source, _ in batch:
+            _, _, operation, _, _, _ = decode_header(frame)
+            self._log_message(
+                LOG_ERROR, "очередь %s переполнена, запрос %s от %s отклонен", destination, operation, source)
+            source_q = self._queues_dir.queues.get(source)
+            if source_q is None:
+                continue
+            try:
+                source_q.put(Event(
+                    source=SECURITY_MONITOR_QUEUE_NAME,
+                    destination=source,
+                    operation='rejected',
+                    parameters=(destination, operation)), False)
+            except Full:
+                # переполнена и очередь отправителя - уведомление теряется
+                pass
+
+
+    def _account_latency(self, source: str, destination: str, latency: float):
+        """ учет задержки перехода: от создания события отправителем до пересылки получателю """
+        hop = (source, destination)
+        stats = self._hop_latency.get(hop)
+        if stats is None:
+            stats = self._hop_latency[hop] = LatencyStats()
+        stats.add(latency)
+
+
+    def _report_latency(self):
+        """ вывод статистики задержек пересылки по переходам """
+        for (source, destination), stats in self._hop_latency.items():
             self._log_message(
-                LOG_DEBUG, f"запрос отправлен получателю {event}")
+                LOG_INFO, "задержка пересылки %s -> %s: %s", source, destination, stats)
 
 
     def run(self):
         self._log_message(LOG_INFO, "старт монитора безопасности")
-
-        while self._quit is False:
-            sleep(self._recalc_interval_sec)
-            self._check_events_q()
-            self._check_control_q()
+        self._add_timer(self._latency_report_interval_sec, self._report_latency)
+        if self._capture_path is not None:
+            self._capture = CaptureWriter(self._capture_path)
+            self._log_message(LOG_INFO, "события записываются в %s", self._capture_path)
+
+        try:
+            while self._quit is False:
+                if self._low_latency:
+                    self._wait_events()
+                else:
+                    self._signal_ready()
+                    self._flush_log()
+                    self._metrics.loop()
+                    sleep(self._recalc_interval_sec)
+                    self._run_timers()
+                self._check_events_q()
+                self._check_control_q()
+        finally:
+            if self._capture is not None:
+                self._capture.close()
+
+        self._report_latency()
@@ -9,3 +9,7 @@ class SecurityPolicy:
     source: str         # отправитель запроса
     destination: str    # получатель
     operation: str      # запрашиваемая операция
+
+
+# подстановочное значение: политика подходит для любого отправителя, получателя или операции
+POLICY_WILDCARD = "*"
@@ -0,0 +1,356 @@
+""" модуль транспорта сообщений через кольцевой буфер в разделяемой памяти
+
+    Счетчики буфера публикуются обычной записью в разделяемую память без барьеров
+    (в Python их нет): получатель видит кадр целиком, только если процессор не
+    переставляет записи (x86). На остальных архитектурах (ARM и др.) канал
+    небезопасен, поэтому QueuesDirectory.register_channel по ORDERED_STORES
+    вместо него оставляет отправителя на общей очереди получателя (TRANSPORT_PIPE).
+"""
+import os
+import platform
+import struct
+from collections import deque
+from multiprocessing import Pipe
+from multiprocessing.connection import wait
+from multiprocessing.shared_memory import SharedMemory
+from queue import Empty, Full
+from time import monotonic, sleep
+from typing import Iterable, List, Optional
+
+from src.system.event_types import Event
+from src.system.overflow import EventSlots, OverflowCounters, QueueRejected
+from src.system.config import OVERFLOW_BLOCK, OVERFLOW_REJECT
+from src.system.wire_format import FRAME_BATCH, encode, encode_batch, decode_frames, frame_count, split_batch
+
+
+_COUNTER = struct.Struct('<Q')
+_RECORD_LEN = struct.Struct('<I')
+# запись-метка: остаток буфера до конца пропускается, чтение продолжается с начала
+_WRAP_MARKER = 0xFFFFFFFF
+# счетчики записи и чтения разнесены по разным кэш-линиям
+_HEAD_OFFSET = 0
+_TAIL_OFFSET = 64
+_DATA_OFFSET = 128
+
+# архитектуры со строгим порядком записей (TSO), где публикация head без барьера корректна
+_ORDERED_MACHINES = {'x86_64', 'amd64', 'i386', 'i486', 'i586', 'i686', 'x86'}
+ORDERED_STORES = platform.machine().lower() in _ORDERED_MACHINES
+
+
+def _align8(size: int) -> int:
+    return (size + 7) & ~7
+
+
+class ShmRingQueue:
+    """ канал для одного отправителя и одного получателя: кольцевой буфер
+        в multiprocessing.shared_memory и "звонок" - неблокирующий канал,
+        в который отправитель пишет байт после каждой записи, чтобы разбудить
+        получателя, ожидающего в multiprocessing.connection.wait.
+
+        Записи буфера - кадры формата wire_format (длина + кадр, выравнивание 8 байт).
+        Счетчики записи (head) и чтения (tail) только растут, каждый меняет
+        только одна сторона. Кадр публикуется записью head после копирования данных,
+        что корректно только при строгом порядке записей (x86, см. ORDERED_STORES).
+
+        Интерфейс совпадает с EventQueue (put/put_many/get/get_nowait/get_many),
+        поэтому компонентам все равно, через какой транспорт приходят события """
+
+    def __init__(self, capacity: int = 1 << 20):
+        self._capacity = _align8(capacity)
+        self._shm = SharedMemory(create=True, size=_DATA_OFFSET + self._capacity)
+        self._shm.buf[:_DATA_OFFSET] = bytes(_DATA_OFFSET)
+        self._bell_reader, self._bell_writer = Pipe(duplex=False)
+        os.set_blocking(self._bell_reader.fileno(), False)
+        os.set_blocking(self._bell_writer.fileno(), False)
+        self._pending = deque()
+        # политика переполнения очереди получателя (см. EventQueue.attach)
+        self._overflow_policy = OVERFLOW_BLOCK
+        self._overflow = None
+        self._slots = None
+
+    def __getstate__(self):
+        return (self._capacity, self._shm, self._bell_reader, self._bell_writer,
+                self._overflow_policy, self._overflow, self._slots)
+
+    def __setstate__(self, state):
+        (self._capacity, self._shm, self._bell_reader, self._bell_writer,
+         self._overflow_policy, self._overflow, self._slots) = state
+        self._pending = deque()
+
+    def set_overflow(self, policy: str, counters: OverflowCounters, slots: Optional[EventSlots] = None):
+        """set_overflow политика переполнения для отправителя: при нехватке места
+        кадр не ждет, а отбрасывается или отклоняется (кроме OVERFLOW_BLOCK)
+
+        Args:
+            policy (str): политика переполнения очереди получателя
+            counters (OverflowCounters): счетчики переполнения очереди получателя
+            slots (Optional[EventSlots]): места очереди получателя (емкость в событиях),
+                None - ограничен только размер буфера (байт)
+        """
+        self._overflow_policy = policy
+        self._overflow = counters
+        self._slots = slots
+
+    @property
+    def name(self) -> str:
+        """ имя блока разделяемой памяти """
+        return self._shm.name
+
+    # --- сторона отправителя ---
+
+    def _write_frame(self, frame: bytes, block: bool, timeout: Optional[float]):
+        """ копирует кадр в буфер, при нехватке места ждет, пока получатель его освободит """
+        buf = self._shm.buf
+        capacity = self._capacity
+        need = _align8(_RECORD_LEN.size + len(frame))
+        if need > capacity:
+            raise ValueError(f"кадр размером {len(frame)} байт не помещается в канал")
+
+        deadline = None if timeout is None else monotonic() + timeout
+        delay = 0.0001
+        while True:
+            (head,) = _COUNTER.unpack_from(buf, _HEAD_OFFSET)
+            (tail,) = _COUNTER.unpack_from(buf, _TAIL_OFFSET)
+            pos = head % capacity
+            to_end = capacity - pos
+            # запись не разрывается на конце буфера: если не влезает, начинаем с начала
+            total = need if need <= to_end else to_end + need
+            if capacity - (head - tail) >= total:
+                break
+            if not block or (deadline is not None and monotonic() >= deadline):
+                raise Full
+            sleep(delay)
+            delay = min(delay * 2, 0.01)
+
+        if need > to_end:
+            if to_end >= _RECORD_LEN.size:
+                _RECORD_LEN.pack_into(buf, _DATA_OFFSET + pos, _WRAP_MARKER)
+            head += to_end
+            pos = 0
+        start = _DATA_OFFSET + pos
+        _RECORD_LEN.pack_into(buf, start, len(frame))
+        buf[start + _RECORD_LEN.size:start + _RECORD_LEN.size + len(frame)] = frame
+        # публикация записи
+        _COUNTER.pack_into(buf, _HEAD_OFFSET, head + need)
+
+    def _send_frame(self, frame: bytes, count: int, block: bool, timeout: Optional[float]):
+        """ запись кадра с учетом политики переполнения, count - число событий в кадре.
+            Места очереди получателя занимаются до записи и освобождаются получателем """
+        blocking = self._overflow is None or self._overflow_policy == OVERFLOW_BLOCK
+        slots = self._slots
+        if slots is not None and not slots.acquire(count, block and blocking, timeout):
+            if blocking:
+                raise Full
+            self._overflowed(count)
+            return
+        try:
+            if blocking:
+                self._write_frame(frame, block, timeout)
+            else:
+                self._write_frame(frame, False, None)
+        except Full:
+            if slots is not None:
+                slots.release(count)
+            if blocking:
+                raise
+            self._overflowed(count)
+            return
+        self._ring()
+
+    def _overflowed(self, count: int):
+        """ кадр не поместился: отклонение или отбрасывание по политике получателя """
+        if self._overflow_policy == OVERFLOW_REJECT:
+            self._overflow.add(OverflowCounters.REJECTED, count)
+            raise QueueRejected("канал переполнен")
+        self._overflow.add(OverflowCounters.DROPPED, count)
+
+    def _ring(self):
+        try:
+            os.write(self._bell_writer.fileno(), b'\0')
+        except BlockingIOError:
+            # канал звонка заполнен - получатель и так будет разбужен
+            pass
+
+    def put(self, obj, block: bool = True, timeout: Optional[float] = None):
+        self._send_frame(encode(obj), 1, block, timeout)
+
+    def put_nowait(self, obj):
+        self.put(obj, False)
+
+    def put_many(self, events: Iterable[Event], block: bool = True, timeout: Optional[float] = None):
+        """put_many записывает пачку событий одним кадром
+
+        Args:
+            events (Iterable[Event]): события
+            block (bool): ждать освобождения места в буфере
+            timeout (Optional[float]): время ожидания (сек.)
+        """
+        self.put_frames([encode(event) for event in events], block, timeout)
+
+    def put_frames(self, frames: List[bytes], block: bool = True, timeout: Optional[float] = None):
+        """put_frames записывает готовые кадры без повторного кодирования
+
+        Args:
+            frames (List[bytes]): кадры событий (bytes или memoryview)
+            block (bool): ждать освобождения места в буфере
+            timeout (Optional[float]): время ожидания (сек.)
+        """
+        if not frames:
+            return
+        if len(frames) == 1:
+            self._send_frame(frames[0], 1, block, timeout)
+        else:
+            self._send_frame(encode_batch(frames), len(frames), block, timeout)
+
+    # --- сторона получателя ---
+
+    def _drain_bell(self):
+        fd = self._bell_reader.fileno()
+        try:
+            while os.read(fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _read_records(self, records: list) -> bool:
+        """ переносит все опубликованные записи буфера в список records как есть,
+            возвращает False, если читать было нечего """
+        # звонок сбрасываем до чтения head: запись, опубликованная позже, позвонит снова
+        self._drain_bell()
+        buf = self._shm.buf
+        capacity = self._capacity
+        (head,) = _COUNTER.unpack_from(buf, _HEAD_OFFSET)
+        (tail,) = _COUNTER.unpack_from(buf, _TAIL_OFFSET)
+        if head == tail:
+            return False
+        while tail < head:
+            pos = tail % capacity
+            to_end = capacity - pos
+            if to_end < _RECORD_LEN.size:
+                tail += to_end
+                continue
+            (length,) = _RECORD_LEN.unpack_from(buf, _DATA_OFFSET + pos)
+            if length == _WRAP_MARKER:
+                tail += to_end
+                continue
+            start = _DATA_OFFSET + pos + _RECORD_LEN.size
+            records.append(bytes(buf[start:start + length]))
+            tail += _align8(_RECORD_LEN.size + length)
+        _COUNTER.pack_into(buf, _TAIL_OFFSET, tail)
+        if self._slots is not None and records:
+            self._slots.release(*map(frame_count, records))
+        return True
+
+    def _read_frames(self) -> bool:
+        """ переносит все опубликованные записи в буфер распакованных событий,
+            возвращает False, если читать было нечего """
+        records = []
+        if not self._read_records(records):
+            return False
+        for record in records:
+            self._pending.extend(decode_frames(record))
+        return True
+
+    def fill_frames(self, frames: list) -> bool:
+        """fill_frames переносит доступные записи в список кадров без распаковки событий
+
+        Args:
+            frames (list): список, в который добавляются кадры
+
+        Returns:
+            bool: были ли новые кадры
+        """
+        while self._pending:
+            frames.append(encode(self._pending.popleft()))
+        records = []
+        got = self._read_records(records)
+        for record in records:
+            if record[0] == FRAME_BATCH:
+                frames.extend(split_batch(record))
+            else:
+                frames.append(record)
+        return got
+
+    def get_frames(self, max_items: Optional[int] = None) -> list:
+        """ доступные кадры без распаковки событий (max_items не ограничивает чтение буфера) """
+        frames = []
+        self.fill_frames(frames)
+        return frames
+
+    def fill(self, pending: deque) -> bool:
+        """fill переносит доступные события в чужой буфер (используется EventQueue,
+        к которой канал подключен как дополнительный вход)
+
+        Args:
+            pending (PriorityLanes): буфер получателя
+
+        Returns:
+            bool: были ли новые события
+        """
+        got = self._read_frames()
+        if self._pending:
+            pending.extend(self._pending)
+            self._pending.clear()
+        return got
+
+    def get(self, block: bool = True, timeout: Optional[float] = None):
+        if self._pending or self._read_frames():
+            return self._pending.popleft()
+        if not block:
+            raise Empty
+        deadline = None if timeout is None else monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - monotonic())
+            wait([self._bell_reader], remaining)
+            if self._read_frames():
+                return self._pending.popleft()
+            if deadline is not None and monotonic() >= deadline:
+                raise Empty
+
+    def get_nowait(self):
+        return self.get(False)
+
+    def get_many(self, max_items: Optional[int] = None) -> List[Event]:
+        """get_many забирает без ожидания все доступные события, но не больше max_items
+
+        Args:
+            max_items (Optional[int]): ограничение на размер пачки, None - без ограничения
+
+        Returns:
+            List[Event]: события, пустой список если канал пуст
+        """
+        if not self._pending:
+            self._read_frames()
+        if max_items is None or max_items >= len(self._pending):
+            events = list(self._pending)
+            self._pending.clear()
+            return events
+        return [self._pending.popleft() for _ in range(max_items)]
+
+    def buffered(self) -> bool:
+        """ есть ли уже прочитанные события, которые не требуют ожидания """
+        return bool(self._pending)
+
+    def empty(self) -> bool:
+        if self._pending:
+            return False
+        buf = self._shm.buf
+        return _COUNTER.unpack_from(buf, _HEAD_OFFSET) == _COUNTER.unpack_from(buf, _TAIL_OFFSET)
+
+    def backlog(self) -> int:
+        """ объем записанных, но еще не прочитанных данных буфера (байт) """
+        buf = self._shm.buf
+        return _COUNTER.unpack_from(buf, _HEAD_OFFSET)[0] - _COUNTER.unpack_from(buf, _TAIL_OFFSET)[0]
+
+    def waitables(self) -> list:
+        """ объекты для multiprocessing.connection.wait, готовые к чтению при новых событиях """
+        return [self._bell_reader]
+
+    def close(self):
+        """ отключение от разделяемой памяти в текущем процессе """
+        self._shm.close()
+
+    def unlink(self):
+        """ удаление блока разделяемой памяти, вызывает создатель канала """
+        self._shm.close()
+        self._shm.unlink()
@@ -1,48 +1,133 @@
 """ модуль для группового управления компонентами системы """
 
 
+import multiprocessing
 from multiprocessing import Process
-from typing import List
-from src.system.config import LOG_ERROR, LOG_INFO, CRITICALITY_STR
+from time import monotonic
+from typing import Iterable, List, Optional
+from src.system.config import LOG_ERROR, LOG_INFO
+from src.system.log_pipeline import LoggingMixin, LogQueue, LogWriter
+from src.system.component_host import ComponentHost
+from src.system.custom_process import BaseCustomProcess
+from src.system.queues_dir import QueuesDirectory
+from src.system.security_policy_type import SecurityPolicy
 
 
-class SystemComponentsContainer:
-    """ контейнер компонентов """    
+# модули, которые сервер forkserver загружает один раз до запуска компонентов
+PRELOAD_MODULES = (
+    "src.system.custom_process",
+    "src.system.security_monitor",
+    "src.system.monitor_group",
+    "src.system.log_pipeline",
+    "src.system.wire_format",
+    "numpy",
+)
 
-    def __init__(self, components: List[Process], log_level = LOG_ERROR):
+
+def configure_start_method(method: str = "fork", preload: Iterable[str] = PRELOAD_MODULES):
+    """configure_start_method выбор способа запуска процессов компонентов,
+    вызывается в начале программы до создания очередей и компонентов.
+    Для forkserver общие модули загружаются сервером заранее, и каждый
+    компонент начинает работу с уже импортированными модулями
+
+    Args:
+        method (str): fork, forkserver или spawn
+        preload (Iterable[str]): модули для предварительной загрузки сервером forkserver
+    """
+    multiprocessing.set_start_method(method, force=True)
+    if method == "forkserver":
+        multiprocessing.set_forkserver_preload(list(preload))
+
+
+class SystemComponentsContainer(LoggingMixin):
+    """ контейнер компонентов. Компонент - процесс или группа процессов
+        (например, SecurityMonitorGroup) с методами start, stop и join
+        и, если компонент сообщает о готовности, wait_ready """    
+
+    def __init__(self, components: List[Process], log_level = LOG_ERROR,
+                 log_writer: Optional[LogWriter] = None, ready_timeout_sec: float = 30.0):
         self._components = components
+        # процесс записи журнала запускается первым и останавливается последним
+        self._log_writer = log_writer
+        # время ожидания готовности всех компонентов при запуске (сек.)
+        self._ready_timeout_sec = ready_timeout_sec
         self.log_prefix = "[СИСТЕМА]"
         self.log_level = log_level
 
-    def _log_message(self, criticality: int, message: str):
-        """_log_message печатает сообщение заданного уровня критичности
+    def _log_queue(self) -> Optional[LogQueue]:
+        return None if self._log_writer is None else self._log_writer.queue
+
+    def colocate(self, queues_dir: QueuesDirectory, components: List[BaseCustomProcess],
+                 policies: Iterable[SecurityPolicy]) -> ComponentHost:
+        """colocate режим совместного размещения: компоненты группы вместо отдельных
+        процессов работают сопрограммами в одном процессе ComponentHost, события между
+        ними передаются в памяти с проверкой по тем же политикам, что и в мониторе.
+        Вызывается до запуска контейнера
 
         Args:
-            criticality (int): уровень критичности
-            message (str): текст сообщения
+            queues_dir (QueuesDirectory): каталог очередей
+            components (List[BaseCustomProcess]): компоненты контейнера для совместного размещения
+            policies (Iterable[SecurityPolicy]): политики безопасности
+
+        Returns:
+            ComponentHost: процесс размещения, занимает в контейнере место первого компонента группы
         """
-        if criticality <= self.log_level:
-            print(f"[{CRITICALITY_STR[criticality]}]{self.log_prefix} {message}")
+        host = ComponentHost(queues_dir, components, policies, self.log_level)
+        position = min(self._components.index(component) for component in components)
+        self._components = [component for component in self._components if component not in components]
+        self._components.insert(position, host)
+        self._log_message(
+            LOG_INFO, "компоненты %s размещены в одном процессе",
+            ", ".join(component.__class__.__name__ for component in components))
+        return host
 
-    def start(self):
-        """ запуск всех компонентов """
+    def start(self) -> bool:
+        """ запуск всех компонентов. Процессы запускаются сразу все и готовятся
+            к работе параллельно, метод возвращается, когда каждый компонент
+            начал ждать события (или истекло время ожидания готовности)
 
+        Returns:
+            bool: все компоненты готовы
+        """
+        started = monotonic()
+        if self._log_writer is not None:
+            self._log_writer.start()
         for component in self._components:
-            self._log_message(LOG_INFO, f"запуск {component.__class__.__name__}")
+            self._log_message(LOG_INFO, "запуск %s", component.__class__.__name__)
             component.start()
 
+        deadline = started + self._ready_timeout_sec
+        all_ready = True
+        for component in self._components:
+            if not hasattr(component, 'wait_ready'):
+                continue
+            if not component.wait_ready(max(0.0, deadline - monotonic())):
+                self._log_message(
+                    LOG_ERROR, "%s не готов через %s сек. после запуска",
+                    component.__class__.__name__, self._ready_timeout_sec)
+                all_ready = False
+        self._log_message(LOG_INFO, "система запущена за %.3f сек.", monotonic() - started)
+        # главный процесс дальше не простаивает в цикле компонента, буфер журнала
+        # отправляется сразу, а не при остановке системы
+        self._flush_log()
+        return all_ready
+
     def stop(self):
         """ остановка всех компонентов """
 
         for component in self._components:
-            self._log_message(LOG_INFO, f"остановка {component.__class__.__name__}")
+            self._log_message(LOG_INFO, "остановка %s", component.__class__.__name__)
             component.stop()
 
         for component in self._components:
             component.join()
 
+        if self._log_writer is not None:
+            self._log_writer.stop()
+            self._log_writer.join()
+
     def clean(self):
         """ очистка всех компонентов """
         for component in self._components:
-            self._log_message(LOG_INFO, f"удаление {component.__class__.__name__}")
+            self._log_message(LOG_INFO, "удаление %s", component.__class__.__name__)
             del component
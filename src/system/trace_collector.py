@@ -0,0 +1,163 @@
+""" модуль сборщика трасс запросов """
+import json
+import os
+from queue import Empty
+from time import monotonic
+from typing import Dict, List, Optional, Tuple
+
+from src.system.custom_process import BaseCustomProcess
+from src.system.queues_dir import QueuesDirectory
+from src.system.event_types import ServiceRecord
+from src.system.metrics import LatencyStats
+from src.system.config import DEFAULT_LOG_LEVEL, LOG_DEBUG, LOG_ERROR, LOG_INFO, TRACES_QUEUE_NAME
+
+
+class TraceCollector(BaseCustomProcess):
+    """ сборщик трасс: принимает пути трасс от компонентов (см. tracing.py),
+        собирает из них запрос целиком и, когда новых путей трассы не поступало
+        trace_timeout_sec, раскладывает время запроса по участкам: пересылка
+        между компонентами и обработка в компоненте.
+
+        Разложенные трассы дописываются в файл JSON Lines (если задан путь),
+        по участкам копится статистика, сводка периодически выводится в журнал.
+
+        Очередь сборщика служебная: записи ServiceRecord идут в нее напрямую,
+        минуя монитор безопасности (см. queues_dir.py) """
+    log_prefix = "[TRACES]"
+    event_source_name = TRACES_QUEUE_NAME
+    events_q_name = event_source_name
+    service_queue = True
+
+    def __init__(
+        self,
+        queues_dir: QueuesDirectory,
+        path: Optional[str] = None,
+        trace_timeout_sec: float = 2.0,
+        report_interval_sec: float = 10.0,
+        log_level: int = DEFAULT_LOG_LEVEL,
+    ):
+        """
+        Args:
+            queues_dir (QueuesDirectory): каталог очередей
+            path (Optional[str]): файл разложенных трасс (JSON Lines), None - без записи в файл
+            trace_timeout_sec (float): время без новых путей, после которого трасса считается завершенной (сек.)
+            report_interval_sec (float): период вывода сводки в журнал (сек.)
+            log_level (int): уровень логирования
+        """
+        super().__init__(
+            log_prefix=TraceCollector.log_prefix,
+            queues_dir=queues_dir,
+            events_q_name=TraceCollector.events_q_name,
+            event_source_name=TraceCollector.event_source_name,
+            log_level=log_level)
+        self._path = path
+        self._trace_timeout_sec = trace_timeout_sec
+        self._report_interval_sec = report_interval_sec
+        self._file = None
+        # незавершенные трассы: номер -> [время последнего пути, пути]
+        self._traces: Dict[int, list] = {}
+        self._total_stats = LatencyStats()
+        self._segment_stats: Dict[Tuple[str, str], LatencyStats] = {}
+
+        self._log_message(LOG_INFO, "создан сборщик трасс")
+
+    def _check_events_q(self):
+        """ Метод проверяет наличие сообщений для данного компонента системы """
+        while True:
+            try:
+                record: ServiceRecord = self._events_q.get_nowait()
+                if not isinstance(record, ServiceRecord) or record.operation != 'trace':
+                    continue
+                trace_id, hops = record.payload
+                trace = self._traces.get(trace_id)
+                if trace is None:
+                    trace = self._traces[trace_id] = [0.0, []]
+                trace[0] = monotonic()
+                trace[1].append(hops)
+            except Empty:
+                break
+
+    @staticmethod
+    def breakdown(trace_id: int, paths: List[list]) -> dict:
+        """breakdown разложение запроса по участкам
+
+        Args:
+            trace_id (int): номер трассы
+            paths (List[list]): пути трассы, каждый - список переходов (этап, время)
+
+        Returns:
+            dict: номер трассы, общее время и участки в порядке начала
+        """
+        # у путей одной трассы общее начало, одинаковые участки учитываются один раз
+        edges = set()
+        for hops in paths:
+            for (stage_from, start), (stage_to, finish) in zip(hops, hops[1:]):
+                edges.add((start, finish, stage_from, stage_to))
+        begin = min(hops[0][1] for hops in paths)
+        end = max(hops[-1][1] for hops in paths)
+        return {
+            "trace_id": trace_id,
+            "total_ms": (end - begin) * 1000,
+            "paths": len(paths),
+            "segments": [
+                {"from": stage_from, "to": stage_to,
+                 "start_ms": (start - begin) * 1000, "ms": (finish - start) * 1000}
+                for start, finish, stage_from, stage_to in sorted(edges)],
+        }
+
+    def _complete_traces(self, force: bool = False):
+        """ разложение трасс, по которым новых путей не поступало trace_timeout_sec """
+        now = monotonic()
+        completed = [trace_id for trace_id, (updated, _) in self._traces.items()
+                     if force or now - updated >= self._trace_timeout_sec]
+        for trace_id in completed:
+            _, paths = self._traces.pop(trace_id)
+            record = self.breakdown(trace_id, paths)
+            self._total_stats.add(record["total_ms"] / 1000)
+            for segment in record["segments"]:
+                key = (segment["from"], segment["to"])
+                stats = self._segment_stats.get(key)
+                if stats is None:
+                    stats = self._segment_stats[key] = LatencyStats()
+                stats.add(segment["ms"] / 1000)
+            self._log_message(
+                LOG_DEBUG, "трасса %x: %.3f мс, участков %s",
+                trace_id, record["total_ms"], len(record["segments"]))
+            if self._file is not None:
+                self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        if completed and self._file is not None:
+            self._file.flush()
+
+    def _report(self):
+        """ вывод сводки по завершенным трассам: общее время и самые долгие участки """
+        if self._total_stats.count == 0:
+            return
+        self._log_message(LOG_INFO, "запросы: %s", self._total_stats)
+        slowest = sorted(self._segment_stats.items(), key=lambda item: item[1].total, reverse=True)
+        for (stage_from, stage_to), stats in slowest[:5]:
+            self._log_message(LOG_INFO, "участок %s -> %s: %s", stage_from, stage_to, stats)
+
+    def run(self):
+        self._log_message(LOG_INFO, "сборщик трасс активен")
+        if self._path is not None:
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self._path, 'a', encoding='utf-8')
+        self._add_timer(self._trace_timeout_sec / 2, self._complete_traces)
+        self._add_timer(self._report_interval_sec, self._report)
+
+        try:
+            while self._quit is False:
+                try:
+                    self._wait_events()
+                    self._check_events_q()
+                    self._check_control_q()
+                except Exception as e:
+                    self._log_message(LOG_ERROR, "ошибка сборщика трасс: %s", e)
+            self._check_events_q()
+            self._complete_traces(force=True)
+            self._report()
+        finally:
+            if self._file is not None:
+                self._file.close()
@@ -0,0 +1,89 @@
+""" модуль сквозной трассировки запросов
+
+    Событие-запрос получает номер трассы (Event.trace_id) и список переходов
+    (Event.hops) - пар (имя этапа, time.monotonic()). Пока компонент обрабатывает
+    трассируемое событие, оно считается текущим, и все события, созданные
+    компонентом в это время, наследуют номер трассы и переходы текущего события
+    с добавлением перехода "отправка". Поэтому код обработчиков компонентов
+    для трассировки не меняется, достаточно начать трассу в точке входа запроса.
+
+    Переходы добавляются: при создании события в ответ на трассируемое,
+    при пересылке монитором безопасности и при выдаче события получателю
+    из очереди. Когда компонент закончил обработку события, не создав новых,
+    путь трассы от начала до этого события отправляется сборщику трасс.
+"""
+import random
+from time import monotonic
+from typing import List, Optional, Tuple
+
+Hop = Tuple[str, float]
+
+# текущее обрабатываемое трассируемое событие процесса и имя обрабатывающего компонента
+_current = None
+_component = None
+# за время обработки текущего события созданы новые события трассы
+_emitted = False
+
+
+def new_trace_id() -> int:
+    """ случайный номер новой трассы """
+    return random.getrandbits(63)
+
+
+def start_trace(event):
+    """start_trace начинает новую трассу с события (точка входа запроса)
+
+    Args:
+        event (Event): событие-запрос
+
+    Returns:
+        Event: то же событие
+    """
+    event.trace_id = new_trace_id()
+    event.hops = [(event.source, event.timestamp)]
+    return event
+
+
+def current_trace_id() -> Optional[int]:
+    """ номер трассы текущего события, None - событие не трассируется """
+    return None if _current is None else _current.trace_id
+
+
+def current_hops() -> Optional[List[Hop]]:
+    """ переходы для нового события, созданного при обработке текущего """
+    global _emitted
+    if _current is None:
+        return None
+    _emitted = True
+    return _current.hops + [(_component, monotonic())]
+
+
+def begin(event, component: str):
+    """begin выдача события получателю: переход "получено" и событие становится текущим
+
+    Args:
+        event (Event): событие
+        component (str): имя получателя
+    """
+    global _current, _component, _emitted
+    if getattr(event, 'trace_id', None) is None or event.hops is None:
+        _current = None
+        return
+    event.hops.append((component, monotonic()))
+    _current = event
+    _component = component
+    _emitted = False
+
+
+def end() -> Optional[Tuple[int, List[Hop]]]:
+    """end завершение обработки текущего события
+
+    Returns:
+        Optional[Tuple[int, List[Hop]]]: номер трассы и путь, если событие
+            оказалось последним на своем пути (новых событий не создано), иначе None
+    """
+    global _current
+    event, _current = _current, None
+    if event is None or _emitted:
+        return None
+    return event.trace_id, event.hops + [(_component, monotonic())]
@@ -0,0 +1,487 @@
+""" модуль компактного двоичного представления событий для передачи между процессами
+
+    Каждое сообщение передается кадром, первый байт кадра - его тип:
+    событие, управляющая команда или пачка кадров.
+
+    Формат события:
+        заголовок HEADER: тип кадра, байт вида полезной нагрузки (младшие 4 бита),
+        класса приоритета (биты 4-5) и признака номера запроса (бит 7), коды отправителя,
+        получателя и операции, время создания события;
+        строки, не найденные в таблице имен (длина + utf-8), в порядке
+        отправитель, получатель, операция;
+        полезная нагрузка, раскладка которой определяется ее видом.
+
+    Трассируемое событие (Event.trace_id задан) передается кадром отдельного типа,
+    в котором сразу за заголовком идет блок трассы: номер трассы, число переходов
+    и переходы (код имени этапа, время; имя вне таблицы - следом за кодом).
+    Монитор добавляет переход в блок, не распаковывая полезную нагрузку (append_hop).
+
+    Номер запроса (Event.correlation_id), если задан, идет после блока трассы
+    (или сразу после заголовка) перед строками имен.
+
+    Формат пачки: тип кадра, число кадров, затем для каждого кадра длина и сам кадр.
+
+    Имена очередей и операций заменяются номерами из общей таблицы _NAMES.
+    Часто встречающиеся параметры (пара координат, тройка параметров орбиты)
+    упаковываются в фиксированную структуру, остальные - через pickle.
+"""
+import pickle
+import struct
+from typing import Any, List, Optional, Tuple, Union
+
+from src.system.config import SATELITE_QUEUE_NAME, ORBIT_DRAWER_QUEUE_NAME, \
+    OPTICS_CONTROL_QUEUE_NAME, ZONE_CHECK_QUEUE_NAME, ORBIT_CONTROL_QUEUE_NAME, \
+    ORBIT_CHECK_QUEUE_NAME, CAMERA_QUEUE_NAME, SECURITY_MONITOR_QUEUE_NAME, \
+    CLIENT_QUEUE_NAME, CENTRAL_CONTROL_SYSTEM_QUEUE_NAME, DATA_STORAGE_QUEUE_NAME, \
+    COMMAND_HANDLER_QUEUE_NAME, SATELLITE_CONTROL_SYSTEM_QUEUE_NAME, METRICS_QUEUE_NAME, \
+    TRACES_QUEUE_NAME, PRIORITY_COMMAND, PRIORITY_LANES
+from src.system.event_types import Event, ControlEvent
+from src.system.priority import event_priority
+
+
+# типы кадров
+FRAME_EVENT = 1
+FRAME_CONTROL = 2
+FRAME_BATCH = 3
+FRAME_TRACED_EVENT = 4
+
+# таблица имен очередей и операций, номер в таблице - код имени.
+# Таблица только дополняется в конец, чтобы коды ранее записанных событий не менялись
+_NAMES = (
+    None,
+    # очереди
+    SATELITE_QUEUE_NAME, ORBIT_DRAWER_QUEUE_NAME, OPTICS_CONTROL_QUEUE_NAME,
+    ZONE_CHECK_QUEUE_NAME, ORBIT_CONTROL_QUEUE_NAME, ORBIT_CHECK_QUEUE_NAME,
+    CAMERA_QUEUE_NAME, SECURITY_MONITOR_QUEUE_NAME, CLIENT_QUEUE_NAME,
+    CENTRAL_CONTROL_SYSTEM_QUEUE_NAME, DATA_STORAGE_QUEUE_NAME,
+    COMMAND_HANDLER_QUEUE_NAME, SATELLITE_CONTROL_SYSTEM_QUEUE_NAME,
+    # операции
+    'upload_file', 'send_code', 'ORBIT', 'ADD ZONE', 'REMOVE ZONE', 'MAKE PHOTO',
+    'change_orbit', 'check_orbit', 'request_photo', 'check_photo', 'post_photo',
+    'request_zone', 'update_photo', 'add_zone', 'delete_zone', 'add_photo',
+    'camera_update', 'post_camera_coords', 'send_data', 'update_orbit_data',
+    'update_photo_map', 'draw_restricted_zone', 'stop',
+    METRICS_QUEUE_NAME, 'metrics',
+    TRACES_QUEUE_NAME, 'trace',
+    'rejected',
+)
+_NAME_CODES = {name: code for code, name in enumerate(_NAMES)}
+# код имени, которого нет в таблице: строка передается следом за заголовком
+_INLINE_NAME = 0xFFFF
+
+# тип кадра, вид нагрузки и класс приоритета, коды отправителя, получателя, операции, время создания
+HEADER = struct.Struct('<BBHHHd')
+_KIND_MASK = 0x0F
+_PRIORITY_SHIFT = 4
+_PRIORITY_MASK = 0x03
+if PRIORITY_LANES > _PRIORITY_MASK + 1:
+    raise ValueError(f"класс приоритета не помещается в заголовок кадра: {PRIORITY_LANES} полос")
+_CORRELATED = 0x80
+# номер запроса
+_CORRELATION = struct.Struct('<Q')
+_CONTROL = struct.Struct('<BH')
+_BATCH = struct.Struct('<BI')
+_FRAME_LEN = struct.Struct('<I')
+_STR_LEN = struct.Struct('<H')
+# номер трассы, число переходов
+_TRACE = struct.Struct('<QH')
+# код имени этапа, время перехода
+_HOP = struct.Struct('<Hd')
+
+# виды полезной нагрузки
+PAYLOAD_NONE = 0          # parameters is None
+PAYLOAD_PAIR = 1          # кортеж из двух float (широта, долгота)
+PAYLOAD_TRIPLE = 2        # кортеж из трех float (параметры орбиты)
+PAYLOAD_TRIPLE_LIST = 3   # список из трех float (параметры орбиты из обработчика команд)
+PAYLOAD_EMPTY_LIST = 4    # пустой список
+PAYLOAD_PICKLE = 5        # произвольные parameters, extra_parameters и signature
+
+_PAIR = struct.Struct('<2d')
+_TRIPLE = struct.Struct('<3d')
+
+
+def _is_floats(value: Any, size: int) -> bool:
+    """ последовательность ровно из size чисел с плавающей точкой """
+    if len(value) != size:
+        return False
+    for item in value:
+        if not isinstance(item, float):
+            return False
+    return True
+
+
+def _classify_payload(event: Event) -> int:
+    """ выбор раскладки полезной нагрузки события """
+    if event.extra_parameters is not None or event.signature is not None:
+        return PAYLOAD_PICKLE
+    parameters = event.parameters
+    if parameters is None:
+        return PAYLOAD_NONE
+    kind = type(parameters)
+    if kind is tuple:
+        if _is_floats(parameters, 2):
+            return PAYLOAD_PAIR
+        if _is_floats(parameters, 3):
+            return PAYLOAD_TRIPLE
+    elif kind is list:
+        if not parameters:
+            return PAYLOAD_EMPTY_LIST
+        if _is_floats(parameters, 3):
+            return PAYLOAD_TRIPLE_LIST
+    return PAYLOAD_PICKLE
+
+
+def encode_name(name: str) -> int:
+    """ код имени по таблице, _INLINE_NAME если имени в таблице нет """
+    return _NAME_CODES.get(name, _INLINE_NAME)
+
+
+def decode_name(code: int) -> str:
+    """ имя по коду из таблицы """
+    return _NAMES[code]
+
+
+def encode_payload(event: Event) -> Tuple[int, bytes]:
+    """encode_payload упаковка полезной нагрузки события
+
+    Args:
+        event (Event): событие
+
+    Returns:
+        Tuple[int, bytes]: вид нагрузки и ее байтовое представление
+    """
+    kind = _classify_payload(event)
+    if kind == PAYLOAD_PAIR:
+        return kind, _PAIR.pack(*event.parameters)
+    if kind == PAYLOAD_TRIPLE or kind == PAYLOAD_TRIPLE_LIST:
+        return kind, _TRIPLE.pack(*event.parameters)
+    if kind == PAYLOAD_PICKLE:
+        return kind, pickle.dumps(
+            (event.parameters, event.extra_parameters, event.signature),
+            protocol=pickle.HIGHEST_PROTOCOL)
+    return kind, b''
+
+
+def decode_payload(kind: int, data) -> Tuple[Any, Any, Any]:
+    """decode_payload распаковка полезной нагрузки
+
+    Args:
+        kind (int): вид нагрузки
+        data (bytes | memoryview): байтовое представление
+
+    Returns:
+        Tuple[Any, Any, Any]: parameters, extra_parameters, signature
+    """
+    if kind == PAYLOAD_NONE:
+        return None, None, None
+    if kind == PAYLOAD_PAIR:
+        return _PAIR.unpack(data), None, None
+    if kind == PAYLOAD_TRIPLE:
+        return _TRIPLE.unpack(data), None, None
+    if kind == PAYLOAD_TRIPLE_LIST:
+        return list(_TRIPLE.unpack(data)), None, None
+    if kind == PAYLOAD_EMPTY_LIST:
+        return [], None, None
+    if kind == PAYLOAD_PICKLE:
+        return pickle.loads(data)
+    raise ValueError(f"неизвестный вид полезной нагрузки {kind}")
+
+
+def _encode_hop(name: str, timestamp: float) -> bytes:
+    """ переход трассы: код имени этапа, время и, если имени нет в таблице, само имя """
+    code = _NAME_CODES.get(name, _INLINE_NAME)
+    if code != _INLINE_NAME:
+        return _HOP.pack(code, timestamp)
+    raw = str(name).encode('utf-8')
+    return _HOP.pack(code, timestamp) + _STR_LEN.pack(len(raw)) + raw
+
+
+def _trace_end(data) -> int:
+    """ смещение конца блока трассы в кадре трассируемого события """
+    _, count = _TRACE.unpack_from(data, HEADER.size)
+    offset = HEADER.size + _TRACE.size
+    for _ in range(count):
+        code, _ = _HOP.unpack_from(data, offset)
+        offset += _HOP.size
+        if code == _INLINE_NAME:
+            (length,) = _STR_LEN.unpack_from(data, offset)
+            offset += _STR_LEN.size + length
+    return offset
+
+
+def decode_trace(data) -> Tuple[Optional[int], Optional[List[Tuple[str, float]]]]:
+    """decode_trace номер трассы и переходы из кадра события
+
+    Args:
+        data (bytes | memoryview): байтовое представление события
+
+    Returns:
+        Tuple[Optional[int], Optional[List[Tuple[str, float]]]]: номер трассы и переходы,
+            (None, None) для нетрассируемого события
+    """
+    if data[0] != FRAME_TRACED_EVENT:
+        return None, None
+    trace_id, count = _TRACE.unpack_from(data, HEADER.size)
+    offset = HEADER.size + _TRACE.size
+    hops = []
+    for _ in range(count):
+        code, timestamp = _HOP.unpack_from(data, offset)
+        offset += _HOP.size
+        if code == _INLINE_NAME:
+            (length,) = _STR_LEN.unpack_from(data, offset)
+            offset += _STR_LEN.size
+            name = bytes(data[offset:offset + length]).decode('utf-8')
+            offset += length
+        else:
+            name = _NAMES[code]
+        hops.append((name, timestamp))
+    return trace_id, hops
+
+
+def append_hop(data, name: str, timestamp: float):
+    """append_hop добавляет переход в кадр трассируемого события без распаковки нагрузки,
+    кадр нетрассируемого события возвращается без изменений
+
+    Args:
+        data (bytes | memoryview): байтовое представление события
+        name (str): имя этапа
+        timestamp (float): время перехода (time.monotonic)
+
+    Returns:
+        bytes | memoryview: кадр с добавленным переходом
+    """
+    if data[0] != FRAME_TRACED_EVENT:
+        return data
+    trace_id, count = _TRACE.unpack_from(data, HEADER.size)
+    end = _trace_end(data)
+    return b''.join((data[:HEADER.size], _TRACE.pack(trace_id, count + 1),
+                     data[HEADER.size + _TRACE.size:end], _encode_hop(name, timestamp),
+                     data[end:]))
+
+
+def restamp(data, timestamp: float) -> bytes:
+    """restamp кадр события с новым временем создания и без блока трассы
+    (для повторной подачи записанных событий, см. event_capture.py)
+
+    Args:
+        data (bytes | memoryview): байтовое представление события
+        timestamp (float): новое время создания (time.monotonic)
+
+    Returns:
+        bytes: кадр нетрассируемого события
+    """
+    frame_type, flags, source, destination, operation, _ = HEADER.unpack_from(data)
+    if frame_type == FRAME_EVENT:
+        rest = data[HEADER.size:]
+    elif frame_type == FRAME_TRACED_EVENT:
+        rest = data[_trace_end(data):]
+    else:
+        raise ValueError(f"кадр типа {frame_type} не является событием")
+    return HEADER.pack(FRAME_EVENT, flags, source, destination, operation, timestamp) + bytes(rest)
+
+
+def encode_event(event: Event) -> bytes:
+    """encode_event двоичное представление события
+
+    Args:
+        event (Event): событие
+
+    Returns:
+        bytes: байтовое представление
+    """
+    kind, payload = encode_payload(event)
+    # event_priority ограничивает класс диапазоном полос, он не задевает соседние флаги
+    kind |= event_priority(event) << _PRIORITY_SHIFT
+    if event.correlation_id is not None:
+        kind |= _CORRELATED
+    source = _NAME_CODES.get(event.source, _INLINE_NAME)
+    destination = _NAME_CODES.get(event.destination, _INLINE_NAME)
+    operation = _NAME_CODES.get(event.operation, _INLINE_NAME)
+    if event.trace_id is None:
+        header = HEADER.pack(FRAME_EVENT, kind, source, destination, operation, event.timestamp)
+    else:
+        hops = event.hops or ()
+        header = b''.join([
+            HEADER.pack(FRAME_TRACED_EVENT, kind, source, destination, operation, event.timestamp),
+            _TRACE.pack(event.trace_id, len(hops)),
+            *(_encode_hop(name, timestamp) for name, timestamp in hops)])
+    if event.correlation_id is not None:
+        header += _CORRELATION.pack(event.correlation_id)
+    if source != _INLINE_NAME and destination != _INLINE_NAME and operation != _INLINE_NAME:
+        return header + payload
+
+    parts = [header]
+    for code, name in ((source, event.source),
+                       (destination, event.destination),
+                       (operation, event.operation)):
+        if code == _INLINE_NAME:
+            raw = str(name).encode('utf-8')
+            parts.append(_STR_LEN.pack(len(raw)))
+            parts.append(raw)
+    parts.append(payload)
+    return b''.join(parts)
+
+
+def decode_header(data) -> Tuple[str, str, str, int, float, int]:
+    """decode_header разбор заголовка события без распаковки полезной нагрузки
+
+    Args:
+        data (bytes | memoryview): байтовое представление события
+
+    Returns:
+        Tuple[str, str, str, int, float, int]: отправитель, получатель, операция,
+            вид нагрузки, время создания и смещение начала нагрузки
+    """
+    frame_type, flags, source, destination, operation, timestamp = HEADER.unpack_from(data)
+    kind = flags & _KIND_MASK
+    if frame_type == FRAME_EVENT:
+        offset = HEADER.size
+    elif frame_type == FRAME_TRACED_EVENT:
+        offset = _trace_end(data)
+    else:
+        raise ValueError(f"кадр типа {frame_type} не является событием")
+    if flags & _CORRELATED:
+        offset += _CORRELATION.size
+    if source != _INLINE_NAME and destination != _INLINE_NAME and operation != _INLINE_NAME:
+        return _NAMES[source], _NAMES[destination], _NAMES[operation], kind, timestamp, offset
+
+    names = []
+    for code in (source, destination, operation):
+        if code == _INLINE_NAME:
+            (length,) = _STR_LEN.unpack_from(data, offset)
+            offset += _STR_LEN.size
+            names.append(bytes(data[offset:offset + length]).decode('utf-8'))
+            offset += length
+        else:
+            names.append(_NAMES[code])
+    return names[0], names[1], names[2], kind, timestamp, offset
+
+
+def frame_priority(data) -> int:
+    """ класс приоритета кадра без разбора заголовка, управляющие команды и пачки - PRIORITY_COMMAND """
+    if data[0] == FRAME_EVENT or data[0] == FRAME_TRACED_EVENT:
+        return (data[1] >> _PRIORITY_SHIFT) & _PRIORITY_MASK
+    return PRIORITY_COMMAND
+
+
+def decode_correlation(data) -> Optional[int]:
+    """ номер запроса из кадра события, None - номер не задан """
+    if not data[1] & _CORRELATED:
+        return None
+    offset = HEADER.size if data[0] == FRAME_EVENT else _trace_end(data)
+    return _CORRELATION.unpack_from(data, offset)[0]
+
+
+def decode_event(data) -> Event:
+    """decode_event восстановление события из байтового представления
+
+    Args:
+        data (bytes | memoryview): байтовое представление
+
+    Returns:
+        Event: событие
+    """
+    source, destination, operation, kind, timestamp, offset = decode_header(data)
+    trace_id, hops = decode_trace(data)
+    priority = (data[1] >> _PRIORITY_SHIFT) & _PRIORITY_MASK
+    correlation_id = decode_correlation(data)
+    if kind == PAYLOAD_NONE:
+        return Event(source, destination, operation, None, None, None, timestamp, trace_id, hops,
+                     priority, correlation_id)
+    if kind == PAYLOAD_PAIR:
+        return Event(source, destination, operation, _PAIR.unpack_from(data, offset),
+                     None, None, timestamp, trace_id, hops, priority, correlation_id)
+    parameters, extra_parameters, signature = decode_payload(kind, data[offset:])
+    return Event(source, destination, operation, parameters,
+                 extra_parameters, signature, timestamp, trace_id, hops, priority, correlation_id)
+
+
+def encode_control_event(event: ControlEvent) -> bytes:
+    """ двоичное представление управляющей команды """
+    code = _NAME_CODES.get(event.operation, _INLINE_NAME)
+    if code == _INLINE_NAME:
+        return _CONTROL.pack(FRAME_CONTROL, code) + str(event.operation).encode('utf-8')
+    return _CONTROL.pack(FRAME_CONTROL, code)
+
+
+def decode_control_event(data) -> ControlEvent:
+    """ восстановление управляющей команды из байтового представления """
+    frame_type, code = _CONTROL.unpack_from(data)
+    if frame_type != FRAME_CONTROL:
+        raise ValueError(f"кадр типа {frame_type} не является управляющей командой")
+    if code == _INLINE_NAME:
+        return ControlEvent(bytes(data[_CONTROL.size:]).decode('utf-8'))
+    return ControlEvent(_NAMES[code])
+
+
+
+def encode_batch(frames: List[bytes]) -> bytes:
+    """encode_batch упаковка нескольких кадров в один кадр-пачку
+
+    Args:
+        frames (List[bytes]): кадры
+
+    Returns:
+        bytes: кадр-пачка
+    """
+    parts = [_BATCH.pack(FRAME_BATCH, len(frames))]
+    for frame in frames:
+        parts.append(_FRAME_LEN.pack(len(frame)))
+        parts.append(frame)
+    return b''.join(parts)
+
+
+def split_batch(data) -> List[memoryview]:
+    """split_batch разбор кадра-пачки на отдельные кадры без копирования
+
+    Args:
+        data (bytes | memoryview): кадр-пачка
+
+    Returns:
+        List[memoryview]: кадры
+    """
+    view = memoryview(data)
+    frame_type, count = _BATCH.unpack_from(view)
+    if frame_type != FRAME_BATCH:
+        raise ValueError(f"кадр типа {frame_type} не является пачкой")
+    offset = _BATCH.size
+    frames = []
+    for _ in range(count):
+        (length,) = _FRAME_LEN.unpack_from(view, offset)
+        offset += _FRAME_LEN.size
+        frames.append(view[offset:offset + length])
+        offset += length
+    return frames
+
+
+def frame_count(data) -> int:
+    """ число сообщений в кадре: 1 для одиночного кадра, размер пачки для кадра-пачки """
+    if data[0] == FRAME_BATCH:
+        return _BATCH.unpack_from(data)[1]
+    return 1
+
+
+def encode(message: Union[Event, ControlEvent]) -> bytes:
+    """ кадр для события или управляющей команды """
+    if isinstance(message, Event):
+        return encode_event(message)
+    if isinstance(message, ControlEvent):
+        return encode_control_event(message)
+    raise TypeError(f"неподдерживаемый тип сообщения {type(message).__name__}")
+
+
+def decode(data) -> Union[Event, ControlEvent]:
+    """ событие или управляющая команда из одиночного кадра """
+    frame_type = data[0]
+    if frame_type == FRAME_EVENT or frame_type == FRAME_TRACED_EVENT:
+        return decode_event(data)
+    if frame_type == FRAME_CONTROL:
+        return decode_control_event(data)
+    raise ValueError(f"неизвестный тип кадра {frame_type}")
+
+
+def decode_frames(data) -> List[Union[Event, ControlEvent]]:
+    """ все сообщения кадра: одно для одиночного кадра, несколько для пачки """
+    if data[0] == FRAME_BATCH:
+        return [decode(frame) for frame in split_batch(data)]
+    return [decode(data)]
@@ -0,0 +1,73 @@
+""" проверки точного решения nearest_point: ближайшая точка круговой орбиты """
+import numpy as np
+import pytest
+
+from src.satellite_simulator.orbit import EARTH_RADIUS, nearest_point, orbit_state
+
+RADIUS = EARTH_RADIUS + 700e3
+# расстояние считается через |x|^2 - 2 radius |проекция| + radius^2: при радиусе
+# порядка 7e6 м вычитание величин порядка 5e13 оставляет погрешность в доли метра
+DISTANCE_TOLERANCE = 1.0
+
+
+def brute_force(position, radius, raan, inclination, samples=200000):
+    """ ближайшая точка перебором углов положения на орбите """
+    angles = np.linspace(0, 2 * np.pi, samples, endpoint=False)
+    points, _ = orbit_state(radius, raan, angles, inclination)
+    distances = np.linalg.norm(points - position, axis=-1)
+    best = np.argmin(distances)
+    return angles[best], distances[best]
+
+
+@pytest.mark.parametrize('angle', [0.0, 0.7, np.pi, 5.5])
+def test_point_on_orbit(angle):
+    position, _ = orbit_state(RADIUS, 0.3, angle, 1.1)
+    best_angle, distance = nearest_point(position, RADIUS, 0.3, 1.1)
+    assert best_angle == pytest.approx(angle, abs=1e-9)
+    assert distance == pytest.approx(0.0, abs=DISTANCE_TOLERANCE)
+
+
+def test_radial_offset():
+    # точка над орбитой по радиусу: ближайшая точка под ней, расстояние - разность высот
+    position, _ = orbit_state(RADIUS + 50e3, 0.2, 2.0, 0.9)
+    best_angle, distance = nearest_point(position, RADIUS, 0.2, 0.9)
+    assert best_angle == pytest.approx(2.0, abs=1e-9)
+    assert distance == pytest.approx(50e3, abs=DISTANCE_TOLERANCE)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    position = rng.normal(size=3) * RADIUS
+    raan, inclination = rng.uniform(0, 2 * np.pi), rng.uniform(0, np.pi)
+    best_angle, distance = nearest_point(position, RADIUS, raan, inclination)
+    expected_angle, expected_distance = brute_force(position, RADIUS, raan, inclination)
+    # перебор не точнее шага сетки, точное решение не хуже перебора
+    assert distance <= expected_distance + DISTANCE_TOLERANCE
+    assert distance == pytest.approx(expected_distance, rel=1e-6, abs=DISTANCE_TOLERANCE)
+    assert np.cos(best_angle - expected_angle) == pytest.approx(1.0, abs=1e-6)
+
+
+def test_orbit_arrays():
+    position, _ = orbit_state(RADIUS, 0.4, 1.0, 0.6)
+    radii = RADIUS + np.array([0.0, 10e3, -20e3])
+    raans = np.array([0.4, 0.4, 0.4])
+    inclinations = np.array([0.6, 0.6, 0.6])
+    angles, distances = nearest_point(position, radii, raans, inclinations)
+    assert angles.shape == distances.shape == (3,)
+    np.testing.assert_allclose(angles, 1.0, atol=1e-9)
+    np.testing.assert_allclose(distances, [0.0, 10e3, 20e3], atol=DISTANCE_TOLERANCE)
+
+
+def test_position_arrays():
+    positions = np.stack([orbit_state(RADIUS, 0.1, angle, 0.5)[0] for angle in (0.5, 1.5, 2.5)])
+    angles, distances = nearest_point(positions, RADIUS, 0.1, 0.5)
+    np.testing.assert_allclose(angles, [0.5, 1.5, 2.5], atol=1e-9)
+    np.testing.assert_allclose(distances, 0.0, atol=DISTANCE_TOLERANCE)
+
+
+def test_point_on_axis():
+    # проекция на плоскость орбиты нулевая - все точки орбиты на одном расстоянии
+    normal = np.array([0.0, 0.0, 1.0]) * RADIUS
+    _, distance = nearest_point(normal, RADIUS, 0.0, 0.0)
+    assert distance == pytest.approx(np.sqrt(2) * RADIUS)
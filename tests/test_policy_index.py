@@ -0,0 +1,77 @@
+""" проверки индекса политик: решение совпадает с перебором политик, в том числе с подстановкой """
+import itertools
+import random
+
+import pytest
+
+from src.system.policy_index import PolicyIndex
+from src.system.security_policy_type import SecurityPolicy, POLICY_WILDCARD
+
+NAMES = ['handler', 'central_control', 'orbit_control', 'satellite']
+OPERATIONS = ['ORBIT', 'change_orbit', 'send_data']
+
+
+def matches(policy: SecurityPolicy, source: str, destination: str, operation: str) -> bool:
+    """ проверка одной политики, как до индекса: подстановка совпадает с любым именем """
+    return all(rule in (POLICY_WILDCARD, value) for rule, value in (
+        (policy.source, source), (policy.destination, destination), (policy.operation, operation)))
+
+
+def test_exact_rules():
+    index = PolicyIndex([SecurityPolicy('handler', 'central_control', 'ORBIT')])
+    assert index.allows('handler', 'central_control', 'ORBIT')
+    assert not index.allows('handler', 'central_control', 'change_orbit')
+    assert not index.allows('central_control', 'handler', 'ORBIT')
+    assert not index.allows('unknown', 'central_control', 'ORBIT')
+    assert len(index) == 1
+
+
+def test_empty_index_denies():
+    assert not PolicyIndex([]).allows('handler', 'central_control', 'ORBIT')
+
+
+@pytest.mark.parametrize('policy, allowed, denied', [
+    (SecurityPolicy(POLICY_WILDCARD, 'satellite', 'send_data'),
+     ('anyone', 'satellite', 'send_data'), ('anyone', 'satellite', 'ORBIT')),
+    (SecurityPolicy('handler', POLICY_WILDCARD, 'ORBIT'),
+     ('handler', 'not registered', 'ORBIT'), ('satellite', 'central_control', 'ORBIT')),
+    (SecurityPolicy('handler', 'satellite', POLICY_WILDCARD),
+     ('handler', 'satellite', 'any operation'), ('handler', 'orbit_control', 'ORBIT')),
+    (SecurityPolicy(POLICY_WILDCARD, POLICY_WILDCARD, POLICY_WILDCARD),
+     ('a', 'b', 'c'), None),
+])
+def test_single_wildcard(policy, allowed, denied):
+    index = PolicyIndex([policy])
+    assert index.allows(*allowed)
+    if denied is not None:
+        assert not index.allows(*denied)
+
+
+def test_wildcard_rules_merge_with_exact_rules():
+    index = PolicyIndex([
+        SecurityPolicy('handler', 'central_control', 'ORBIT'),
+        SecurityPolicy(POLICY_WILDCARD, 'central_control', 'send_data'),
+        SecurityPolicy('handler', POLICY_WILDCARD, 'change_orbit'),
+    ])
+    # для конкретной пары действуют и ее правила, и правила с подстановкой
+    assert index.allows('handler', 'central_control', 'ORBIT')
+    assert index.allows('handler', 'central_control', 'send_data')
+    assert index.allows('handler', 'central_control', 'change_orbit')
+    assert index.allows('satellite', 'central_control', 'send_data')
+    assert not index.allows('satellite', 'central_control', 'ORBIT')
+    assert index.allows('handler', 'satellite', 'change_orbit')
+    assert not index.allows('handler', 'satellite', 'ORBIT')
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_matches_linear_scan(seed):
+    rng = random.Random(seed)
+    choices = NAMES + [POLICY_WILDCARD]
+    policies = [SecurityPolicy(rng.choice(choices), rng.choice(choices),
+                               rng.choice(OPERATIONS + [POLICY_WILDCARD]))
+                for _ in range(rng.randint(1, 6))]
+    index = PolicyIndex(policies)
+    for source, destination, operation in itertools.product(
+            NAMES + ['unknown'], NAMES + ['unknown'], OPERATIONS + ['other']):
+        expected = any(matches(policy, source, destination, operation) for policy in policies)
+        assert index.allows(source, destination, operation) == expected, (source, destination, operation)
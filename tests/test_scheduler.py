@@ -0,0 +1,62 @@
+""" проверки расписания с постоянной частотой: сроки на сетке, наверстывание и пропуск """
+import pytest
+
+from src.system.config import SCHEDULE_CATCH_UP, SCHEDULE_SKIP
+from src.system.scheduler import FixedRateSchedule
+
+# период, точно представимый в двоичной записи: сроки сетки сравниваются без погрешности
+INTERVAL = 0.25
+
+
+@pytest.mark.parametrize('policy', [SCHEDULE_CATCH_UP, SCHEDULE_SKIP])
+def test_on_time_ticks_stay_on_grid(policy):
+    schedule = FixedRateSchedule(INTERVAL, policy, start=10.0)
+    assert schedule.deadline == 10.25
+    assert schedule.due(10.2) == 0
+    # опоздание обработки не сдвигает следующий срок
+    assert schedule.due(10.3) == 1
+    assert schedule.deadline == 10.5
+    assert schedule.due(10.5) == 1
+    assert schedule.deadline == 10.75
+    assert (schedule.ticks, schedule.skipped) == (2, 0)
+
+
+def test_catch_up_runs_missed_ticks():
+    schedule = FixedRateSchedule(INTERVAL, SCHEDULE_CATCH_UP, start=0.0)
+    # сроки 0.25, 0.5, 0.75, 1.0 прошли - четыре срабатывания подряд
+    assert schedule.due(1.1) == 4
+    assert schedule.deadline == 1.25
+    assert (schedule.ticks, schedule.skipped) == (4, 0)
+
+
+def test_catch_up_is_limited():
+    schedule = FixedRateSchedule(INTERVAL, SCHEDULE_CATCH_UP, max_catch_up=2, start=0.0)
+    # прошло 8 сроков: текущее срабатывание и 2 пропущенных, остальные 5 отброшены
+    assert schedule.due(2.0) == 3
+    assert schedule.deadline == 2.25
+    assert (schedule.ticks, schedule.skipped) == (3, 5)
+
+
+def test_skip_drops_missed_ticks():
+    schedule = FixedRateSchedule(INTERVAL, SCHEDULE_SKIP, start=0.0)
+    assert schedule.due(1.1) == 1
+    assert schedule.deadline == 1.25
+    assert (schedule.ticks, schedule.skipped) == (1, 3)
+    assert schedule.due(1.25) == 1
+    assert (schedule.ticks, schedule.skipped) == (2, 3)
+
+
+def test_jitter_and_stats():
+    schedule = FixedRateSchedule(INTERVAL, SCHEDULE_SKIP, start=0.0)
+    schedule.due(0.375)
+    stats = schedule.stats()
+    assert stats["interval_ms"] == 250
+    assert stats["policy"] == SCHEDULE_SKIP
+    assert (stats["ticks"], stats["skipped"]) == (1, 0)
+    assert stats["jitter_max_ms"] == pytest.approx(125)
+
+
+@pytest.mark.parametrize('interval, policy', [(0, SCHEDULE_SKIP), (-1, SCHEDULE_SKIP), (1, 'unknown')])
+def test_invalid_arguments(interval, policy):
+    with pytest.raises(ValueError):
+        FixedRateSchedule(interval, policy)
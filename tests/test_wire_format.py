@@ -0,0 +1,156 @@
+""" проверки кадров wire_format: событие проходит кодирование и разбор без изменений """
+import pytest
+
+from src.system.config import PRIORITY_COMMAND, PRIORITY_LANES, PRIORITY_NORMAL, \
+    PRIORITY_TELEMETRY, SATELITE_QUEUE_NAME, ORBIT_DRAWER_QUEUE_NAME, SECURITY_MONITOR_QUEUE_NAME
+from src.system.event_types import Event, ControlEvent
+from src.system.wire_format import FRAME_BATCH, FRAME_CONTROL, FRAME_EVENT, FRAME_TRACED_EVENT, \
+    PAYLOAD_EMPTY_LIST, PAYLOAD_NONE, PAYLOAD_PAIR, PAYLOAD_PICKLE, PAYLOAD_TRIPLE, \
+    PAYLOAD_TRIPLE_LIST, append_hop, decode, decode_control_event, decode_correlation, \
+    decode_event, decode_frames, decode_header, decode_trace, encode, encode_batch, \
+    encode_event, frame_count, frame_priority, restamp, split_batch
+
+
+def make_event(**fields) -> Event:
+    """ событие без трассы и номера запроса, поля можно заменить.
+        Класс приоритета задан явно: разобранное событие всегда получает класс из кадра """
+    values = dict(
+        source=SATELITE_QUEUE_NAME, destination=ORBIT_DRAWER_QUEUE_NAME,
+        operation='update_orbit_data', parameters=(1.5, -2.5),
+        timestamp=123.25, trace_id=None, hops=None, priority=PRIORITY_TELEMETRY)
+    values.update(fields)
+    return Event(**values)
+
+
+@pytest.mark.parametrize('parameters, kind', [
+    (None, PAYLOAD_NONE),
+    ((1.5, -2.5), PAYLOAD_PAIR),
+    ((7e5, 0.1, 0.2), PAYLOAD_TRIPLE),
+    ([7e5, 0.1, 0.2], PAYLOAD_TRIPLE_LIST),
+    ([], PAYLOAD_EMPTY_LIST),
+    ({'zone': (1, 2, 3, 4)}, PAYLOAD_PICKLE),
+    ((1, 2), PAYLOAD_PICKLE),  # целые числа - не пара координат
+])
+def test_payload_round_trip(parameters, kind):
+    event = make_event(parameters=parameters)
+    frame = encode_event(event)
+    assert frame[0] == FRAME_EVENT
+    assert decode_header(frame)[3] == kind
+    decoded = decode_event(frame)
+    assert decoded.parameters == parameters
+    assert type(decoded.parameters) is type(parameters)
+    assert decoded.timestamp == event.timestamp
+
+
+def test_pickle_fallback_keeps_extra_parameters_and_signature():
+    event = make_event(parameters=(1.5, -2.5), extra_parameters=[b'photo'], signature='abc')
+    decoded = decode_event(encode_event(event))
+    assert decode_header(encode_event(event))[3] == PAYLOAD_PICKLE
+    assert (decoded.parameters, decoded.extra_parameters, decoded.signature) == \
+        ((1.5, -2.5), [b'photo'], 'abc')
+
+
+def test_inline_names_round_trip():
+    event = make_event(source='внешний клиент', destination='new_queue', operation='custom op',
+                       priority=PRIORITY_NORMAL)
+    source, destination, operation, _, _, _ = decode_header(encode_event(event))
+    assert (source, destination, operation) == ('внешний клиент', 'new_queue', 'custom op')
+    assert decode_event(encode_event(event)) == event
+
+
+@pytest.mark.parametrize('priority', range(PRIORITY_LANES))
+def test_explicit_priority_bits(priority):
+    frame = encode_event(make_event(priority=priority))
+    assert frame_priority(frame) == priority
+    decoded = decode_event(frame)
+    assert decoded.priority == priority
+    assert decode_header(frame)[3] == PAYLOAD_PAIR
+
+
+def test_priority_by_operation_and_clamped():
+    assert frame_priority(encode_event(make_event(priority=None))) == PRIORITY_TELEMETRY
+    command = make_event(operation='change_orbit', priority=None)
+    assert frame_priority(encode_event(command)) == PRIORITY_COMMAND
+    other = make_event(operation='custom op', priority=None)
+    assert frame_priority(encode_event(other)) == PRIORITY_NORMAL
+    # класс вне диапазона не задевает соседние флаги заголовка
+    frame = encode_event(make_event(priority=PRIORITY_LANES + 5))
+    assert frame_priority(frame) == PRIORITY_LANES - 1
+    assert decode_correlation(frame) is None
+    assert decode_header(frame)[3] == PAYLOAD_PAIR
+
+
+@pytest.mark.parametrize('correlation_id', [None, 0, 1, 2 ** 64 - 1])
+def test_correlated_flag(correlation_id):
+    frame = encode_event(make_event(correlation_id=correlation_id, source='inline source'))
+    assert decode_correlation(frame) == correlation_id
+    decoded = decode_event(frame)
+    assert decoded.correlation_id == correlation_id
+    assert decoded.source == 'inline source'
+    assert decoded.parameters == (1.5, -2.5)
+
+
+def test_traced_event_hops():
+    event = make_event(trace_id=42, hops=[(SATELITE_QUEUE_NAME, 1.0), ('этап', 2.0)],
+                       correlation_id=7, parameters={'any': 1})
+    frame = encode_event(event)
+    assert frame[0] == FRAME_TRACED_EVENT
+    assert decode_trace(frame) == (42, [(SATELITE_QUEUE_NAME, 1.0), ('этап', 2.0)])
+
+    frame = append_hop(frame, SECURITY_MONITOR_QUEUE_NAME, 3.0)
+    frame = append_hop(frame, 'другой этап', 4.0)
+    decoded = decode_event(frame)
+    assert decoded.trace_id == 42
+    assert decoded.hops == [(SATELITE_QUEUE_NAME, 1.0), ('этап', 2.0),
+                            (SECURITY_MONITOR_QUEUE_NAME, 3.0), ('другой этап', 4.0)]
+    assert decoded.correlation_id == 7
+    assert decoded.parameters == {'any': 1}
+
+
+def test_append_hop_ignores_untraced_event():
+    frame = encode_event(make_event())
+    assert append_hop(frame, SECURITY_MONITOR_QUEUE_NAME, 1.0) is frame
+
+
+def test_restamp_drops_trace():
+    frame = encode_event(make_event(trace_id=5, hops=[('этап', 1.0)], priority=PRIORITY_COMMAND))
+    frame = restamp(frame, 99.0)
+    assert frame[0] == FRAME_EVENT
+    decoded = decode_event(frame)
+    assert (decoded.trace_id, decoded.timestamp, decoded.priority) == (None, 99.0, PRIORITY_COMMAND)
+    assert decoded.parameters == (1.5, -2.5)
+
+
+@pytest.mark.parametrize('operation', ['stop', 'нестандартная команда'])
+def test_control_round_trip(operation):
+    frame = encode(ControlEvent(operation))
+    assert frame[0] == FRAME_CONTROL
+    assert frame_priority(frame) == PRIORITY_COMMAND
+    assert decode(frame) == ControlEvent(operation)
+
+
+def test_batch_round_trip():
+    messages = [make_event(), ControlEvent('stop'),
+                make_event(trace_id=1, hops=[], correlation_id=3), make_event(parameters=None)]
+    batch = encode_batch([encode(message) for message in messages])
+    assert batch[0] == FRAME_BATCH
+    assert frame_count(batch) == len(messages)
+    assert len(split_batch(batch)) == len(messages)
+    assert decode_frames(batch) == messages
+
+
+def test_single_frame_count():
+    frame = encode(make_event())
+    assert frame_count(frame) == 1
+    assert decode_frames(frame) == [make_event()]
+
+
+def test_unknown_messages_rejected():
+    with pytest.raises(TypeError):
+        encode('событие')
+    with pytest.raises(ValueError):
+        decode(b'\x7f' + bytes(32))
+    with pytest.raises(ValueError):
+        decode_control_event(encode(make_event()))
+    with pytest.raises(ValueError):
+        restamp(encode_batch([encode(make_event())]), 1.0)